@@ -0,0 +1,106 @@
+"""add local mailbox mirror tables
+
+Revision ID: 20260216_01
+Revises: 20260214_01
+Create Date: 2026-02-16 10:00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260216_01"
+down_revision: str | None = "20260214_01"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "mailbox_sync_states",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("history_id", sa.Text(), nullable=True),
+        sa.Column("backfill_page_tokens", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("backfilled_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_synced_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_mailbox_sync_states_user_id", "mailbox_sync_states", ["user_id"], unique=True
+    )
+
+    op.create_table(
+        "mail_messages",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("gmail_message_id", sa.Text(), nullable=False),
+        sa.Column("thread_id", sa.Text(), nullable=True),
+        sa.Column(
+            "label_ids",
+            postgresql.ARRAY(sa.Text()),
+            server_default=sa.text("'{}'"),
+            nullable=False,
+        ),
+        sa.Column("sender", sa.Text(), nullable=True),
+        sa.Column("recipients", sa.Text(), nullable=True),
+        sa.Column("subject", sa.Text(), nullable=True),
+        sa.Column("snippet", sa.Text(), nullable=True),
+        sa.Column("headers_json", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("internal_date", sa.BigInteger(), nullable=False),
+        sa.Column("history_id", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "gmail_message_id", name="uq_mail_messages_user_gmail_id"),
+    )
+    op.create_index(
+        "ix_mail_messages_user_internal_date",
+        "mail_messages",
+        ["user_id", "internal_date"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_mail_messages_label_ids",
+        "mail_messages",
+        ["label_ids"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mail_messages_label_ids", table_name="mail_messages")
+    op.drop_index("ix_mail_messages_user_internal_date", table_name="mail_messages")
+    op.drop_table("mail_messages")
+
+    op.drop_index("ix_mailbox_sync_states_user_id", table_name="mailbox_sync_states")
+    op.drop_table("mailbox_sync_states")
@@ -0,0 +1,57 @@
+"""add full-text search index to mailbox mirror
+
+Revision ID: 20260216_02
+Revises: 20260216_01
+Create Date: 2026-02-16 15:30:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260216_02"
+down_revision: str | None = "20260216_01"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(subject, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(sender, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(snippet, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(body_text, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    op.add_column("mail_messages", sa.Column("body_text", sa.Text(), nullable=True))
+    op.add_column(
+        "mail_messages",
+        sa.Column("body_indexed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "mail_messages",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_mail_messages_search_vector",
+        "mail_messages",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mail_messages_search_vector", table_name="mail_messages")
+    op.drop_column("mail_messages", "search_vector")
+    op.drop_column("mail_messages", "body_indexed_at")
+    op.drop_column("mail_messages", "body_text")
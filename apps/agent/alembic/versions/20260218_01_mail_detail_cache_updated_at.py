@@ -0,0 +1,29 @@
+"""index message detail cache entries by age for pruning
+
+Revision ID: 20260218_01
+Revises: 20260217_01
+Create Date: 2026-02-18 09:00:00
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260218_01"
+down_revision: str | None = "20260217_01"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_mail_detail_cache_entries_updated_at",
+        "mail_detail_cache_entries",
+        ["updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mail_detail_cache_entries_updated_at", table_name="mail_detail_cache_entries")
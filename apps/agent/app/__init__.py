@@ -3,3 +3,8 @@ from dotenv import load_dotenv
 
 def init() -> None:
     load_dotenv()
+
+
+# Settings such as the Google endpoint URLs and the module-level service singletons read the
+# environment at import time, so `.env` has to be loaded before any `app.*` module runs.
+init()
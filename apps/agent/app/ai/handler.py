@@ -1,13 +1,16 @@
 from fastapi import HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
 
-from app.ai.schemas import AIChatRequest
+from app.ai.schemas import AIChatRequest, AIChatResponse
 from app.ai.search_agent import SearchAgent
+from app.utils.serialization import model_json_response
 
 search_agent = SearchAgent()
+AI_CHAT_RESPONSE_ADAPTER = TypeAdapter(AIChatResponse)
 
 
-async def handle_ai_chat(user_id: str, payload: AIChatRequest) -> JSONResponse:
+async def handle_ai_chat(user_id: str, payload: AIChatRequest) -> Response:
     """Execute SearchAgent workflow and return UI-actionable chat response."""
     try:
         result = await search_agent.search(
@@ -16,10 +19,7 @@ async def handle_ai_chat(user_id: str, payload: AIChatRequest) -> JSONResponse:
             context=payload.context.model_dump(by_alias=True),
             model_selector=payload.model,
         )
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=result.model_dump(by_alias=True),
-        )
+        return model_json_response(AI_CHAT_RESPONSE_ADAPTER, result)
     except HTTPException as exc:
         print(f"Error in handle_ai_chat: {exc}")
         return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
@@ -1,18 +1,157 @@
 from __future__ import annotations
 
-from datetime import UTC, datetime
-from uuid import UUID
+from dataclasses import dataclass
+from uuid import UUID, uuid4
 
 from fastapi import HTTPException, status
-from sqlalchemy import desc, select
+from sqlalchemy import (
+    CTE,
+    ColumnElement,
+    Insert,
+    cast,
+    desc,
+    exists,
+    func,
+    insert,
+    literal,
+    null,
+    select,
+    true,
+    update,
+)
 
 from app.config.db import get_session_maker
 from app.models import AIConversation, AIConversationMessage
 
 
+@dataclass(frozen=True)
+class ChatTurnStart:
+    conversation_id: str
+    history: list[dict[str, str]]
+
+
 class AIConversationMemoryService:
     """Persist and retrieve chat memory for context-aware AI conversations."""
 
+    async def begin_turn(
+        self,
+        user_id: str,
+        mailbox: str,
+        conversation_id: str | None,
+        content: str,
+        limit: int = 14,
+    ) -> ChatTurnStart:
+        """Resolve or create the conversation, store the user message and load recent history.
+
+        Runs as one statement and one commit. Conversation resolution, the `last_message_at`
+        bump and the message insert are data-modifying CTEs, and the history window is read in
+        the same statement. That read cannot see the row inserted beside it, so it fetches
+        `limit - 1` earlier messages and the new one is appended here.
+        """
+        try:
+            parsed_user_id = UUID(user_id)
+            parsed_conversation_id = self._parse_uuid_or_none(conversation_id)
+            normalized_mailbox = mailbox if mailbox in {"inbox", "sent"} else "inbox"
+
+            candidate = select(AIConversation.id).where(
+                AIConversation.user_id == parsed_user_id,
+                AIConversation.is_archived.is_(False),
+            )
+            if parsed_conversation_id is not None:
+                candidate = candidate.where(AIConversation.id == parsed_conversation_id)
+            else:
+                candidate = (
+                    candidate.where(AIConversation.mailbox == normalized_mailbox)
+                    .order_by(desc(AIConversation.last_message_at))
+                    .limit(1)
+                )
+            bumped = (
+                update(AIConversation)
+                .where(AIConversation.id.in_(candidate))
+                .values(last_message_at=func.now())
+                .returning(AIConversation.id)
+                .cte("bumped")
+            )
+            resolved = select(bumped.c.id)
+            if parsed_conversation_id is None:
+                created = (
+                    insert(AIConversation)
+                    .from_select(
+                        ["id", "user_id", "mailbox", "title"],
+                        select(
+                            literal(uuid4(), AIConversation.__table__.c.id.type),
+                            literal(parsed_user_id, AIConversation.__table__.c.user_id.type),
+                            literal(normalized_mailbox),
+                            literal(f"{normalized_mailbox.title()} chat"),
+                        ).where(~exists(select(bumped.c.id))),
+                    )
+                    .returning(AIConversation.id)
+                    .cte("created")
+                )
+                resolved = resolved.union_all(select(created.c.id))
+            conversation = resolved.cte("conversation")
+            inserted = self._insert_message(conversation, parsed_user_id, "user", content).cte(
+                "inserted"
+            )
+            recent = (
+                select(
+                    AIConversationMessage.role,
+                    AIConversationMessage.content,
+                    AIConversationMessage.created_at,
+                )
+                .where(
+                    AIConversationMessage.conversation_id == inserted.c.conversation_id,
+                    AIConversationMessage.user_id == parsed_user_id,
+                )
+                .order_by(desc(AIConversationMessage.created_at))
+                .limit(max(limit - 1, 0))
+                .lateral("recent")
+            )
+            statement = (
+                select(inserted.c.conversation_id, recent.c.role, recent.c.content)
+                .select_from(inserted)
+                .outerjoin(recent, true())
+                .order_by(recent.c.created_at)
+            )
+
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                rows = (await session.execute(statement)).all()
+                if not rows:
+                    # Only an explicit id can miss; find out why before reporting it.
+                    is_archived = await session.scalar(
+                        select(AIConversation.is_archived).where(
+                            AIConversation.id == parsed_conversation_id,
+                            AIConversation.user_id == parsed_user_id,
+                        )
+                    )
+                    if is_archived is None:
+                        raise HTTPException(
+                            status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Conversation not found",
+                        )
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Conversation is archived",
+                    )
+                await session.commit()
+
+            # The outer join yields one row with a NULL role when there is no earlier history.
+            history = [
+                {"role": row.role, "content": row.content} for row in rows if row.role is not None
+            ]
+            history.append({"role": "user", "content": content})
+            return ChatTurnStart(conversation_id=str(rows[0].conversation_id), history=history)
+        except HTTPException as exc:
+            print(f"Error in AIConversationMemoryService.begin_turn: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in AIConversationMemoryService.begin_turn: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to start conversation turn",
+            ) from exc
+
     async def resolve_conversation(
         self,
         user_id: str,
@@ -81,35 +220,57 @@ class AIConversationMemoryService:
         ui_actions_json: list[dict] | None = None,
         trace_json: dict | None = None,
     ) -> AIConversationMessage:
-        """Persist one conversation message and bump conversation last activity timestamp."""
+        """Persist one conversation message and bump conversation last activity timestamp.
+
+        The bump and the insert run as one statement; the returned message is built from the
+        inserted values rather than reloaded.
+        """
         try:
             parsed_conversation_id = UUID(conversation_id)
             parsed_user_id = UUID(user_id)
+            bumped = (
+                update(AIConversation)
+                .where(
+                    AIConversation.id == parsed_conversation_id,
+                    AIConversation.user_id == parsed_user_id,
+                )
+                .values(last_message_at=func.now())
+                .returning(AIConversation.id)
+                .cte("bumped")
+            )
+            message = AIConversationMessage(
+                id=uuid4(),
+                conversation_id=parsed_conversation_id,
+                user_id=parsed_user_id,
+                role=role,
+                content=content,
+                ui_actions_json=(
+                    {"items": ui_actions_json} if ui_actions_json is not None else None
+                ),
+                trace_json=trace_json,
+                token_count=self._estimate_token_count(content),
+            )
+            statement = self._insert_message(
+                bumped,
+                parsed_user_id,
+                role,
+                content,
+                message_id=message.id,
+                ui_actions_json=message.ui_actions_json,
+                trace_json=trace_json,
+            )
+
             session_maker = get_session_maker()
             async with session_maker() as session:
-                conversation = await session.get(AIConversation, parsed_conversation_id)
-                if conversation is None or conversation.user_id != parsed_user_id:
+                inserted = (await session.execute(statement)).first()
+                if inserted is None:
                     raise HTTPException(
                         status_code=status.HTTP_404_NOT_FOUND,
                         detail="Conversation not found",
                     )
-
-                message = AIConversationMessage(
-                    conversation_id=parsed_conversation_id,
-                    user_id=parsed_user_id,
-                    role=role,
-                    content=content,
-                    ui_actions_json=(
-                        {"items": ui_actions_json} if ui_actions_json is not None else None
-                    ),
-                    trace_json=trace_json,
-                    token_count=self._estimate_token_count(content),
-                )
-                conversation.last_message_at = datetime.now(UTC)
-                session.add(message)
                 await session.commit()
-                await session.refresh(message)
-                return message
+            message.created_at = inserted.created_at
+            return message
         except HTTPException as exc:
             print(f"Error in AIConversationMemoryService.append_message: {exc}")
             raise
@@ -168,6 +329,54 @@ class AIConversationMemoryService:
             print(f"Error in AIConversationMemoryService.build_history_context: {exc}")
             return []
 
+    def _insert_message(
+        self,
+        conversation: CTE,
+        user_id: UUID,
+        role: str,
+        content: str,
+        message_id: UUID | None = None,
+        ui_actions_json: dict | None = None,
+        trace_json: dict | None = None,
+    ) -> Insert:
+        """Build an INSERT of one message into the conversation the given CTE resolves to."""
+        columns = AIConversationMessage.__table__.c
+        return (
+            insert(AIConversationMessage)
+            .from_select(
+                [
+                    "id",
+                    "conversation_id",
+                    "user_id",
+                    "role",
+                    "content",
+                    "ui_actions_json",
+                    "trace_json",
+                    "token_count",
+                ],
+                select(
+                    literal(message_id or uuid4(), columns.id.type),
+                    conversation.c.id,
+                    literal(user_id, columns.user_id.type),
+                    literal(role),
+                    literal(content),
+                    self._json_literal(ui_actions_json, columns.ui_actions_json.type),
+                    self._json_literal(trace_json, columns.trace_json.type),
+                    literal(self._estimate_token_count(content)),
+                ),
+            )
+            .returning(
+                AIConversationMessage.conversation_id,
+                AIConversationMessage.created_at,
+            )
+        )
+
+    def _json_literal(self, value: dict | None, json_type) -> ColumnElement:
+        """Bind a JSONB value, keeping None as SQL NULL rather than JSON `null`."""
+        if value is None:
+            return cast(null(), json_type)
+        return literal(value, json_type)
+
     def _estimate_token_count(self, content: str) -> int:
         """Approximate token count for metadata analytics and future trimming."""
         try:
@@ -40,7 +40,7 @@ class SearchToolFactory:
                 bounded_top_k = max(1, min(top_k, self.settings.tool_config.top_k_max))
                 normalized_mailbox = "sent" if mailbox == "sent" else "inbox"
 
-                search_result = await self.mail_service.search_messages(
+                search_result = await self.mail_service.search_candidates(
                     user_id=self.user_id,
                     mailbox=normalized_mailbox,
                     query=query,
@@ -95,7 +95,7 @@ class SearchToolFactory:
                 resolved_mailbox = mailbox.strip() or self.default_mailbox
                 normalized_mailbox = "sent" if resolved_mailbox == "sent" else "inbox"
                 detail = await self.mail_service.get_message_detail(self.user_id, resolved_mail_id)
-                content_text = self.mail_service.extract_ai_readable_content(detail)
+                content_text = await self.mail_service.extract_ai_readable_content(detail)
 
                 payload = {
                     "ok": True,
@@ -7,8 +7,10 @@ from fastapi import WebSocket
 from pydantic import ValidationError
 
 from app.ai.memory_service import AIConversationMemoryService
-from app.ai.schemas import AIWsChatRequestPayload
+from app.ai.schemas import AIUiAction, AIWsChatRequestPayload
 from app.ai.search_agent import SearchAgent
+from app.mail.schemas import MailListItem
+from app.utils.serialization import send_ws_json
 
 
 class AIWebSocketChatHandler:
@@ -34,12 +36,14 @@ class AIWebSocketChatHandler:
                 await self._emit_chat_error(websocket, chat_id, "Message cannot be empty")
                 return
 
-            conversation = await self.memory_service.resolve_conversation(
+            turn = await self.memory_service.begin_turn(
                 user_id=user_id,
                 mailbox=mailbox,
                 conversation_id=request_payload.conversation_id,
+                content=message,
+                limit=14,
             )
-            conversation_id = str(conversation.id)
+            conversation_id = turn.conversation_id
 
             await self._emit_chat_start(
                 websocket=websocket,
@@ -49,23 +53,11 @@ class AIWebSocketChatHandler:
                 model=request_payload.model,
             )
 
-            await self.memory_service.append_message(
-                conversation_id=conversation_id,
-                user_id=user_id,
-                role="user",
-                content=message,
-            )
-            memory_messages = await self.memory_service.fetch_recent_messages(
-                conversation_id=conversation_id,
-                user_id=user_id,
-                limit=14,
-            )
-            history_context = self.memory_service.build_history_context(memory_messages)
             response = await self.search_agent.search(
                 user_id=user_id,
                 message=message,
                 context=request_payload.context.model_dump(by_alias=True),
-                memory_messages=history_context,
+                memory_messages=turn.history,
                 model_selector=request_payload.model,
             )
 
@@ -77,16 +69,13 @@ class AIWebSocketChatHandler:
                     delta=chunk,
                 )
 
-            serialized_results = [
-                item.model_dump(by_alias=True) for item in response.results
-            ]
             for action in response.ui_actions:
                 await self._emit_chat_action(
                     websocket=websocket,
                     chat_id=chat_id,
                     conversation_id=conversation_id,
-                    action=action.model_dump(by_alias=True),
-                    results=serialized_results,
+                    action=action,
+                    results=response.results,
                 )
 
             response_payload = response.model_dump(by_alias=True)
@@ -122,7 +111,8 @@ class AIWebSocketChatHandler:
     ) -> None:
         """Send chat_start event to mark beginning of agent processing."""
         try:
-            await websocket.send_json(
+            await send_ws_json(
+                websocket,
                 {
                     "type": "chat_start",
                     "eventId": f"{chat_id}-start",
@@ -133,7 +123,7 @@ class AIWebSocketChatHandler:
                         "userMessage": user_message,
                         "model": model,
                     },
-                }
+                },
             )
         except Exception as exc:
             print(f"Error in AIWebSocketChatHandler._emit_chat_start: {exc}")
@@ -148,7 +138,8 @@ class AIWebSocketChatHandler:
     ) -> None:
         """Send one incremental assistant text chunk to drive streaming UI updates."""
         try:
-            await websocket.send_json(
+            await send_ws_json(
+                websocket,
                 {
                     "type": "chat_delta",
                     "eventId": f"{chat_id}-delta-{datetime.now(UTC).timestamp()}",
@@ -158,7 +149,7 @@ class AIWebSocketChatHandler:
                         "conversationId": conversation_id,
                         "delta": delta,
                     },
-                }
+                },
             )
         except Exception as exc:
             print(f"Error in AIWebSocketChatHandler._emit_chat_delta: {exc}")
@@ -169,12 +160,13 @@ class AIWebSocketChatHandler:
         websocket: WebSocket,
         chat_id: str,
         conversation_id: str,
-        action: dict[str, Any],
-        results: list[dict[str, Any]],
+        action: AIUiAction,
+        results: list[MailListItem],
     ) -> None:
         """Send a UI action event so client can update mail panel without waiting for completion."""
         try:
-            await websocket.send_json(
+            await send_ws_json(
+                websocket,
                 {
                     "type": "chat_action",
                     "eventId": f"{chat_id}-action-{datetime.now(UTC).timestamp()}",
@@ -185,7 +177,7 @@ class AIWebSocketChatHandler:
                         "action": action,
                         "results": results,
                     },
-                }
+                },
             )
         except Exception as exc:
             print(f"Error in AIWebSocketChatHandler._emit_chat_action: {exc}")
@@ -200,7 +192,8 @@ class AIWebSocketChatHandler:
     ) -> None:
         """Send final chat payload with assistant text, actions, results, and trace metadata."""
         try:
-            await websocket.send_json(
+            await send_ws_json(
+                websocket,
                 {
                     "type": "chat_completed",
                     "eventId": f"{chat_id}-completed",
@@ -210,7 +203,7 @@ class AIWebSocketChatHandler:
                         "conversationId": conversation_id,
                         **response_payload,
                     },
-                }
+                },
             )
         except Exception as exc:
             print(f"Error in AIWebSocketChatHandler._emit_chat_completed: {exc}")
@@ -224,7 +217,8 @@ class AIWebSocketChatHandler:
     ) -> None:
         """Send error event for malformed requests or agent failures."""
         try:
-            await websocket.send_json(
+            await send_ws_json(
+                websocket,
                 {
                     "type": "chat_error",
                     "eventId": f"{chat_id or 'chat'}-error",
@@ -233,7 +227,7 @@ class AIWebSocketChatHandler:
                         "chatId": chat_id,
                         "message": message,
                     },
-                }
+                },
             )
         except Exception as exc:
             print(f"Error in AIWebSocketChatHandler._emit_chat_error: {exc}")
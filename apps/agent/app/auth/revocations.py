@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from datetime import UTC, datetime
+
+from sqlalchemy import select
+
+from app.config.db import get_session_maker
+from app.models import RefreshToken
+from app.utils.ws_security import ws_session_id
+
+
+class RevokedSessionSet:
+    """In-memory set of revoked, unexpired session ids for websocket connect checks.
+
+    Reloaded from Postgres periodically; logout in this process adds its session at once.
+    Other workers pick up a logout on their next reload, and websocket tokens are short-lived
+    anyway, so a revoked session cannot open sockets for longer than that window.
+    """
+
+    def __init__(self):
+        self.refresh_interval_seconds = float(os.getenv("WS_REVOCATION_REFRESH_SECONDS", "30"))
+        self._session_ids: frozenset[str] = frozenset()
+        self._local_session_ids: set[str] = set()
+        self._loaded_at: float | None = None
+        self._loop_task: asyncio.Task | None = None
+        self._counters = {"checks": 0, "rejected": 0, "reloads": 0, "reload_failures": 0}
+
+    def is_revoked(self, session_id: str) -> bool:
+        self._counters["checks"] += 1
+        revoked = session_id in self._session_ids or session_id in self._local_session_ids
+        if revoked:
+            self._counters["rejected"] += 1
+        return revoked
+
+    def revoke(self, session_token: str) -> None:
+        """Mark a session revoked in this process without waiting for the next reload."""
+        self._local_session_ids.add(ws_session_id(session_token))
+
+    async def reload(self) -> int:
+        """Replace the set with every revoked session that has not expired yet."""
+        try:
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                token_ids = list(
+                    await session.scalars(
+                        select(RefreshToken.token_id).where(
+                            RefreshToken.revoked.is_(True),
+                            RefreshToken.expires_at > datetime.now(UTC),
+                        )
+                    )
+                )
+            self._session_ids = frozenset(ws_session_id(token_id) for token_id in token_ids)
+            # Keep local revocations the snapshot may have raced past until a reload sees them.
+            self._local_session_ids -= self._session_ids
+            self._loaded_at = time.monotonic()
+            self._counters["reloads"] += 1
+            return len(self._session_ids)
+        except Exception as exc:
+            self._counters["reload_failures"] += 1
+            print(f"Error in RevokedSessionSet.reload: {exc}")
+            return len(self._session_ids)
+
+    async def start(self) -> None:
+        await self.reload()
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "revoked": len(self._session_ids) + len(self._local_session_ids),
+            "ageSeconds": (
+                round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None
+            ),
+            "checks": self._counters["checks"],
+            "rejected": self._counters["rejected"],
+            "reloads": self._counters["reloads"],
+            "reloadFailures": self._counters["reload_failures"],
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval_seconds)
+            await self.reload()
+
+
+revoked_sessions = RevokedSessionSet()
+
+
+async def start_revocation_refresher() -> None:
+    await revoked_sessions.start()
+
+
+async def stop_revocation_refresher() -> None:
+    await revoked_sessions.stop()
@@ -2,12 +2,15 @@ import os
 from datetime import UTC, datetime, timedelta
 from urllib.parse import urlencode
 
-import httpx
 from fastapi import HTTPException, status
 from sqlalchemy import select
 
+from app.auth.revocations import revoked_sessions
 from app.auth.schemas import AuthUserResponse, GoogleCallbackRequest, GoogleCallbackResponse
+from app.auth.session_cache import session_cache
 from app.config.db import get_session_maker
+from app.config.http import get_http_client
+from app.mail.token_cache import access_token_cache
 from app.models import OauthAccount, RefreshToken, User
 from app.utils.constants import (
     GOOGLE_AUTH_URL,
@@ -113,16 +116,14 @@ async def _exchange_code_for_tokens(code: str, code_verifier: str) -> dict:
             "redirect_uri": redirect_uri,
             "grant_type": "authorization_code",
         }
-        async with httpx.AsyncClient(timeout=20) as client:
-            response = await client.post(GOOGLE_TOKEN_URL, data=payload)
-
-        if response.status_code >= 400:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to exchange Google authorization code",
-            )
-
-        return response.json()
+        client = get_http_client()
+        async with client.post(GOOGLE_TOKEN_URL, data=payload) as response:
+            if response.status >= 400:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Failed to exchange Google authorization code",
+                )
+            return await response.json(content_type=None)
     except HTTPException as exc:
         print(f"Error in _exchange_code_for_tokens: {exc}")
         raise
@@ -137,16 +138,14 @@ async def _exchange_code_for_tokens(code: str, code_verifier: str) -> dict:
 async def _fetch_google_profile(access_token: str) -> dict:
     try:
         headers = {"Authorization": f"Bearer {access_token}"}
-        async with httpx.AsyncClient(timeout=20) as client:
-            response = await client.get(GOOGLE_USERINFO_URL, headers=headers)
-
-        if response.status_code >= 400:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to fetch Google user profile",
-            )
-
-        return response.json()
+        client = get_http_client()
+        async with client.get(GOOGLE_USERINFO_URL, headers=headers) as response:
+            if response.status >= 400:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Failed to fetch Google user profile",
+                )
+            return await response.json(content_type=None)
     except HTTPException as exc:
         print(f"Error in _fetch_google_profile: {exc}")
         raise
@@ -249,6 +248,10 @@ async def complete_google_login(payload: GoogleCallbackRequest) -> GoogleCallbac
 
             await session.commit()
             await session.refresh(user)
+            # A fresh login replaces the Google tokens, so drop any cached access token.
+            access_token_cache.invalidate(str(user.id))
+            # Profile fields may have changed; don't serve the old ones from other sessions.
+            session_cache.invalidate_user(str(user.id))
 
             return GoogleCallbackResponse(
                 session_token=session_token,
@@ -268,25 +271,34 @@ async def complete_google_login(payload: GoogleCallbackRequest) -> GoogleCallbac
 
 async def get_current_user(session_token: str) -> AuthUserResponse:
     try:
+        cached_user = session_cache.get(session_token)
+        if cached_user is not None:
+            session_cache.touch(session_token)
+            return cached_user
+
         session_maker = get_session_maker()
         async with session_maker() as session:
-            refresh_token = await session.scalar(
-                select(RefreshToken).where(
-                    RefreshToken.token_id == session_token,
-                    RefreshToken.revoked.is_(False),
-                    RefreshToken.expires_at > datetime.now(UTC),
+            row = (
+                await session.execute(
+                    select(RefreshToken.expires_at, User)
+                    .join(User, User.id == RefreshToken.user_id)
+                    .where(
+                        RefreshToken.token_id == session_token,
+                        RefreshToken.revoked.is_(False),
+                        RefreshToken.expires_at > datetime.now(UTC),
+                    )
                 )
-            )
-            if refresh_token is None:
+            ).first()
+            if row is None:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
 
-            refresh_token.last_used_at = datetime.now(UTC)
-            user = await session.get(User, refresh_token.user_id)
-            if user is None:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+            session_expires_at, user = row
+            user_response = _to_user_response(user)
 
-            await session.commit()
-            return _to_user_response(user)
+        # last_used_at is written behind in batches rather than committed per request.
+        session_cache.put(session_token, user_response, session_expires_at)
+        session_cache.touch(session_token)
+        return user_response
     except HTTPException as exc:
         print(f"Error in get_current_user: {exc}")
         raise
@@ -309,6 +321,8 @@ async def logout(session_token: str) -> None:
                 return
             refresh_token.revoked = True
             await session.commit()
+        session_cache.invalidate(session_token)
+        revoked_sessions.revoke(session_token)
     except Exception as exc:
         print(f"Error in logout: {exc}")
         raise HTTPException(
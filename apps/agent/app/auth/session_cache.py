@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime, Text, column, update, values
+
+from app.auth.schemas import AuthUserResponse
+from app.config.db import get_session_maker
+from app.models import RefreshToken
+
+
+@dataclass(frozen=True)
+class CachedSession:
+    user: AuthUserResponse
+    session_expires_at: datetime
+    cached_at: float
+
+
+class SessionCache:
+    """Short-lived map of session token -> user, with write-behind `last_used_at` updates.
+
+    Hits skip Postgres entirely. Logout invalidates the token in this process; other workers
+    stop honouring a revoked token once their entry ages past the TTL. Touches are buffered
+    and flushed periodically as one bulk UPDATE instead of a commit per request.
+    """
+
+    FLUSH_CHUNK_SIZE = 1000
+
+    def __init__(self):
+        self.ttl_seconds = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "30"))
+        self.max_entries = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000"))
+        self.flush_interval_seconds = float(os.getenv("SESSION_LAST_USED_FLUSH_SECONDS", "60"))
+        self._sessions: OrderedDict[str, CachedSession] = OrderedDict()
+        self._last_used: dict[str, datetime] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "flushes": 0,
+            "flushed_rows": 0,
+            "flush_failures": 0,
+        }
+
+    def get(self, session_token: str) -> AuthUserResponse | None:
+        cached = self._sessions.get(session_token)
+        if cached is not None and self._is_fresh(cached):
+            self._sessions.move_to_end(session_token)
+            self._counters["hits"] += 1
+            return cached.user
+        if cached is not None:
+            del self._sessions[session_token]
+        self._counters["misses"] += 1
+        return None
+
+    def put(self, session_token: str, user: AuthUserResponse, session_expires_at: datetime) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._sessions[session_token] = CachedSession(user, session_expires_at, time.monotonic())
+        self._sessions.move_to_end(session_token)
+        while len(self._sessions) > self.max_entries:
+            self._sessions.popitem(last=False)
+
+    def invalidate(self, session_token: str) -> None:
+        if self._sessions.pop(session_token, None) is not None:
+            self._counters["invalidations"] += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached session of a user whose profile just changed."""
+        for session_token in [
+            token for token, cached in self._sessions.items() if cached.user.id == user_id
+        ]:
+            self.invalidate(session_token)
+
+    def touch(self, session_token: str) -> None:
+        """Record a use of the session; persisted on the next flush."""
+        self._last_used[session_token] = datetime.now(UTC)
+
+    async def flush(self) -> int:
+        """Write buffered `last_used_at` values in one transaction; re-queue them on failure."""
+        if not self._last_used:
+            return 0
+        pending, self._last_used = self._last_used, {}
+        try:
+            rows = list(pending.items())
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                for offset in range(0, len(rows), self.FLUSH_CHUNK_SIZE):
+                    touched = values(
+                        column("token_id", Text),
+                        column("last_used_at", DateTime(timezone=True)),
+                        name="touched",
+                    ).data(rows[offset : offset + self.FLUSH_CHUNK_SIZE])
+                    await session.execute(
+                        update(RefreshToken)
+                        .where(RefreshToken.token_id == touched.c.token_id)
+                        .values(last_used_at=touched.c.last_used_at)
+                    )
+                await session.commit()
+            self._counters["flushes"] += 1
+            self._counters["flushed_rows"] += len(rows)
+            return len(rows)
+        except Exception as exc:
+            self._counters["flush_failures"] += 1
+            print(f"Error in SessionCache.flush: {exc}")
+            # Keep newer touches that arrived while this flush was running.
+            self._last_used = {**pending, **self._last_used}
+            return 0
+
+    def start(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+
+    def get_stats(self) -> dict:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "entries": len(self._sessions),
+            "pendingTouches": len(self._last_used),
+            "hits": self._counters["hits"],
+            "misses": self._counters["misses"],
+            "hitRate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            "invalidations": self._counters["invalidations"],
+            "flushes": self._counters["flushes"],
+            "flushedRows": self._counters["flushed_rows"],
+            "flushFailures": self._counters["flush_failures"],
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await self.flush()
+
+    def _is_fresh(self, cached: CachedSession) -> bool:
+        if time.monotonic() - cached.cached_at > self.ttl_seconds:
+            return False
+        return cached.session_expires_at > datetime.now(UTC)
+
+
+session_cache = SessionCache()
+
+
+def start_session_flusher() -> None:
+    session_cache.start()
+
+
+async def stop_session_flusher() -> None:
+    await session_cache.stop()
@@ -1,16 +1,165 @@
 import os
+import time
+from collections import deque
 from collections.abc import AsyncGenerator
+from dataclasses import dataclass
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
+from sqlalchemy import event
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.utils.stats import percentile
 
 engine: AsyncEngine | None = None
 SessionLocal: async_sessionmaker[AsyncSession] | None = None
+_pool_settings: "DbPoolSettings | None" = None
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+@dataclass(frozen=True)
+class DbPoolSettings:
+    """Connection pool sizing and driver caching for the shared Postgres engine."""
+
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    pool_recycle: int
+    pre_ping: bool
+    statement_cache_size: int
+    prepared_statement_cache_size: int
+    command_timeout: float
+
+
+def load_db_pool_settings() -> DbPoolSettings:
+    """Load DB pool settings from environment variables with safe defaults.
+
+    Behind a transaction-mode pgbouncer, set both statement cache sizes to 0: prepared
+    statements do not survive being handed a different server connection.
+    """
+    return DbPoolSettings(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pre_ping=os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+        statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+        prepared_statement_cache_size=int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500")),
+        command_timeout=float(os.getenv("DB_COMMAND_TIMEOUT", "30")),
+    )
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts plus percentiles over a window of recent samples."""
+
+    def __init__(self, window: int = 1024):
+        self._bucket_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._recent: deque[float] = deque(maxlen=window)
+        self._count = 0
+        self._sum_ms = 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        self._count += 1
+        self._sum_ms += elapsed_ms
+        self._recent.append(elapsed_ms)
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self._bucket_counts[index] += 1
+                return
+        self._bucket_counts[-1] += 1
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self._recent)
+        buckets = {
+            f"le{bound}": count
+            for bound, count in zip(LATENCY_BUCKETS_MS, self._bucket_counts[:-1], strict=True)
+        }
+        buckets["inf"] = self._bucket_counts[-1]
+        return {
+            "count": self._count,
+            "sumMs": round(self._sum_ms, 2),
+            "buckets": buckets,
+            "p50": round(percentile(ordered, 0.50), 2) if ordered else None,
+            "p95": round(percentile(ordered, 0.95), 2) if ordered else None,
+            "p99": round(percentile(ordered, 0.99), 2) if ordered else None,
+            "max": round(ordered[-1], 2) if ordered else None,
+        }
+
+
+_checkout_wait = LatencyHistogram()
+_query_latency = LatencyHistogram()
+_pool_counters: dict[str, int] = {
+    "checkouts": 0,
+    "checkout_timeouts": 0,
+    "checkout_failures": 0,
+    "peak_checked_out": 0,
+    "stale_discarded": 0,
+    "query_errors": 0,
+}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            _pool_counters["checkout_timeouts"] += 1
+            raise
+        except Exception:
+            _pool_counters["checkout_failures"] += 1
+            raise
+        _checkout_wait.record((time.perf_counter() - started_at) * 1000)
+        _pool_counters["checkouts"] += 1
+        _pool_counters["peak_checked_out"] = max(
+            _pool_counters["peak_checked_out"], self.checkedout()
+        )
+        return connection
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    # Local liveness check instead of pre-ping: asyncpg knows when the server closed the socket
+    # without a round-trip. Raising DisconnectionError makes the pool retry with a new one.
+    driver_connection = connection_record.driver_connection
+    if driver_connection is not None and driver_connection.is_closed():
+        _pool_counters["stale_discarded"] += 1
+        raise DisconnectionError("Pooled connection was closed by the server")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("query_started_at")
+    if started:
+        _query_latency.record((time.perf_counter() - started.pop()) * 1000)
+
+
+def _on_handle_error(exception_context) -> None:
+    _pool_counters["query_errors"] += 1
+    connection = exception_context.connection
+    started = connection.info.get("query_started_at") if connection is not None else None
+    if started:
+        started.pop()
+
+
+def _instrument_engine(async_engine: AsyncEngine) -> None:
+    sync_engine = async_engine.sync_engine
+    event.listen(sync_engine.pool, "checkout", _on_checkout)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _on_handle_error)
 
 
 def _normalize_database_url(database_url: str) -> str:
@@ -39,8 +188,8 @@ def _extract_connect_args(database_url: str) -> tuple[str, dict]:
     return sanitized_url, connect_args
 
 
-async def init_db(database_url: str | None = None) -> None:
-    global engine, SessionLocal
+async def init_db(database_url: str | None = None, settings: DbPoolSettings | None = None) -> None:
+    global engine, SessionLocal, _pool_settings
 
     if engine is not None and SessionLocal is not None:
         return
@@ -51,18 +200,40 @@ async def init_db(database_url: str | None = None) -> None:
 
     db_url = _normalize_database_url(raw_url)
     sanitized_url, connect_args = _extract_connect_args(db_url)
-    engine = create_async_engine(sanitized_url, pool_pre_ping=True, connect_args=connect_args)
+    resolved_settings = settings or load_db_pool_settings()
+    connect_args.update(
+        {
+            # asyncpg's own cache, used for executemany and driver-level queries.
+            "statement_cache_size": resolved_settings.statement_cache_size,
+            # SQLAlchemy's per-connection cache of prepared statements for regular queries.
+            "prepared_statement_cache_size": resolved_settings.prepared_statement_cache_size,
+            "command_timeout": resolved_settings.command_timeout,
+        }
+    )
+    engine = create_async_engine(
+        sanitized_url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=resolved_settings.pool_size,
+        max_overflow=resolved_settings.max_overflow,
+        pool_timeout=resolved_settings.pool_timeout,
+        pool_recycle=resolved_settings.pool_recycle,
+        pool_pre_ping=resolved_settings.pre_ping,
+        connect_args=connect_args,
+    )
+    _instrument_engine(engine)
     SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    _pool_settings = resolved_settings
 
 
 async def close_db() -> None:
-    global engine, SessionLocal
+    global engine, SessionLocal, _pool_settings
 
     if engine is not None:
         await engine.dispose()
 
     engine = None
     SessionLocal = None
+    _pool_settings = None
 
 
 def get_session_maker() -> async_sessionmaker[AsyncSession]:
@@ -75,3 +246,35 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     session_maker = get_session_maker()
     async with session_maker() as session:
         yield session
+
+
+def get_db_pool_stats() -> dict:
+    """Return pool occupancy, checkout waits and query latency to spot Postgres bottlenecks."""
+    if engine is None or _pool_settings is None:
+        return {"initialized": False}
+
+    pool = engine.sync_engine.pool
+    checked_out = pool.checkedout()
+    capacity = _pool_settings.pool_size + max(_pool_settings.max_overflow, 0)
+    return {
+        "initialized": True,
+        "poolSize": _pool_settings.pool_size,
+        "maxOverflow": _pool_settings.max_overflow,
+        "poolTimeout": _pool_settings.pool_timeout,
+        "poolRecycle": _pool_settings.pool_recycle,
+        "prePing": _pool_settings.pre_ping,
+        "statementCacheSize": _pool_settings.statement_cache_size,
+        "preparedStatementCacheSize": _pool_settings.prepared_statement_cache_size,
+        "checkedOut": checked_out,
+        "checkedIn": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 4) if capacity else 0.0,
+        "peakCheckedOut": _pool_counters["peak_checked_out"],
+        "checkouts": _pool_counters["checkouts"],
+        "checkoutTimeouts": _pool_counters["checkout_timeouts"],
+        "checkoutFailures": _pool_counters["checkout_failures"],
+        "staleDiscarded": _pool_counters["stale_discarded"],
+        "queryErrors": _pool_counters["query_errors"],
+        "checkoutWaitMs": _checkout_wait.snapshot(),
+        "queryLatencyMs": _query_latency.snapshot(),
+    }
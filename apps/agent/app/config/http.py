@@ -0,0 +1,157 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import aiohttp
+
+http_client: aiohttp.ClientSession | None = None
+_pool_settings: "HttpPoolSettings | None" = None
+_pool_counters: dict[str, int] = {
+    "requests_started": 0,
+    "requests_finished": 0,
+    "requests_failed": 0,
+    "connections_created": 0,
+    "connections_reused": 0,
+    "connections_queued": 0,
+}
+
+
+@dataclass(frozen=True)
+class HttpPoolSettings:
+    """Connection pool sizing for the shared Google API HTTP client."""
+
+    limit: int
+    limit_per_host: int
+    dns_cache_ttl: int
+    keepalive_timeout: float
+    total_timeout: float
+    connect_timeout: float
+
+
+def load_http_pool_settings() -> HttpPoolSettings:
+    """Load HTTP pool settings from environment variables with safe defaults."""
+    return HttpPoolSettings(
+        limit=int(os.getenv("GMAIL_HTTP_POOL_LIMIT", "100")),
+        limit_per_host=int(os.getenv("GMAIL_HTTP_POOL_LIMIT_PER_HOST", "50")),
+        dns_cache_ttl=int(os.getenv("GMAIL_HTTP_DNS_CACHE_TTL", "300")),
+        keepalive_timeout=float(os.getenv("GMAIL_HTTP_KEEPALIVE_TIMEOUT", "60")),
+        total_timeout=float(os.getenv("GMAIL_HTTP_TIMEOUT", "20")),
+        connect_timeout=float(os.getenv("GMAIL_HTTP_CONNECT_TIMEOUT", "5")),
+    )
+
+
+async def _on_request_start(session, context, params) -> None:
+    _pool_counters["requests_started"] += 1
+
+
+async def _on_request_end(session, context, params) -> None:
+    _pool_counters["requests_finished"] += 1
+
+
+async def _on_request_exception(session, context, params) -> None:
+    _pool_counters["requests_failed"] += 1
+
+
+async def _on_connection_create_end(session, context, params) -> None:
+    _pool_counters["connections_created"] += 1
+
+
+async def _on_connection_reuseconn(session, context, params) -> None:
+    _pool_counters["connections_reused"] += 1
+
+
+async def _on_connection_queued_start(session, context, params) -> None:
+    _pool_counters["connections_queued"] += 1
+
+
+def _build_trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=SimpleNamespace)
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_request_exception.append(_on_request_exception)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace_config.on_connection_queued_start.append(_on_connection_queued_start)
+    return trace_config
+
+
+async def init_http_client(settings: HttpPoolSettings | None = None) -> None:
+    global http_client, _pool_settings
+
+    if http_client is not None and not http_client.closed:
+        return
+
+    resolved_settings = settings or load_http_pool_settings()
+    connector = aiohttp.TCPConnector(
+        limit=resolved_settings.limit,
+        limit_per_host=resolved_settings.limit_per_host,
+        ttl_dns_cache=resolved_settings.dns_cache_ttl,
+        use_dns_cache=True,
+        keepalive_timeout=resolved_settings.keepalive_timeout,
+        enable_cleanup_closed=True,
+    )
+    http_client = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(
+            total=resolved_settings.total_timeout,
+            sock_connect=resolved_settings.connect_timeout,
+        ),
+        trace_configs=[_build_trace_config()],
+    )
+    _pool_settings = resolved_settings
+
+
+async def close_http_client() -> None:
+    global http_client, _pool_settings
+
+    if http_client is not None and not http_client.closed:
+        await http_client.close()
+        # Give TLS transports a moment to close cleanly before the loop shuts down.
+        await asyncio.sleep(0.25)
+
+    http_client = None
+    _pool_settings = None
+
+
+def get_http_client() -> aiohttp.ClientSession:
+    if http_client is None or http_client.closed:
+        raise RuntimeError("HTTP client is not initialized")
+    return http_client
+
+
+def _connector_occupancy(connector: aiohttp.BaseConnector | None) -> tuple[int | None, int | None]:
+    """Read live pool occupancy from aiohttp internals; None when their shape has changed."""
+    # aiohttp does not expose occupancy publicly, so an upgrade must degrade, not raise.
+    try:
+        acquired = len(getattr(connector, "_acquired", ()) or ())
+        idle = sum(len(conns) for conns in (getattr(connector, "_conns", {}) or {}).values())
+        return acquired, idle
+    except (AttributeError, TypeError):
+        return None, None
+
+
+def get_http_pool_stats() -> dict:
+    """Return pool configuration plus connection reuse counters for capacity sizing."""
+    if http_client is None or http_client.closed or _pool_settings is None:
+        return {"initialized": False}
+
+    acquired, idle = _connector_occupancy(http_client.connector)
+    created = _pool_counters["connections_created"]
+    reused = _pool_counters["connections_reused"]
+    return {
+        "initialized": True,
+        "limit": _pool_settings.limit,
+        "limitPerHost": _pool_settings.limit_per_host,
+        "dnsCacheTtl": _pool_settings.dns_cache_ttl,
+        "keepaliveTimeout": _pool_settings.keepalive_timeout,
+        "acquiredConnections": acquired,
+        "idleConnections": idle,
+        "requestsStarted": _pool_counters["requests_started"],
+        "requestsFinished": _pool_counters["requests_finished"],
+        "requestsFailed": _pool_counters["requests_failed"],
+        "connectionsCreated": created,
+        "connectionsReused": reused,
+        "connectionsQueued": _pool_counters["connections_queued"],
+        "reuseRatio": round(reused / (created + reused), 4) if created + reused else 0.0,
+    }
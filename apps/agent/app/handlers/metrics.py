@@ -0,0 +1,57 @@
+import hmac
+import os
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+
+from app.auth.revocations import revoked_sessions
+from app.auth.session_cache import session_cache
+from app.config.db import get_db_pool_stats
+from app.config.http import get_http_pool_stats
+from app.mail.coalesce import mail_request_coalescer
+from app.mail.detail_cache import mail_detail_cache
+from app.mail.offload import mail_offloader
+from app.mail.prefetch import mail_page_prefetcher
+from app.mail.scheduler import gmail_scheduler
+from app.mail.token_cache import access_token_cache
+from app.mail.token_refresher import token_refresher
+
+
+def get_metrics_payload() -> dict:
+    return {
+        "httpPool": get_http_pool_stats(),
+        "dbPool": get_db_pool_stats(),
+        "mailDetailCache": mail_detail_cache.get_stats(),
+        "accessTokenCache": access_token_cache.get_stats(),
+        "tokenRefresher": token_refresher.get_stats(),
+        "gmailScheduler": gmail_scheduler.get_stats(),
+        "mailPrefetch": mail_page_prefetcher.get_stats(),
+        "mailOffload": mail_offloader.get_stats(),
+        "mailCoalescing": mail_request_coalescer.get_stats(),
+        "sessionCache": session_cache.get_stats(),
+        "wsRevocations": revoked_sessions.get_stats(),
+    }
+
+
+async def handle_metrics(request: Request) -> JSONResponse:
+    """Serve process metrics to scrapers holding `METRICS_TOKEN`; hidden when it is unset."""
+    try:
+        metrics_token = os.getenv("METRICS_TOKEN", "")
+        if not metrics_token:
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": "Not found"},
+            )
+        authorization = request.headers.get("authorization", "")
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {metrics_token}".encode()):
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"error": "Unauthorized"},
+            )
+        return JSONResponse(status_code=status.HTTP_200_OK, content=get_metrics_payload())
+    except Exception as exc:
+        print(f"Error in handle_metrics: {exc}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"error": "Internal server error"},
+        )
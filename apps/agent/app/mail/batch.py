@@ -0,0 +1,76 @@
+import json
+import re
+import uuid
+from urllib.parse import urlencode
+
+_BOUNDARY_PATTERN = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+_STATUS_LINE_PATTERN = re.compile(r"^HTTP/\d(?:\.\d)?\s+(\d{3})")
+
+
+def build_batch_request(
+    path_prefix: str,
+    resource_ids: list[str],
+    params: dict[str, str | list[str]],
+    resource: str = "messages",
+) -> tuple[str, bytes]:
+    """Pack GET requests for each message (or thread) id into one multipart/mixed batch body."""
+    boundary = f"batch_{uuid.uuid4().hex}"
+    query = urlencode(params, doseq=True)
+    lines: list[str] = []
+    for index, resource_id in enumerate(resource_ids):
+        lines.extend(
+            [
+                f"--{boundary}",
+                "Content-Type: application/http",
+                f"Content-ID: <item-{index}>",
+                "",
+                f"GET {path_prefix}/users/me/{resource}/{resource_id}?{query}",
+                "",
+            ]
+        )
+    lines.append(f"--{boundary}--")
+    lines.append("")
+    return boundary, "\r\n".join(lines).encode("utf-8")
+
+
+def parse_batch_response(body: bytes, content_type: str) -> dict[int, tuple[int, dict]]:
+    """Split a multipart batch response into `{item index: (status, json payload)}`."""
+    boundary_match = _BOUNDARY_PATTERN.search(content_type or "")
+    if not boundary_match:
+        raise ValueError("Batch response is missing a multipart boundary")
+
+    delimiter = f"--{boundary_match.group(1)}"
+    normalized = body.decode("utf-8", errors="replace").replace("\r\n", "\n")
+    results: dict[int, tuple[int, dict]] = {}
+    for raw_part in normalized.split(delimiter):
+        part = raw_part.strip("\n")
+        if not part or part.startswith("--"):
+            continue
+
+        outer_headers, _, inner_response = part.partition("\n\n")
+        index = _parse_content_id(outer_headers)
+        if index is None:
+            continue
+
+        status_block, _, inner_body = inner_response.partition("\n\n")
+        status_match = _STATUS_LINE_PATTERN.match(status_block.strip())
+        if not status_match:
+            continue
+
+        try:
+            payload = json.loads(inner_body) if inner_body.strip() else {}
+        except json.JSONDecodeError:
+            payload = {}
+        results[index] = (int(status_match.group(1)), payload if isinstance(payload, dict) else {})
+    return results
+
+
+def _parse_content_id(header_block: str) -> int | None:
+    """Read the item index back out of `Content-ID: <response-item-N>`."""
+    for line in header_block.split("\n"):
+        name, _, value = line.partition(":")
+        if name.strip().lower() != "content-id":
+            continue
+        token = value.strip().strip("<>").rsplit("-", 1)[-1]
+        return int(token) if token.isdigit() else None
+    return None
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+ResultT = TypeVar("ResultT")
+
+
+class MailRequestCoalescer:
+    """Share one in-flight load between identical concurrent mail reads.
+
+    Keys are `(operation, normalized params)`; callers that arrive while a load for the
+    same key is running await that load instead of issuing their own Gmail calls. Results
+    are not kept once the load finishes, so this never serves stale data.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[tuple[str, Hashable], asyncio.Task] = {}
+        self._counters: dict[str, dict[str, int]] = {}
+
+    async def run(
+        self,
+        operation: str,
+        params: Hashable,
+        loader: Callable[[], Awaitable[ResultT]],
+    ) -> ResultT:
+        key = (operation, params)
+        counters = self._counters.setdefault(operation, {"calls": 0, "coalesced": 0})
+        counters["calls"] += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(loader())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            counters["coalesced"] += 1
+        # Shield so one cancelled caller does not cancel the load other callers share.
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> dict:
+        operations: dict[str, Any] = {}
+        for operation, counters in self._counters.items():
+            operations[operation] = {
+                "calls": counters["calls"],
+                "coalesced": counters["coalesced"],
+                "dedupeRate": (
+                    round(counters["coalesced"] / counters["calls"], 4)
+                    if counters["calls"]
+                    else 0.0
+                ),
+            }
+        return {
+            "inFlight": len(self._in_flight),
+            "coalesced": sum(counters["coalesced"] for counters in self._counters.values()),
+            "operations": operations,
+        }
+
+    def _finish(self, key: tuple[str, Hashable], task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception retrieved; every waiter may have been cancelled already.
+        if not task.cancelled():
+            task.exception()
+
+
+mail_request_coalescer = MailRequestCoalescer()
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config.db import get_session_maker
+from app.models import MailDetailCacheEntry
+
+
+@dataclass
+class CachedMailBody:
+    """Immutable body text shared by every cache entry whose body and HTML body match."""
+
+    body: str
+    html_body: str | None
+    size: int
+    ref_count: int = 0
+
+
+@dataclass
+class CachedMailDetail:
+    """Per-user cache entry: stable headers plus a pointer to content-addressed body data."""
+
+    message_id: str
+    sender: str
+    to: str | None
+    subject: str
+    snippet: str
+    internal_date: str | None
+    attachments: list[dict]
+    content_hash: str
+    unread: bool
+    labels_checked_at: float
+    size: int = 0
+
+
+class MailDetailCache:
+    """Size-bounded LRU for message detail, with an optional compressed Postgres tier.
+
+    Gmail message bodies never change, so bodies are keyed by a digest of the body and HTML
+    body alone and shared across messages and users; per-message headers stay on the entry.
+    Only label-derived state (``unread``) is refreshed on a short TTL. The byte budget counts
+    entries as well as shared bodies. Postgres rows expire after
+    ``MAIL_DETAIL_CACHE_DB_TTL_SECONDS`` and are pruned from the save path.
+    """
+
+    # Rough fixed cost of one entry (dataclass, key tuple, LRU slot) on top of its strings.
+    ENTRY_OVERHEAD_BYTES = 256
+    # Expired rows are deleted at most this often, and at most this many per pass.
+    DB_PRUNE_INTERVAL_SECONDS = 300
+    DB_PRUNE_BATCH_SIZE = 5000
+
+    def __init__(self):
+        self.max_bytes = int(os.getenv("MAIL_DETAIL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.label_ttl_seconds = float(os.getenv("MAIL_DETAIL_LABEL_TTL_SECONDS", "15"))
+        self.db_tier_enabled = os.getenv("MAIL_DETAIL_CACHE_DB_ENABLED", "false").lower() == "true"
+        self.db_ttl = timedelta(
+            seconds=int(os.getenv("MAIL_DETAIL_CACHE_DB_TTL_SECONDS", str(14 * 24 * 3600)))
+        )
+        self._db_pruned_at = 0.0
+        self._entries: OrderedDict[tuple[str, str], CachedMailDetail] = OrderedDict()
+        self._bodies: dict[str, CachedMailBody] = {}
+        self._total_bytes = 0
+        self._counters = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "db_pruned": 0,
+        }
+
+    async def get(
+        self, user_id: str, message_id: str
+    ) -> tuple[CachedMailDetail, CachedMailBody] | None:
+        """Return a cached entry from memory, then the Postgres tier, or None on a miss."""
+        try:
+            key = (user_id, message_id)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return entry, self._bodies[entry.content_hash]
+
+            if self.db_tier_enabled:
+                stored = await self._load_from_db(user_id, message_id)
+                if stored is not None:
+                    self._counters["db_hits"] += 1
+                    # Labels from the DB tier are unknown-age, so force a refresh on first use.
+                    stored_entry = self._store_in_memory(user_id, message_id, *stored)
+                    stored_entry.labels_checked_at = 0.0
+                    return stored_entry, self._bodies[stored_entry.content_hash]
+
+            self._counters["misses"] += 1
+            return None
+        except Exception as exc:
+            print(f"Error in MailDetailCache.get: {exc}")
+            return None
+
+    async def put(
+        self, user_id: str, message_id: str, content: dict, unread: bool
+    ) -> tuple[CachedMailDetail, CachedMailBody]:
+        """Cache freshly fetched detail in memory and, when enabled, in Postgres."""
+        entry = self._store_in_memory(user_id, message_id, content, unread)
+        if self.db_tier_enabled:
+            await self._save_to_db(user_id, message_id, entry.content_hash, content)
+        return entry, self._bodies[entry.content_hash]
+
+    def is_label_state_fresh(self, entry: CachedMailDetail) -> bool:
+        return time.monotonic() - entry.labels_checked_at < self.label_ttl_seconds
+
+    def set_unread(self, user_id: str, message_id: str, unread: bool) -> None:
+        """Record label-derived state after a refresh or a local write such as mark-as-read."""
+        entry = self._entries.get((user_id, message_id))
+        if entry is None:
+            return
+        entry.unread = unread
+        entry.labels_checked_at = time.monotonic()
+
+    def build_etag(self, entry: CachedMailDetail, date_label: str) -> str:
+        """Derive a strong ETag from the body digest plus the state rendered around it."""
+        digest = hashlib.sha256(
+            f"{entry.content_hash}|{int(entry.unread)}|{date_label}".encode()
+        ).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def get_stats(self) -> dict:
+        lookups = sum(self._counters[key] for key in ("memory_hits", "db_hits", "misses"))
+        hits = self._counters["memory_hits"] + self._counters["db_hits"]
+        return {
+            "entries": len(self._entries),
+            "uniqueBodies": len(self._bodies),
+            "bytes": self._total_bytes,
+            "maxBytes": self.max_bytes,
+            "memoryHits": self._counters["memory_hits"],
+            "dbHits": self._counters["db_hits"],
+            "misses": self._counters["misses"],
+            "evictions": self._counters["evictions"],
+            "dbPruned": self._counters["db_pruned"],
+            "hitRate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _store_in_memory(
+        self, user_id: str, message_id: str, content: dict, unread: bool
+    ) -> CachedMailDetail:
+        body = content.get("body") or ""
+        html_body = content.get("htmlBody")
+        content_hash = self._content_hash(body, html_body)
+
+        key = (user_id, message_id)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._release_entry(previous)
+
+        cached_body = self._bodies.get(content_hash)
+        if cached_body is None:
+            size = len(body.encode("utf-8")) + len((html_body or "").encode("utf-8"))
+            cached_body = CachedMailBody(body=body, html_body=html_body, size=size)
+            self._bodies[content_hash] = cached_body
+            self._total_bytes += size
+        cached_body.ref_count += 1
+
+        entry = CachedMailDetail(
+            message_id=message_id,
+            sender=content.get("sender") or "Unknown sender",
+            to=content.get("to"),
+            subject=content.get("subject") or "(no subject)",
+            snippet=content.get("snippet") or "",
+            internal_date=content.get("internalDate"),
+            attachments=content.get("attachments") or [],
+            content_hash=content_hash,
+            unread=unread,
+            labels_checked_at=time.monotonic(),
+        )
+        entry.size = self._entry_size(user_id, entry)
+        self._total_bytes += entry.size
+        self._entries[key] = entry
+        self._evict_to_budget()
+        return entry
+
+    def _evict_to_budget(self) -> None:
+        # Always keep the most recent entry, even if it alone exceeds the budget.
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._release_entry(evicted)
+            self._counters["evictions"] += 1
+
+    def _release_entry(self, entry: CachedMailDetail) -> None:
+        self._total_bytes -= entry.size
+        cached_body = self._bodies.get(entry.content_hash)
+        if cached_body is None:
+            return
+        cached_body.ref_count -= 1
+        if cached_body.ref_count <= 0:
+            self._total_bytes -= cached_body.size
+            del self._bodies[entry.content_hash]
+
+    def _entry_size(self, user_id: str, entry: CachedMailDetail) -> int:
+        strings = (
+            user_id,
+            entry.message_id,
+            entry.sender,
+            entry.to or "",
+            entry.subject,
+            entry.snippet,
+            entry.internal_date or "",
+            entry.content_hash,
+        )
+        attachments_size = (
+            len(json.dumps(entry.attachments, separators=(",", ":"))) if entry.attachments else 0
+        )
+        return (
+            self.ENTRY_OVERHEAD_BYTES
+            + sum(len(value.encode("utf-8")) for value in strings)
+            + attachments_size
+        )
+
+    def _content_hash(self, body: str, html_body: str | None) -> str:
+        digest = hashlib.sha256(body.encode("utf-8"))
+        # Separate the parts so a missing HTML body never collides with an empty one.
+        digest.update(b"\x00" if html_body is None else b"\x01" + html_body.encode("utf-8"))
+        return digest.hexdigest()
+
+    async def _load_from_db(self, user_id: str, message_id: str) -> tuple[dict, bool] | None:
+        """Read and inflate a stored entry; unread state is unknown so it defaults to False.
+
+        Rows older than the TTL count as a miss and are left for the next prune.
+        """
+        try:
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                stored = await session.scalar(
+                    select(MailDetailCacheEntry).where(
+                        MailDetailCacheEntry.user_id == UUID(user_id),
+                        MailDetailCacheEntry.gmail_message_id == message_id,
+                        MailDetailCacheEntry.updated_at >= datetime.now(UTC) - self.db_ttl,
+                    )
+                )
+            if stored is None:
+                return None
+            content = json.loads(zlib.decompress(stored.payload).decode("utf-8"))
+            return content, False
+        except Exception as exc:
+            print(f"Error in MailDetailCache._load_from_db: {exc}")
+            return None
+
+    async def _save_to_db(
+        self, user_id: str, message_id: str, content_hash: str, content: dict
+    ) -> None:
+        try:
+            payload = zlib.compress(
+                json.dumps(content, separators=(",", ":")).encode("utf-8"), level=6
+            )
+            statement = insert(MailDetailCacheEntry).values(
+                user_id=UUID(user_id),
+                gmail_message_id=message_id,
+                content_hash=content_hash,
+                payload=payload,
+            )
+            # ON CONFLICT skips the model's onupdate, so refresh the row's age explicitly.
+            statement = statement.on_conflict_do_update(
+                constraint="uq_mail_detail_cache_user_gmail_id",
+                set_={"content_hash": content_hash, "payload": payload, "updated_at": func.now()},
+            )
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                await session.execute(statement)
+                await session.commit()
+            if time.monotonic() - self._db_pruned_at >= self.DB_PRUNE_INTERVAL_SECONDS:
+                self._db_pruned_at = time.monotonic()
+                await self._prune_db()
+        except Exception as exc:
+            print(f"Error in MailDetailCache._save_to_db: {exc}")
+
+    async def _prune_db(self) -> None:
+        """Delete one batch of rows older than the TTL, oldest first."""
+        try:
+            expired_ids = (
+                select(MailDetailCacheEntry.id)
+                .where(MailDetailCacheEntry.updated_at < datetime.now(UTC) - self.db_ttl)
+                .order_by(MailDetailCacheEntry.updated_at)
+                .limit(self.DB_PRUNE_BATCH_SIZE)
+            )
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                result = await session.execute(
+                    delete(MailDetailCacheEntry).where(MailDetailCacheEntry.id.in_(expired_ids))
+                )
+                await session.commit()
+            self._counters["db_pruned"] += result.rowcount or 0
+        except Exception as exc:
+            print(f"Error in MailDetailCache._prune_db: {exc}")
+
+
+mail_detail_cache = MailDetailCache()
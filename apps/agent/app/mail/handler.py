@@ -1,7 +1,26 @@
+from collections.abc import AsyncIterator
+from urllib.parse import quote
+
 from fastapi import HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import TypeAdapter
 
+from app.mail.schemas import (
+    BulkMailSelection,
+    BulkModifyFrame,
+    MailDetailResponse,
+    MailListResponse,
+    MailListStreamFrame,
+    MailThreadDetailResponse,
+    MailThreadListResponse,
+)
 from app.mail.service import GmailMailService
+from app.utils.serialization import model_json_response
+
+MAIL_LIST_RESPONSE_ADAPTER = TypeAdapter(MailListResponse)
+MAIL_DETAIL_RESPONSE_ADAPTER = TypeAdapter(MailDetailResponse)
+MAIL_THREAD_LIST_RESPONSE_ADAPTER = TypeAdapter(MailThreadListResponse)
+MAIL_THREAD_DETAIL_RESPONSE_ADAPTER = TypeAdapter(MailThreadDetailResponse)
 
 
 class MailHandler:
@@ -16,35 +35,169 @@ class MailHandler:
         mailbox: str,
         page_token: str | None,
         page_size: int,
-    ) -> JSONResponse:
+    ) -> Response:
         """List mailbox messages and return paginated response payload."""
         try:
             result = await self.mail_service.list_messages(user_id, mailbox, page_token, page_size)
+            return model_json_response(MAIL_LIST_RESPONSE_ADAPTER, result)
+        except HTTPException as exc:
+            print(f"Error in MailHandler.handle_list_messages: {exc}")
+            return JSONResponse(
+                status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers
+            )
+        except Exception as exc:
+            print(f"Error in MailHandler.handle_list_messages: {exc}")
             return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"error": "Internal server error"},
+            )
+
+    async def handle_stream_list_messages(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> StreamingResponse | JSONResponse:
+        """Stream mailbox list items as NDJSON frames in hydration completion order."""
+        try:
+            frames = self.mail_service.stream_list_messages(user_id, mailbox, page_token, page_size)
+            # Pull the first frame eagerly so auth and Gmail list errors keep their status code.
+            first_frame = await anext(frames)
+            return StreamingResponse(
+                self._encode_ndjson(first_frame, frames, MailListStreamFrame),
                 status_code=status.HTTP_200_OK,
-                content=result.model_dump(by_alias=True),
+                media_type="application/x-ndjson",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
             )
         except HTTPException as exc:
-            print(f"Error in MailHandler.handle_list_messages: {exc}")
-            return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+            print(f"Error in MailHandler.handle_stream_list_messages: {exc}")
+            return JSONResponse(
+                status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers
+            )
         except Exception as exc:
-            print(f"Error in MailHandler.handle_list_messages: {exc}")
+            print(f"Error in MailHandler.handle_stream_list_messages: {exc}")
             return JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"error": "Internal server error"},
             )
 
-    async def handle_get_message_detail(self, user_id: str, message_id: str) -> JSONResponse:
-        """Get full content for one message id in the currently selected mailbox."""
+    async def handle_list_threads(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> Response:
+        """List mailbox conversations and return paginated thread summaries."""
+        try:
+            result = await self.mail_service.list_threads(user_id, mailbox, page_token, page_size)
+            return model_json_response(MAIL_THREAD_LIST_RESPONSE_ADAPTER, result)
+        except HTTPException as exc:
+            print(f"Error in MailHandler.handle_list_threads: {exc}")
+            return JSONResponse(
+                status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers
+            )
+        except Exception as exc:
+            print(f"Error in MailHandler.handle_list_threads: {exc}")
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"error": "Internal server error"},
+            )
+
+    async def handle_get_thread_detail(self, user_id: str, thread_id: str) -> Response:
+        """Get every message of one conversation with full content."""
         try:
-            result = await self.mail_service.get_message_detail(user_id, message_id)
+            result = await self.mail_service.get_thread_detail(user_id, thread_id)
+            return model_json_response(
+                MAIL_THREAD_DETAIL_RESPONSE_ADAPTER,
+                result,
+                headers={"Cache-Control": "private, no-cache"},
+            )
+        except HTTPException as exc:
+            print(f"Error in MailHandler.handle_get_thread_detail: {exc}")
             return JSONResponse(
+                status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers
+            )
+        except Exception as exc:
+            print(f"Error in MailHandler.handle_get_thread_detail: {exc}")
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"error": "Internal server error"},
+            )
+
+    async def handle_bulk_modify(
+        self,
+        user_id: str,
+        selection: BulkMailSelection,
+        add_label_ids: list[str],
+        remove_label_ids: list[str],
+    ) -> StreamingResponse | JSONResponse:
+        """Stream bulk label change progress as NDJSON frames, one per batchModify chunk."""
+        try:
+            frames = self.mail_service.bulk_modify_messages(
+                user_id, selection, add_label_ids, remove_label_ids
+            )
+            # Pull the first frame eagerly so validation and auth errors keep their status code.
+            first_frame = await anext(frames)
+            return StreamingResponse(
+                self._encode_ndjson(first_frame, frames, BulkModifyFrame),
                 status_code=status.HTTP_200_OK,
-                content=result.model_dump(by_alias=True),
+                media_type="application/x-ndjson",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
             )
+        except HTTPException as exc:
+            print(f"Error in MailHandler.handle_bulk_modify: {exc}")
+            return JSONResponse(
+                status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers
+            )
+        except Exception as exc:
+            print(f"Error in MailHandler.handle_bulk_modify: {exc}")
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"error": "Internal server error"},
+            )
+
+    async def _encode_ndjson(
+        self,
+        first_frame: MailListStreamFrame | BulkModifyFrame,
+        frames: AsyncIterator[MailListStreamFrame | BulkModifyFrame],
+        frame_type: type[MailListStreamFrame] | type[BulkModifyFrame],
+    ) -> AsyncIterator[bytes]:
+        """Serialize frames as NDJSON lines, ending with an error frame on failure."""
+        try:
+            yield self._encode_frame(first_frame)
+            async for frame in frames:
+                yield self._encode_frame(frame)
+        except HTTPException as exc:
+            print(f"Error in MailHandler._encode_ndjson: {exc}")
+            yield self._encode_frame(frame_type(type="error", error=str(exc.detail)))
+        except Exception as exc:
+            print(f"Error in MailHandler._encode_ndjson: {exc}")
+            yield self._encode_frame(frame_type(type="error", error="Internal server error"))
+
+    def _encode_frame(self, frame: MailListStreamFrame | BulkModifyFrame) -> bytes:
+        """Encode one stream frame as a newline-terminated JSON line."""
+        return frame.model_dump_json(by_alias=True, exclude_none=True).encode("utf-8") + b"\n"
+
+    async def handle_get_message_detail(
+        self,
+        user_id: str,
+        message_id: str,
+        if_none_match: str | None = None,
+    ) -> Response:
+        """Get full content for one message id, answering 304 when the client copy is current."""
+        try:
+            result, etag = await self.mail_service.get_message_detail_with_etag(user_id, message_id)
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+            if self._etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            return model_json_response(MAIL_DETAIL_RESPONSE_ADAPTER, result, headers=headers)
         except HTTPException as exc:
             print(f"Error in MailHandler.handle_get_message_detail: {exc}")
-            return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+            return JSONResponse(
+                status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers
+            )
         except Exception as exc:
             print(f"Error in MailHandler.handle_get_message_detail: {exc}")
             return JSONResponse(
@@ -52,6 +205,53 @@ class MailHandler:
                 content={"error": "Internal server error"},
             )
 
+    def _etag_matches(self, if_none_match: str | None, etag: str) -> bool:
+        """Apply the weak If-None-Match comparison from RFC 9110."""
+        if not if_none_match:
+            return False
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        return "*" in candidates or etag in (
+            candidate.removeprefix("W/") for candidate in candidates
+        )
+
+    async def handle_get_attachment(
+        self,
+        user_id: str,
+        message_id: str,
+        attachment_id: str,
+        filename: str | None = None,
+        mime_type: str | None = None,
+    ) -> Response:
+        """Stream one attachment body fetched from Gmail only when the user asks for it."""
+        try:
+            content = await self.mail_service.get_attachment(user_id, message_id, attachment_id)
+            # Always download, never render inline: the mime type comes from the client.
+            disposition = "attachment"
+            if filename:
+                disposition += f"; filename*=UTF-8''{quote(filename, safe='')}"
+            headers = {
+                "Cache-Control": "private, max-age=3600",
+                "Content-Disposition": disposition,
+                "X-Content-Type-Options": "nosniff",
+            }
+            return Response(
+                status_code=status.HTTP_200_OK,
+                content=content,
+                media_type=mime_type or "application/octet-stream",
+                headers=headers,
+            )
+        except HTTPException as exc:
+            print(f"Error in MailHandler.handle_get_attachment: {exc}")
+            return JSONResponse(
+                status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers
+            )
+        except Exception as exc:
+            print(f"Error in MailHandler.handle_get_attachment: {exc}")
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"error": "Internal server error"},
+            )
+
     async def handle_mark_message_read(self, user_id: str, message_id: str) -> JSONResponse:
         """Set a message as read and return updated unread status."""
         try:
@@ -59,7 +259,9 @@ class MailHandler:
             return JSONResponse(status_code=status.HTTP_200_OK, content=result.model_dump())
         except HTTPException as exc:
             print(f"Error in MailHandler.handle_mark_message_read: {exc}")
-            return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+            return JSONResponse(
+                status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers
+            )
         except Exception as exc:
             print(f"Error in MailHandler.handle_mark_message_read: {exc}")
             return JSONResponse(
@@ -81,7 +283,9 @@ class MailHandler:
             return JSONResponse(status_code=status.HTTP_200_OK, content=result.model_dump())
         except HTTPException as exc:
             print(f"Error in MailHandler.handle_send_message: {exc}")
-            return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+            return JSONResponse(
+                status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers
+            )
         except Exception as exc:
             print(f"Error in MailHandler.handle_send_message: {exc}")
             return JSONResponse(
@@ -0,0 +1,259 @@
+import html
+import os
+import re
+
+DEFAULT_MAX_CHARS = int(os.getenv("MAIL_HTML_TEXT_MAX_CHARS", "100000"))
+
+# Elements whose content is never visible; skipped wholesale by searching for the end tag.
+RAW_TEXT_TAGS = {"script", "style", "title", "noscript", "template", "textarea", "xmp"}
+# Elements skipped with nesting tracked, because they contain ordinary markup.
+SKIPPED_CONTAINER_TAGS = {"head", "svg", "object"}
+BLOCK_TAGS = {
+    "address",
+    "article",
+    "aside",
+    "blockquote",
+    "br",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "fieldset",
+    "figcaption",
+    "figure",
+    "footer",
+    "form",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "hr",
+    "li",
+    "main",
+    "nav",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "tr",
+    "ul",
+}
+CELL_TAGS = {"td", "th"}
+_P_CLOSERS = {
+    "address",
+    "article",
+    "aside",
+    "blockquote",
+    "dd",
+    "details",
+    "div",
+    "dl",
+    "dt",
+    "fieldset",
+    "figcaption",
+    "figure",
+    "footer",
+    "form",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "hr",
+    "li",
+    "main",
+    "menu",
+    "nav",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "ul",
+}
+_TABLE_SECTION_TAGS = {"thead", "tbody", "tfoot"}
+# Elements whose end tag may be omitted, mapped to the start tags that implicitly close them.
+IMPLIED_END_TAGS = {
+    "p": _P_CLOSERS,
+    "li": {"li"},
+    "dt": {"dt", "dd"},
+    "dd": {"dt", "dd"},
+    "option": {"option", "optgroup"},
+    "optgroup": {"optgroup"},
+    "tr": {"tr"} | _TABLE_SECTION_TAGS,
+    "td": {"td", "th", "tr"} | _TABLE_SECTION_TAGS,
+    "th": {"td", "th", "tr"} | _TABLE_SECTION_TAGS,
+    "thead": _TABLE_SECTION_TAGS,
+    "tbody": _TABLE_SECTION_TAGS,
+}
+VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+
+# Attribute alternatives start with disjoint characters and none repeats inside the outer
+# `*`, so a tag with no closing `>` fails in one linear scan instead of backtracking.
+_TOKEN_PATTERN = re.compile(
+    r"""
+    ([^<]+)
+    | <(/?)([a-zA-Z][a-zA-Z0-9:-]*)((?:[^'">]|"[^"]*"|'[^']*')*)>
+    | <!--.*?(?:-->|\Z)
+    | <[!?][^>]*>
+    | <
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+_ATTRIBUTE_PATTERN = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+_HIDDEN_STYLE_PATTERN = re.compile(
+    r"display\s*:\s*none|visibility\s*:\s*hidden|mso-hide\s*:\s*all", re.IGNORECASE
+)
+# Open elements an implied end tag does not reach past, as in the HTML parser's scopes.
+_IMPLIED_END_SCOPE_TAGS = (BLOCK_TAGS | CELL_TAGS | {"select"}) - {"address", "div", "p"}
+_RAW_TEXT_CLOSERS = {tag: re.compile(rf"</{tag}\s*>", re.IGNORECASE) for tag in RAW_TEXT_TAGS}
+_SPACE_RUN_PATTERN = re.compile(r"[ \t\r\f\v]+")
+_LINE_EDGE_PATTERN = re.compile(r" *\n *")
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+
+def html_to_text(html_content: str, max_chars: int | None = None) -> str:
+    """Convert an HTML mail body to readable text in one left-to-right scan.
+
+    Drops script/style/head and hidden elements, keeps block-level line breaks, and
+    stops scanning once `max_chars` of text has been collected. Whitespace and entities
+    are normalized once over the collected text rather than per token.
+    """
+    if not html_content:
+        return ""
+
+    budget = max_chars or DEFAULT_MAX_CHARS
+    parts: list[str] = []
+    append = parts.append
+    collected = 0
+    # Open elements of the skipped (head, svg or hidden) subtree; empty when not skipping.
+    skip_stack: list[str] = []
+    resume_at = 0
+
+    for match in _TOKEN_PATTERN.finditer(html_content):
+        if match.start() < resume_at:
+            # Still inside a script/style body that was skipped by searching ahead.
+            continue
+        text, end_slash, tag, attrs = match.group(1, 2, 3, 4)
+
+        if text is not None:
+            if not skip_stack:
+                append(text)
+                collected += len(text)
+                if collected >= budget:
+                    break
+            continue
+        if tag is None:
+            if match.group(0) == "<" and _opens_unclosed_tag(html_content, match.end()):
+                # A tag left open until the end of the document swallows the rest, as in a
+                # browser; stopping here also keeps each later `<` from rescanning to the end.
+                break
+            continue
+        tag = tag.lower()
+
+        if end_slash:
+            if skip_stack:
+                if tag in skip_stack:
+                    del skip_stack[len(skip_stack) - 1 - skip_stack[::-1].index(tag) :]
+                    continue
+                if not all(open_tag in IMPLIED_END_TAGS for open_tag in skip_stack):
+                    continue
+                # An enclosing element's end tag also closes a hidden <p>, <li>, <td>...
+                skip_stack.clear()
+            if tag in BLOCK_TAGS:
+                append("\n")
+            continue
+
+        if tag in RAW_TEXT_TAGS:
+            closing_match = _RAW_TEXT_CLOSERS[tag].search(html_content, match.end())
+            if closing_match is None:
+                break
+            resume_at = closing_match.end()
+            continue
+
+        self_closing = tag in VOID_TAGS or attrs.endswith("/")
+        if skip_stack:
+            if skip_stack[0] == "head" and tag == "body":
+                # Tolerate mail that never closes <head>.
+                skip_stack.clear()
+            else:
+                _close_implied_elements(skip_stack, tag)
+                if skip_stack:
+                    if not self_closing:
+                        skip_stack.append(tag)
+                    continue
+                # The start tag closed the skipped element; it is a visible sibling.
+
+        if tag in BLOCK_TAGS:
+            append("\n")
+        elif tag in CELL_TAGS:
+            append(" ")
+        elif tag in SKIPPED_CONTAINER_TAGS:
+            skip_stack.append(tag)
+            continue
+
+        if attrs and not self_closing and _has_hidden_attribute(attrs):
+            skip_stack.append(tag)
+
+    text = html.unescape("".join(parts)).replace("\xa0", " ")
+    text = _SPACE_RUN_PATTERN.sub(" ", text)
+    text = _LINE_EDGE_PATTERN.sub("\n", text)
+    text = _BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+    return text[:budget]
+
+
+def _opens_unclosed_tag(html_content: str, position: int) -> bool:
+    """Check whether the `<` just before `position` starts a tag with no `>` after it."""
+    next_char = html_content[position : position + 1]
+    if not next_char or not (next_char.isalpha() or next_char in "/!?"):
+        return False
+    return html_content.find(">", position) == -1
+
+
+def _close_implied_elements(open_tags: list[str], tag: str) -> None:
+    """Pop the open elements a start tag implicitly ends, e.g. `<p>` ending an open `<p>`."""
+    index = len(open_tags) - 1
+    while index >= 0:
+        open_tag = open_tags[index]
+        if tag in IMPLIED_END_TAGS.get(open_tag, ()):
+            del open_tags[index:]
+        elif open_tag in _IMPLIED_END_SCOPE_TAGS:
+            return
+        index -= 1
+
+
+def _has_hidden_attribute(attrs: str) -> bool:
+    """Check for `hidden`, `aria-hidden="true"` or a hiding inline style on a start tag."""
+    lowered = attrs.lower()
+    if "hidden" not in lowered and "none" not in lowered and "mso-hide" not in lowered:
+        return False
+    for attribute in _ATTRIBUTE_PATTERN.finditer(lowered):
+        name = attribute.group(1)
+        value = attribute.group(2) or attribute.group(3) or attribute.group(4) or ""
+        if name == "hidden":
+            return True
+        if name == "aria-hidden" and value.strip() == "true":
+            return True
+        if name == "style" and _HIDDEN_STYLE_PATTERN.search(value):
+            return True
+    return False
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import base64
+import codecs
+import json
+import re
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+
+DEFAULT_CHARSET = "utf-8"
+
+_CHARSET_PATTERN = re.compile(r"""charset\s*=\s*["']?([^"';\s]+)""", re.IGNORECASE)
+# Charsets mail clients commonly mislabel; decode with the superset instead.
+_CHARSET_ALIASES = {
+    "iso-8859-1": "cp1252",
+    "latin1": "cp1252",
+    "us-ascii": "cp1252",
+    "ascii": "cp1252",
+    "gb2312": "gb18030",
+    "gbk": "gb18030",
+}
+
+
+@dataclass
+class MimePart:
+    """One node of a Gmail payload tree with its body either inline or behind an attachment id."""
+
+    part_id: str
+    mime_type: str
+    charset: str | None
+    filename: str
+    size: int
+    data: str | None
+    attachment_id: str | None
+    is_attachment: bool
+
+
+@dataclass
+class MimePartIndex:
+    """Parts of a message grouped by mime type, built by a single walk of the payload."""
+
+    parts: list[MimePart] = field(default_factory=list)
+    by_mime_type: dict[str, list[MimePart]] = field(default_factory=dict)
+    attachments: list[MimePart] = field(default_factory=list)
+
+    def first_body(self, mime_type: str) -> MimePart | None:
+        """Return the first inline (non-attachment) part of `mime_type` that carries a body."""
+        for part in self.by_mime_type.get(mime_type, []):
+            if not part.is_attachment and (part.data or part.attachment_id):
+                return part
+        return None
+
+
+def build_mime_index(payload: dict) -> MimePartIndex:
+    """Walk a Gmail payload tree once, in document order, and index every part."""
+    index = MimePartIndex()
+    stack = [payload] if payload else []
+    while stack:
+        node = stack.pop()
+        child_parts = node.get("parts") or []
+        # Push children in reverse so they are visited in document order.
+        stack.extend(reversed(child_parts))
+        if child_parts and not (node.get("body") or {}).get("size"):
+            continue
+
+        body = node.get("body") or {}
+        headers = {
+            str(header.get("name", "")).lower(): str(header.get("value", ""))
+            for header in node.get("headers") or []
+        }
+        filename = node.get("filename") or ""
+        disposition = headers.get("content-disposition", "").lower()
+        part = MimePart(
+            part_id=str(node.get("partId", "")),
+            mime_type=str(node.get("mimeType", "")).lower(),
+            charset=parse_charset(headers.get("content-type", "")),
+            filename=filename,
+            size=int(body.get("size") or 0),
+            data=body.get("data"),
+            attachment_id=body.get("attachmentId"),
+            is_attachment=bool(filename) or disposition.startswith("attachment"),
+        )
+        index.parts.append(part)
+        index.by_mime_type.setdefault(part.mime_type, []).append(part)
+        if part.is_attachment:
+            index.attachments.append(part)
+    return index
+
+
+def parse_charset(content_type: str) -> str | None:
+    match = _CHARSET_PATTERN.search(content_type)
+    return match.group(1).lower() if match else None
+
+
+def decode_part_bytes(data: str) -> bytes:
+    """Decode Gmail's unpadded urlsafe base64 body data."""
+    padding = "=" * (-len(data) % 4)
+    return base64.urlsafe_b64decode(data + padding)
+
+
+def decode_part_text(raw: bytes, charset: str | None) -> str:
+    """Decode body bytes with the part's declared charset, falling back to utf-8."""
+    encoding = _CHARSET_ALIASES.get(charset or "", charset) or DEFAULT_CHARSET
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = DEFAULT_CHARSET
+    return raw.decode(encoding, errors="replace")
+
+
+def decode_part_data(data: str, charset: str | None) -> str:
+    """Decode inline body data straight to text."""
+    return decode_part_text(decode_part_bytes(data), charset)
+
+
+def decode_attachment_response(body: bytes) -> bytes:
+    """Parse a messages.attachments.get response and decode its body data."""
+    payload = json.loads(body)
+    return decode_part_bytes(payload.get("data") or "")
+
+
+def encode_raw_message(to: str, cc: str | None, subject: str, body: str) -> str:
+    """Build an RFC 822 message and encode it as the unpadded urlsafe base64 Gmail expects."""
+    mime_message = EmailMessage()
+    mime_message["To"] = to
+    if cc:
+        mime_message["Cc"] = cc
+    mime_message["Subject"] = subject
+    mime_message.set_content(body)
+    return base64.urlsafe_b64encode(mime_message.as_bytes()).decode().rstrip("=")
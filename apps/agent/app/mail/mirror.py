@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config.db import get_session_maker
+from app.models import MailboxSyncState, MailMessage
+
+MIRROR_PAGE_TOKEN_PREFIX = "mirror:"
+MAILBOX_LABELS = {"inbox": "INBOX", "sent": "SENT"}
+
+
+class MailMirrorService:
+    """Read and write the local Postgres mirror of Gmail message metadata."""
+
+    async def get_sync_state(self, user_id: str) -> MailboxSyncState | None:
+        """Load the mirror sync cursor for a user, if a backfill has ever started."""
+        try:
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                return await session.scalar(
+                    select(MailboxSyncState).where(MailboxSyncState.user_id == UUID(user_id))
+                )
+        except Exception as exc:
+            print(f"Error in MailMirrorService.get_sync_state: {exc}")
+            return None
+
+    async def save_sync_state(
+        self,
+        user_id: str,
+        history_id: str | None,
+        backfill_page_tokens: dict | None = None,
+        backfilled: bool = False,
+    ) -> None:
+        """Upsert the sync cursor after a successful backfill or incremental sync."""
+        try:
+            now = datetime.now(UTC)
+            values: dict = {
+                "user_id": UUID(user_id),
+                "history_id": history_id,
+                "last_synced_at": now,
+                "updated_at": now,
+            }
+            if backfilled:
+                values["backfilled_at"] = now
+                values["backfill_page_tokens"] = backfill_page_tokens or {}
+
+            statement = insert(MailboxSyncState).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=[MailboxSyncState.user_id],
+                set_={key: value for key, value in values.items() if key != "user_id"},
+            )
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                await session.execute(statement)
+                await session.commit()
+        except Exception as exc:
+            print(f"Error in MailMirrorService.save_sync_state: {exc}")
+            raise
+
+    async def upsert_messages(self, user_id: str, payloads: list[dict]) -> int:
+        """Insert or refresh mirrored rows from Gmail metadata payloads."""
+        try:
+            parsed_user_id = UUID(user_id)
+            # Postgres rejects an upsert that touches the same row twice, so dedupe by id.
+            rows_by_id = {
+                payload["id"]: self._payload_to_row(parsed_user_id, payload)
+                for payload in payloads
+                if payload.get("id")
+            }
+            rows = list(rows_by_id.values())
+            if not rows:
+                return 0
+
+            statement = insert(MailMessage).values(rows)
+            statement = statement.on_conflict_do_update(
+                constraint="uq_mail_messages_user_gmail_id",
+                set_={
+                    "thread_id": statement.excluded.thread_id,
+                    "label_ids": statement.excluded.label_ids,
+                    "sender": statement.excluded.sender,
+                    "recipients": statement.excluded.recipients,
+                    "subject": statement.excluded.subject,
+                    "snippet": statement.excluded.snippet,
+                    "headers_json": statement.excluded.headers_json,
+                    "internal_date": statement.excluded.internal_date,
+                    "history_id": statement.excluded.history_id,
+                    "updated_at": func.now(),
+                },
+            )
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                await session.execute(statement)
+                await session.commit()
+            return len(rows)
+        except Exception as exc:
+            print(f"Error in MailMirrorService.upsert_messages: {exc}")
+            raise
+
+    async def delete_messages(self, user_id: str, message_ids: list[str]) -> None:
+        """Remove mirrored rows for messages deleted in Gmail."""
+        try:
+            if not message_ids:
+                return
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                await session.execute(
+                    delete(MailMessage).where(
+                        MailMessage.user_id == UUID(user_id),
+                        MailMessage.gmail_message_id.in_(message_ids),
+                    )
+                )
+                await session.commit()
+        except Exception as exc:
+            print(f"Error in MailMirrorService.delete_messages: {exc}")
+            raise
+
+    async def delete_unlisted_messages(
+        self,
+        user_id: str,
+        label_id: str,
+        listed_ids: set[str],
+        oldest_internal_date: int | None,
+    ) -> int:
+        """Remove mailbox rows a fresh backfill listing no longer contains.
+
+        Only rows at or after `oldest_internal_date` are compared when the listing was capped;
+        older rows were outside it and are kept.
+        """
+        try:
+            statement = delete(MailMessage).where(
+                MailMessage.user_id == UUID(user_id),
+                MailMessage.label_ids.contains([label_id]),
+            )
+            if listed_ids:
+                statement = statement.where(MailMessage.gmail_message_id.not_in(sorted(listed_ids)))
+            if oldest_internal_date is not None:
+                statement = statement.where(MailMessage.internal_date >= oldest_internal_date)
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                result = await session.execute(statement)
+                await session.commit()
+            return result.rowcount or 0
+        except Exception as exc:
+            print(f"Error in MailMirrorService.delete_unlisted_messages: {exc}")
+            raise
+
+    async def remove_label(self, user_id: str, message_id: str, label_id: str) -> None:
+        """Apply a local label removal so the mirror matches a write we just made in Gmail."""
+        try:
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                message = await session.scalar(
+                    select(MailMessage).where(
+                        MailMessage.user_id == UUID(user_id),
+                        MailMessage.gmail_message_id == message_id,
+                    )
+                )
+                if message is None or label_id not in (message.label_ids or []):
+                    return
+                message.label_ids = [label for label in message.label_ids if label != label_id]
+                await session.commit()
+        except Exception as exc:
+            print(f"Error in MailMirrorService.remove_label: {exc}")
+
+    async def apply_label_changes(
+        self,
+        user_id: str,
+        message_ids: list[str],
+        add_label_ids: list[str],
+        remove_label_ids: list[str],
+    ) -> None:
+        """Apply a bulk label change locally so the mirror matches a batchModify we just made."""
+        try:
+            if not message_ids:
+                return
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                messages = await session.scalars(
+                    select(MailMessage).where(
+                        MailMessage.user_id == UUID(user_id),
+                        MailMessage.gmail_message_id.in_(message_ids),
+                    )
+                )
+                removed = set(remove_label_ids)
+                for message in messages:
+                    label_ids = [label for label in message.label_ids or [] if label not in removed]
+                    label_ids += [label for label in add_label_ids if label not in label_ids]
+                    if label_ids != (message.label_ids or []):
+                        message.label_ids = label_ids
+                await session.commit()
+        except Exception as exc:
+            print(f"Error in MailMirrorService.apply_label_changes: {exc}")
+
+    async def list_unindexed_message_ids(self, user_id: str, limit: int) -> list[str]:
+        """Return the newest mirrored message ids whose body text has not been indexed yet."""
+        try:
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                message_ids = await session.scalars(
+                    select(MailMessage.gmail_message_id)
+                    .where(
+                        MailMessage.user_id == UUID(user_id),
+                        MailMessage.body_indexed_at.is_(None),
+                    )
+                    .order_by(MailMessage.internal_date.desc())
+                    .limit(limit)
+                )
+                return list(message_ids)
+        except Exception as exc:
+            print(f"Error in MailMirrorService.list_unindexed_message_ids: {exc}")
+            return []
+
+    async def save_body_texts(self, user_id: str, body_texts: dict[str, str]) -> None:
+        """Store extracted body text so the generated search vector picks it up."""
+        try:
+            if not body_texts:
+                return
+            now = datetime.now(UTC)
+            parsed_user_id = UUID(user_id)
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                for message_id, body_text in body_texts.items():
+                    await session.execute(
+                        update(MailMessage)
+                        .where(
+                            MailMessage.user_id == parsed_user_id,
+                            MailMessage.gmail_message_id == message_id,
+                        )
+                        .values(body_text=body_text.replace("\x00", ""), body_indexed_at=now)
+                    )
+                await session.commit()
+        except Exception as exc:
+            print(f"Error in MailMirrorService.save_body_texts: {exc}")
+            raise
+
+    async def read_page(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> tuple[list[MailMessage], str | None]:
+        """Read one keyset-paginated mailbox page ordered newest first."""
+        try:
+            statement = select(MailMessage).where(
+                MailMessage.user_id == UUID(user_id),
+                MailMessage.label_ids.contains([MAILBOX_LABELS.get(mailbox, "INBOX")]),
+            )
+            cursor = self._parse_page_token(page_token)
+            if cursor is not None:
+                statement = statement.where(
+                    tuple_(MailMessage.internal_date, MailMessage.gmail_message_id) < cursor
+                )
+            statement = statement.order_by(
+                MailMessage.internal_date.desc(),
+                MailMessage.gmail_message_id.desc(),
+            ).limit(page_size + 1)
+
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                rows = list(await session.scalars(statement))
+
+            next_page_token = None
+            if len(rows) > page_size:
+                rows = rows[:page_size]
+                last_row = rows[-1]
+                next_page_token = self.build_page_token(
+                    last_row.internal_date, last_row.gmail_message_id
+                )
+            return rows, next_page_token
+        except Exception as exc:
+            print(f"Error in MailMirrorService.read_page: {exc}")
+            raise
+
+    def is_mirror_page_token(self, page_token: str | None) -> bool:
+        """Return True when a page token was issued by the mirror rather than Gmail."""
+        return bool(page_token) and page_token.startswith(MIRROR_PAGE_TOKEN_PREFIX)
+
+    def build_page_token(self, internal_date: int, message_id: str) -> str:
+        """Encode a keyset cursor as an opaque mirror page token."""
+        return f"{MIRROR_PAGE_TOKEN_PREFIX}{internal_date}:{message_id}"
+
+    def _parse_page_token(self, page_token: str | None) -> tuple[int, str] | None:
+        """Decode a mirror page token back into its keyset cursor."""
+        if not self.is_mirror_page_token(page_token):
+            return None
+        raw_cursor = page_token[len(MIRROR_PAGE_TOKEN_PREFIX) :]
+        internal_date, _, message_id = raw_cursor.partition(":")
+        if not internal_date.isdigit() or not message_id:
+            return None
+        return int(internal_date), message_id
+
+    def _payload_to_row(self, user_id: UUID, payload: dict) -> dict:
+        """Flatten a Gmail metadata payload into mirror column values."""
+        headers = {
+            str(header.get("name", "")).lower(): str(header.get("value", ""))
+            for header in payload.get("payload", {}).get("headers", []) or []
+        }
+        internal_date = str(payload.get("internalDate") or "0")
+        return {
+            "user_id": user_id,
+            "gmail_message_id": payload["id"],
+            "thread_id": payload.get("threadId"),
+            "label_ids": list(payload.get("labelIds") or []),
+            "sender": headers.get("from"),
+            "recipients": headers.get("to"),
+            "subject": headers.get("subject"),
+            "snippet": payload.get("snippet", ""),
+            "headers_json": headers,
+            "internal_date": int(internal_date) if internal_date.isdigit() else 0,
+            "history_id": payload.get("historyId"),
+        }
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+ResultT = TypeVar("ResultT")
+
+OFFLOAD_MODES = {"off", "thread", "process"}
+
+
+def _timed_call(func: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    """Run `func` in the worker and report how long it held the CPU there."""
+    started_at = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started_at
+
+
+class MailCpuOffloader:
+    """Run CPU-heavy mail transforms for large payloads on a worker pool.
+
+    Small payloads stay on the event loop, where a pool hop would cost more than the work.
+    At most `max_queue` jobs are submitted at once; further callers wait on the loop rather
+    than piling work into the executor's unbounded queue.
+    """
+
+    def __init__(self):
+        mode = os.getenv("MAIL_OFFLOAD_MODE", "thread").lower()
+        self.mode = mode if mode in OFFLOAD_MODES else "thread"
+        self.min_bytes = int(os.getenv("MAIL_OFFLOAD_MIN_BYTES", str(256 * 1024)))
+        self.workers = int(os.getenv("MAIL_OFFLOAD_WORKERS", "2"))
+        self.max_queue = int(os.getenv("MAIL_OFFLOAD_MAX_QUEUE", "32"))
+        self._executor: Executor | None = None
+        self._slots = asyncio.Semaphore(self.max_queue)
+        self._in_flight = 0
+        self._counters = {
+            "offloaded": 0,
+            "inline": 0,
+            "queue_full_waits": 0,
+            "queue_wait_ms": 0.0,
+            "worker_ms": 0.0,
+            "inline_ms": 0.0,
+        }
+
+    async def run(self, func: Callable[..., ResultT], *args: Any, size: int) -> ResultT:
+        """Call `func(*args)`, on the pool when `size` bytes is above the threshold.
+
+        Under the process mode `func` and its arguments must be picklable, so pass
+        module-level functions and plain data.
+        """
+        if self.mode == "off" or size < self.min_bytes:
+            started_at = time.perf_counter()
+            result = func(*args)
+            self._counters["inline"] += 1
+            self._counters["inline_ms"] += (time.perf_counter() - started_at) * 1000
+            return result
+
+        if self._slots.locked():
+            self._counters["queue_full_waits"] += 1
+        wait_started_at = time.perf_counter()
+        async with self._slots:
+            self._counters["queue_wait_ms"] += (time.perf_counter() - wait_started_at) * 1000
+            self._in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                result, worker_seconds = await loop.run_in_executor(
+                    self._get_executor(), _timed_call, func, *args
+                )
+            finally:
+                self._in_flight -= 1
+        self._counters["offloaded"] += 1
+        self._counters["worker_ms"] += worker_seconds * 1000
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "minBytes": self.min_bytes,
+            "maxQueue": self.max_queue,
+            "inFlight": self._in_flight,
+            "offloaded": self._counters["offloaded"],
+            "inline": self._counters["inline"],
+            "queueFullWaits": self._counters["queue_full_waits"],
+            "queueWaitMs": round(self._counters["queue_wait_ms"], 2),
+            # Worker CPU time is time the event loop would otherwise have been blocked.
+            "loopTimeSavedMs": round(self._counters["worker_ms"], 2),
+            "inlineMs": round(self._counters["inline_ms"], 2),
+        }
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                # Spawn rather than fork: forking a process with a running loop and open
+                # sockets is unsafe.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="mail-offload"
+                )
+        return self._executor
+
+
+mail_offloader = MailCpuOffloader()
+
+
+def shutdown_mail_offloader() -> None:
+    """Stop offload workers during application shutdown."""
+    mail_offloader.shutdown()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from app.mail.schemas import MailListResponse
+
+PrefetchKey = tuple[str, str, str, int]
+
+
+class MailPagePrefetcher:
+    """Warm the next mailbox page in the background while the user reads the current one."""
+
+    def __init__(self):
+        self.enabled = os.getenv("MAIL_PREFETCH_ENABLED", "false").lower() == "true"
+        self.ttl_seconds = float(os.getenv("MAIL_PREFETCH_TTL_SECONDS", "30"))
+        self.max_in_flight = int(os.getenv("MAIL_PREFETCH_MAX_IN_FLIGHT", "20"))
+        self._pages: dict[PrefetchKey, tuple[float, MailListResponse]] = {}
+        self._in_flight: dict[PrefetchKey, asyncio.Task] = {}
+        self._counters = {
+            "scheduled": 0,
+            "hits": 0,
+            "in_flight_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "cancelled": 0,
+            "skipped": 0,
+            "failed": 0,
+        }
+
+    async def take(
+        self, user_id: str, mailbox: str, page_token: str | None, page_size: int
+    ) -> MailListResponse | None:
+        """Return a prefetched page for this request, waiting on one still in flight."""
+        if not self.enabled:
+            return None
+        key = (str(user_id), mailbox, page_token or "", page_size)
+        # Any other prefetch for this user is for a page they have navigated away from.
+        self._discard_user_entries(key)
+        self._prune_expired()
+        if not page_token:
+            return None
+
+        cached = self._pages.pop(key, None)
+        if cached is not None:
+            self._counters["hits"] += 1
+            return cached[1]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            try:
+                page = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                # Re-raise our own cancellation; a cancelled prefetch is just a miss.
+                if not task.cancelled():
+                    raise
+                page = None
+            if page is not None:
+                self._pages.pop(key, None)
+                self._counters["in_flight_hits"] += 1
+                return page
+
+        self._counters["misses"] += 1
+        return None
+
+    def schedule(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+        loader: Callable[[], Awaitable[MailListResponse]],
+    ) -> None:
+        """Start loading the page behind `page_token` unless it is cached or over the cap."""
+        if not self.enabled or not page_token:
+            return
+        key = (str(user_id), mailbox, page_token, page_size)
+        if key in self._in_flight or key in self._pages:
+            return
+        if len(self._in_flight) >= self.max_in_flight:
+            self._counters["skipped"] += 1
+            return
+
+        task = asyncio.create_task(self._load(key, loader))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        self._counters["scheduled"] += 1
+
+    async def cancel_all(self) -> None:
+        tasks = list(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._in_flight.clear()
+        self._pages.clear()
+
+    def get_stats(self) -> dict:
+        served = self._counters["hits"] + self._counters["in_flight_hits"]
+        lookups = served + self._counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "inFlight": len(self._in_flight),
+            "cachedPages": len(self._pages),
+            "scheduled": self._counters["scheduled"],
+            "hits": self._counters["hits"],
+            "inFlightHits": self._counters["in_flight_hits"],
+            "misses": self._counters["misses"],
+            "expired": self._counters["expired"],
+            "cancelled": self._counters["cancelled"],
+            "skipped": self._counters["skipped"],
+            "failed": self._counters["failed"],
+            "hitRate": round(served / lookups, 4) if lookups else 0.0,
+            "wasteRate": (
+                round(
+                    (self._counters["expired"] + self._counters["cancelled"])
+                    / self._counters["scheduled"],
+                    4,
+                )
+                if self._counters["scheduled"]
+                else 0.0
+            ),
+        }
+
+    async def _load(
+        self, key: PrefetchKey, loader: Callable[[], Awaitable[MailListResponse]]
+    ) -> MailListResponse | None:
+        try:
+            page = await loader()
+            self._pages[key] = (time.monotonic() + self.ttl_seconds, page)
+            return page
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # Prefetch is best effort; the real request will fetch the page itself.
+            self._counters["failed"] += 1
+            print(f"Error in MailPagePrefetcher._load: {exc}")
+            return None
+
+    def _discard_user_entries(self, keep_key: PrefetchKey) -> None:
+        user_id = keep_key[0]
+        for key, task in list(self._in_flight.items()):
+            if key[0] == user_id and key != keep_key:
+                task.cancel()
+                self._counters["cancelled"] += 1
+        for key in list(self._pages):
+            if key[0] == user_id and key != keep_key:
+                del self._pages[key]
+                self._counters["expired"] += 1
+
+    def _prune_expired(self) -> None:
+        now = time.monotonic()
+        for key, (expires_at, _) in list(self._pages.items()):
+            if expires_at <= now:
+                del self._pages[key]
+                self._counters["expired"] += 1
+
+
+mail_page_prefetcher = MailPagePrefetcher()
+
+
+async def cancel_mail_prefetches() -> None:
+    """Cancel in-flight prefetches during application shutdown."""
+    await mail_page_prefetcher.cancel_all()
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+from multidict import CIMultiDictProxy
+
+from app.config.http import get_http_client
+
+# Gmail per-user quota units per API method.
+GMAIL_QUOTA_COSTS = {
+    "users.getProfile": 1,
+    "history.list": 2,
+    "messages.list": 5,
+    "messages.get": 5,
+    "messages.modify": 5,
+    "messages.attachments.get": 5,
+    "threads.list": 10,
+    "threads.get": 10,
+    "messages.batchModify": 50,
+    "messages.send": 100,
+}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+RETRYABLE_SERVER_STATUSES = {500, 502, 503, 504}
+
+
+@dataclass
+class GmailResponse:
+    """Fully read Gmail response, detached from the pooled connection."""
+
+    status: int
+    headers: CIMultiDictProxy[str]
+    body: bytes
+
+    def json(self) -> dict:
+        if not self.body.strip():
+            return {}
+        payload = json.loads(self.body)
+        return payload if isinstance(payload, dict) else {}
+
+
+class _UserQuotaState:
+    """Token bucket in Gmail quota units plus an AIMD concurrency window for one user."""
+
+    def __init__(
+        self, quota_per_second: float, burst: float, concurrency: int, max_concurrency: int
+    ):
+        self.quota_per_second = quota_per_second
+        self.burst = burst
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.concurrency_limit = float(concurrency)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.last_used_at = time.monotonic()
+        self.bucket_lock = asyncio.Lock()
+        self.slot_available = asyncio.Condition()
+
+    async def take_quota(self, cost: int) -> float:
+        """Wait until the bucket covers `cost`; return how long the caller waited."""
+        started_at = time.monotonic()
+        # The lock keeps waiters FIFO so a large batch cannot be starved by small calls.
+        async with self.bucket_lock:
+            # Costs above the burst size are admitted from a full bucket and go into debt.
+            required = min(cost, self.burst)
+            while True:
+                self._refill()
+                if self.tokens >= required:
+                    self.tokens -= cost
+                    break
+                await asyncio.sleep((required - self.tokens) / self.quota_per_second)
+        return time.monotonic() - started_at
+
+    async def acquire_slot(self) -> None:
+        async with self.slot_available:
+            await self.slot_available.wait_for(
+                lambda: self.in_flight < max(1, int(self.concurrency_limit))
+            )
+            self.in_flight += 1
+            self.last_used_at = time.monotonic()
+
+    async def release_slot(self) -> None:
+        async with self.slot_available:
+            self.in_flight -= 1
+            self.slot_available.notify_all()
+
+    def on_success(self) -> None:
+        # Additive increase: roughly one extra slot per window of successful calls.
+        self.concurrency_limit = min(
+            self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit
+        )
+
+    def on_rate_limited(self) -> None:
+        # Multiplicative decrease, and drain the bucket so queued calls pause too.
+        self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+        self.tokens = min(self.tokens, 0.0)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        refill = (now - self.refilled_at) * self.quota_per_second
+        self.tokens = min(self.burst, self.tokens + refill)
+        self.refilled_at = now
+
+
+class GmailRequestScheduler:
+    """Route every Gmail API call for a user through one shared quota-aware scheduler."""
+
+    def __init__(self):
+        self.quota_per_second = float(os.getenv("GMAIL_USER_QUOTA_PER_SECOND", "250"))
+        self.quota_burst = float(os.getenv("GMAIL_USER_QUOTA_BURST", "250"))
+        self.initial_concurrency = int(os.getenv("GMAIL_USER_CONCURRENCY", "10"))
+        self.max_concurrency = int(os.getenv("GMAIL_USER_MAX_CONCURRENCY", "20"))
+        self.max_retries = int(os.getenv("GMAIL_RATE_LIMIT_RETRIES", "4"))
+        self.backoff_base_seconds = float(os.getenv("GMAIL_BACKOFF_BASE_SECONDS", "0.5"))
+        self.backoff_max_seconds = float(os.getenv("GMAIL_BACKOFF_MAX_SECONDS", "8"))
+        self.retry_after_max_seconds = float(os.getenv("GMAIL_RETRY_AFTER_MAX_SECONDS", "30"))
+        self.idle_seconds = 600
+        self._users: dict[str, _UserQuotaState] = {}
+        self._counters = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "retry_after_exceeded": 0,
+            "quota_wait_ms": 0.0,
+        }
+
+    async def request(
+        self,
+        user_id: str,
+        operation: str,
+        method: str,
+        url: str,
+        *,
+        cost: int | None = None,
+        **request_kwargs: Any,
+    ) -> GmailResponse:
+        """Send one Gmail call within the user's quota, retrying rate limits with backoff.
+
+        `operation` is the Gmail method name used for quota weighting; pass `cost` to
+        override it, e.g. for batch requests that bundle many sub-requests. A `Retry-After`
+        is waited out as given; one longer than `GMAIL_RETRY_AFTER_MAX_SECONDS` raises a 429
+        carrying it instead of holding the request open.
+        """
+        user_state = self._get_user_state(str(user_id))
+        request_cost = cost if cost is not None else GMAIL_QUOTA_COSTS.get(operation, 5)
+        attempt = 0
+        while True:
+            waited_seconds = await user_state.take_quota(request_cost)
+            self._counters["quota_wait_ms"] += waited_seconds * 1000
+            await user_state.acquire_slot()
+            try:
+                self._counters["requests"] += 1
+                client = get_http_client()
+                async with client.request(method, url, **request_kwargs) as response:
+                    gmail_response = GmailResponse(
+                        status=response.status,
+                        headers=response.headers,
+                        body=await response.read(),
+                    )
+            finally:
+                await user_state.release_slot()
+
+            retry_after = None
+            if self.is_rate_limited(gmail_response):
+                self._counters["rate_limited"] += 1
+                user_state.on_rate_limited()
+                retry_after = self._parse_retry_after(gmail_response)
+                if retry_after is not None and retry_after > self.retry_after_max_seconds:
+                    self._counters["retry_after_exceeded"] += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail="Gmail rate limit reached; retry later",
+                        headers={"Retry-After": str(math.ceil(retry_after))},
+                    )
+            elif gmail_response.status in RETRYABLE_SERVER_STATUSES and method == "GET":
+                self._counters["server_errors"] += 1
+            else:
+                if gmail_response.status < 400:
+                    user_state.on_success()
+                return gmail_response
+
+            if attempt >= self.max_retries:
+                return gmail_response
+            self._counters["retries"] += 1
+            await asyncio.sleep(self._backoff_seconds(attempt, retry_after))
+            attempt += 1
+
+    def record_rate_limited(self, user_id: str) -> None:
+        """Shrink a user's window when a sub-request inside a batch hit the rate limit."""
+        self._counters["rate_limited"] += 1
+        self._get_user_state(str(user_id)).on_rate_limited()
+
+    def is_rate_limited(self, response: GmailResponse) -> bool:
+        if response.status == 429:
+            return True
+        if response.status != 403:
+            return False
+        try:
+            payload = response.json()
+        except ValueError:
+            return False
+        return self.is_rate_limited_error(response.status, payload)
+
+    def is_rate_limited_error(self, status_code: int, payload: dict) -> bool:
+        """Check a decoded Gmail error, such as one part of a batch response, for a rate limit."""
+        if status_code == 429:
+            return True
+        if status_code != 403:
+            return False
+        errors = (payload.get("error") or {}).get("errors", []) or []
+        return any(error.get("reason") in RATE_LIMIT_REASONS for error in errors)
+
+    def get_stats(self) -> dict:
+        limits = [state.concurrency_limit for state in self._users.values()]
+        return {
+            "users": len(self._users),
+            "inFlight": sum(state.in_flight for state in self._users.values()),
+            "requests": self._counters["requests"],
+            "retries": self._counters["retries"],
+            "rateLimited": self._counters["rate_limited"],
+            "serverErrors": self._counters["server_errors"],
+            "retryAfterExceeded": self._counters["retry_after_exceeded"],
+            "quotaWaitMs": round(self._counters["quota_wait_ms"], 2),
+            "minConcurrencyLimit": round(min(limits), 2) if limits else None,
+        }
+
+    def _get_user_state(self, user_id: str) -> _UserQuotaState:
+        user_state = self._users.get(user_id)
+        if user_state is None:
+            self._prune_idle_users()
+            user_state = _UserQuotaState(
+                self.quota_per_second,
+                self.quota_burst,
+                self.initial_concurrency,
+                self.max_concurrency,
+            )
+            self._users[user_id] = user_state
+        return user_state
+
+    def _prune_idle_users(self) -> None:
+        idle_cutoff = time.monotonic() - self.idle_seconds
+        for user_id, user_state in list(self._users.items()):
+            if user_state.in_flight == 0 and user_state.last_used_at < idle_cutoff:
+                del self._users[user_id]
+
+    def _parse_retry_after(self, response: GmailResponse) -> float | None:
+        """Read `Retry-After` as delta-seconds or an HTTP date; None when absent or invalid."""
+        raw_value = response.headers.get("Retry-After")
+        if not raw_value:
+            return None
+        try:
+            return max(0.0, float(raw_value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(raw_value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=UTC)
+        return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+    def _backoff_seconds(self, attempt: int, retry_after: float | None) -> float:
+        # The server knows when its quota window reopens; retrying earlier only burns retries.
+        if retry_after is not None:
+            return retry_after
+        exponential = self.backoff_base_seconds * (2**attempt)
+        # Full jitter keeps concurrent retries for the same user from realigning.
+        return min(random.uniform(0, exponential), self.backoff_max_seconds)
+
+
+gmail_scheduler = GmailRequestScheduler()
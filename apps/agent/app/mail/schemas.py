@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -15,6 +17,23 @@ class MailListResponse(BaseModel):
     next_page_token: str | None = Field(default=None, alias="nextPageToken")
 
 
+class MailListStreamFrame(BaseModel):
+    type: Literal["item", "item_error", "done", "error"]
+    index: int | None = None
+    id: str | None = None
+    item: MailListItem | None = None
+    next_page_token: str | None = Field(default=None, alias="nextPageToken")
+    error: str | None = None
+
+
+class MailAttachment(BaseModel):
+    attachment_id: str = Field(alias="attachmentId")
+    part_id: str = Field(alias="partId")
+    filename: str
+    mime_type: str = Field(alias="mimeType")
+    size: int
+
+
 class MailDetailResponse(BaseModel):
     id: str
     sender: str
@@ -23,8 +42,31 @@ class MailDetailResponse(BaseModel):
     snippet: str
     body: str
     html_body: str | None = Field(default=None, alias="htmlBody")
+    attachments: list[MailAttachment] = Field(default_factory=list)
+    date_label: str = Field(alias="dateLabel")
+    unread: bool
+
+
+class MailThreadListItem(BaseModel):
+    id: str
+    sender: str
+    subject: str
+    snippet: str
     date_label: str = Field(alias="dateLabel")
     unread: bool
+    message_count: int = Field(alias="messageCount")
+    latest_message_id: str | None = Field(default=None, alias="latestMessageId")
+
+
+class MailThreadListResponse(BaseModel):
+    items: list[MailThreadListItem]
+    next_page_token: str | None = Field(default=None, alias="nextPageToken")
+
+
+class MailThreadDetailResponse(BaseModel):
+    id: str
+    subject: str
+    messages: list[MailDetailResponse]
 
 
 class MarkMailReadResponse(BaseModel):
@@ -33,6 +75,32 @@ class MarkMailReadResponse(BaseModel):
     unread: bool
 
 
+class BulkMailSelection(BaseModel):
+    """Messages to modify: explicit ids, every message matching a Gmail query, or both."""
+
+    ids: list[str] = Field(default_factory=list)
+    query: str | None = None
+
+
+class BulkLabelRequest(BulkMailSelection):
+    add_label_ids: list[str] = Field(default_factory=list, alias="addLabelIds")
+    remove_label_ids: list[str] = Field(default_factory=list, alias="removeLabelIds")
+
+
+class BulkModifyItem(BaseModel):
+    id: str
+    unread: bool | None = None
+
+
+class BulkModifyFrame(BaseModel):
+    type: Literal["progress", "done", "error"]
+    matched: int = 0
+    modified: int = 0
+    items: list[BulkModifyItem] | None = None
+    truncated: bool | None = None
+    error: str | None = None
+
+
 class SendMailRequest(BaseModel):
     to: str
     cc: str | None = None
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import cast, func, not_, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from app.config.db import get_session_maker
+from app.mail.mirror import MAILBOX_LABELS
+from app.models import MailboxSyncState, MailMessage
+from app.models.mail_message import SEARCH_TEXT_CONFIG
+
+_TOKEN_PATTERN = re.compile(r'(-?)([a-z_]+):("[^"]*"|\S+)|(-?"[^"]*")|(\S+)', re.IGNORECASE)
+_RELATIVE_PATTERN = re.compile(r"^(\d+)([dmyh])$", re.IGNORECASE)
+_COLUMN_OPERATORS = {"from": "sender", "to": "recipients", "subject": "subject"}
+_LABEL_ALIASES = {
+    "unread": "UNREAD",
+    "starred": "STARRED",
+    "important": "IMPORTANT",
+    "inbox": "INBOX",
+    "sent": "SENT",
+}
+
+
+@dataclass
+class ParsedMailQuery:
+    """Gmail search syntax reduced to the subset the local index can answer exactly."""
+
+    text: str = ""
+    column_filters: list[tuple[str, str]] = field(default_factory=list)
+    required_labels: list[str] = field(default_factory=list)
+    excluded_labels: list[str] = field(default_factory=list)
+    after_ms: int | None = None
+    before_ms: int | None = None
+
+
+class MailSearchIndexService:
+    """Answer agent mail searches from the mirrored full-text index when it covers the query."""
+
+    def parse_gmail_query(self, query: str, now: datetime | None = None) -> ParsedMailQuery | None:
+        """Translate Gmail query syntax; return None when an operator has no local equivalent."""
+        try:
+            reference_now = now or datetime.now(UTC)
+            parsed = ParsedMailQuery()
+            text_terms: list[str] = []
+            for match in _TOKEN_PATTERN.finditer(query or ""):
+                negated, operator, raw_value, quoted, bare = match.groups()
+                if operator is None:
+                    term = quoted or bare or ""
+                    if term.startswith(("(", "{")) or term.endswith((")", "}")):
+                        return None
+                    text_terms.append(term)
+                    continue
+
+                operator = operator.lower()
+                value = raw_value.strip('"')
+                if not value:
+                    return None
+
+                if operator in _COLUMN_OPERATORS and not negated:
+                    parsed.column_filters.append((_COLUMN_OPERATORS[operator], value))
+                elif operator in {"is", "label", "in"}:
+                    normalized_value = value.lower()
+                    if operator == "is" and normalized_value == "read":
+                        # is:read is the absence of UNREAD, so it flips the label direction.
+                        target_labels = (
+                            parsed.required_labels if negated else parsed.excluded_labels
+                        )
+                        target_labels.append("UNREAD")
+                        continue
+                    label_id = _LABEL_ALIASES.get(normalized_value)
+                    if label_id is None:
+                        return None
+                    target_labels = parsed.excluded_labels if negated else parsed.required_labels
+                    target_labels.append(label_id)
+                elif operator in {"after", "before", "newer_than", "older_than"} and not negated:
+                    boundary_ms = self._parse_date_boundary(operator, value, reference_now)
+                    if boundary_ms is None:
+                        return None
+                    if operator in {"after", "newer_than"}:
+                        parsed.after_ms = max(parsed.after_ms or 0, boundary_ms)
+                    else:
+                        parsed.before_ms = min(parsed.before_ms or boundary_ms, boundary_ms)
+                else:
+                    return None
+
+            parsed.text = " ".join(text_terms).strip()
+            return parsed
+        except Exception as exc:
+            print(f"Error in MailSearchIndexService.parse_gmail_query: {exc}")
+            return None
+
+    async def search(
+        self,
+        user_id: str,
+        mailbox: str,
+        query: str,
+        top_k: int,
+        stale_after: timedelta,
+    ) -> list[MailMessage] | None:
+        """Return ranked mirrored matches, or None when Gmail must answer the query instead."""
+        try:
+            parsed = self.parse_gmail_query(query)
+            if parsed is None:
+                return None
+
+            parsed_user_id = UUID(user_id)
+            mailbox_label = MAILBOX_LABELS.get(mailbox, "INBOX")
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                sync_state = await session.scalar(
+                    select(MailboxSyncState).where(MailboxSyncState.user_id == parsed_user_id)
+                )
+                if (
+                    sync_state is None
+                    or sync_state.backfilled_at is None
+                    or sync_state.last_synced_at is None
+                    or datetime.now(UTC) - sync_state.last_synced_at > stale_after
+                ):
+                    return None
+
+                statement = select(MailMessage).where(
+                    MailMessage.user_id == parsed_user_id,
+                    MailMessage.label_ids.contains([mailbox_label, *parsed.required_labels]),
+                )
+                for label_id in parsed.excluded_labels:
+                    statement = statement.where(not_(MailMessage.label_ids.contains([label_id])))
+                for column_name, value in parsed.column_filters:
+                    statement = statement.where(
+                        getattr(MailMessage, column_name).ilike(
+                            f"%{self._escape_like(value)}%", escape="\\"
+                        )
+                    )
+                if parsed.after_ms is not None:
+                    statement = statement.where(MailMessage.internal_date >= parsed.after_ms)
+                if parsed.before_ms is not None:
+                    statement = statement.where(MailMessage.internal_date < parsed.before_ms)
+
+                scope = statement
+                if parsed.text:
+                    ts_query = func.websearch_to_tsquery(
+                        cast(SEARCH_TEXT_CONFIG, REGCONFIG), parsed.text
+                    )
+                    statement = statement.where(MailMessage.search_vector.op("@@")(ts_query))
+                    statement = statement.order_by(
+                        func.ts_rank_cd(MailMessage.search_vector, ts_query).desc(),
+                        MailMessage.internal_date.desc(),
+                    )
+                else:
+                    statement = statement.order_by(MailMessage.internal_date.desc())
+
+                rows = list(await session.scalars(statement.limit(top_k)))
+                if len(rows) >= top_k:
+                    return rows
+
+                # Fewer hits than requested: only trust them if every message in scope has its
+                # body indexed (bodies are indexed a batch per sync) and the mirror spans the range.
+                if parsed.text:
+                    unindexed_in_scope = await session.scalar(
+                        select(
+                            scope.with_only_columns(MailMessage.id)
+                            .where(MailMessage.body_indexed_at.is_(None))
+                            .exists()
+                        )
+                    )
+                    if unindexed_in_scope:
+                        return None
+                backfill_capped = bool((sync_state.backfill_page_tokens or {}).get(mailbox))
+                if not backfill_capped:
+                    return rows
+                oldest_mirrored_ms = await session.scalar(
+                    select(func.min(MailMessage.internal_date)).where(
+                        MailMessage.user_id == parsed_user_id,
+                        MailMessage.label_ids.contains([mailbox_label]),
+                    )
+                )
+                if (
+                    parsed.after_ms is not None
+                    and oldest_mirrored_ms is not None
+                    and parsed.after_ms >= oldest_mirrored_ms
+                ):
+                    return rows
+                return None
+        except Exception as exc:
+            print(f"Error in MailSearchIndexService.search: {exc}")
+            return None
+
+    def _parse_date_boundary(self, operator: str, value: str, now: datetime) -> int | None:
+        """Convert Gmail after/before/newer_than/older_than values to epoch milliseconds."""
+        if operator in {"newer_than", "older_than"}:
+            relative_match = _RELATIVE_PATTERN.match(value)
+            if not relative_match:
+                return None
+            amount = int(relative_match.group(1))
+            unit = relative_match.group(2).lower()
+            delta = {
+                "h": timedelta(hours=amount),
+                "d": timedelta(days=amount),
+                "m": timedelta(days=30 * amount),
+                "y": timedelta(days=365 * amount),
+            }[unit]
+            return int((now - delta).timestamp() * 1000)
+
+        if value.isdigit():
+            return int(value) * 1000
+        for date_format in ("%Y/%m/%d", "%Y-%m-%d", "%m/%d/%Y"):
+            try:
+                parsed_date = datetime.strptime(value, date_format).replace(tzinfo=now.tzinfo)
+                return int(parsed_date.timestamp() * 1000)
+            except ValueError:
+                continue
+        return None
+
+    def _escape_like(self, value: str) -> str:
+        """Escape LIKE wildcards so operator values match literally."""
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -1,42 +1,76 @@
 import asyncio
-import base64
-import html
 import os
-import re
+import time
 import uuid
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime, timedelta
-from email.message import EmailMessage
+from urllib.parse import urlsplit
 
-import aiohttp
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import DBAPIError
 
 from app.config.db import get_session_maker
+from app.config.http import get_http_client
+from app.mail.batch import build_batch_request, parse_batch_response
+from app.mail.coalesce import mail_request_coalescer
+from app.mail.detail_cache import CachedMailBody, CachedMailDetail, mail_detail_cache
+from app.mail.html_text import html_to_text
+from app.mail.mime import (
+    MimePart,
+    MimePartIndex,
+    build_mime_index,
+    decode_attachment_response,
+    decode_part_data,
+    decode_part_text,
+    encode_raw_message,
+)
+from app.mail.mirror import MailMirrorService
+from app.mail.offload import mail_offloader
+from app.mail.prefetch import mail_page_prefetcher
+from app.mail.scheduler import GMAIL_QUOTA_COSTS, gmail_scheduler
 from app.mail.schemas import (
+    BulkMailSelection,
+    BulkModifyFrame,
+    BulkModifyItem,
+    MailAttachment,
     MailDetailResponse,
     MailListItem,
     MailListResponse,
+    MailListStreamFrame,
+    MailThreadDetailResponse,
+    MailThreadListItem,
+    MailThreadListResponse,
     MarkMailReadResponse,
     SendMailResponse,
 )
-from app.models import OauthAccount
-from app.utils.constants import GMAIL_API_BASE_URL, GOOGLE_TOKEN_URL, PROVIDER_NAME
+from app.mail.search_index import MailSearchIndexService
+from app.mail.sync_service import GmailMailboxSyncService
+from app.mail.token_cache import access_token_cache
+from app.models import MailMessage, OauthAccount
+from app.utils.constants import (
+    GMAIL_API_BASE_URL,
+    GMAIL_BATCH_URL,
+    GOOGLE_TOKEN_URL,
+    PROVIDER_NAME,
+)
 
 
 class GmailTokenService:
     """Resolve and refresh Gmail access tokens for authenticated users."""
 
+    REFRESH_LOCK_TIMEOUT_MS = int(os.getenv("GOOGLE_TOKEN_REFRESH_LOCK_TIMEOUT_MS", "10000"))
+
     async def get_valid_access_token(self, user_id: str) -> str:
         """Return a non-expired Google access token for the given app user id."""
         try:
-            oauth_account = await self._get_oauth_account(user_id)
-            oauth_account = await self.refresh_access_token_if_needed(oauth_account)
-            if not oauth_account.access_token:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Missing Google access token",
-                )
-            return oauth_account.access_token
+            cached_token = access_token_cache.get(user_id)
+            if cached_token:
+                return cached_token
+            # Concurrent misses for one user share a single DB read and Google refresh.
+            return await access_token_cache.load_once(
+                user_id, lambda: self._load_access_token(user_id)
+            )
         except HTTPException as exc:
             print(f"Error in GmailTokenService.get_valid_access_token: {exc}")
             raise
@@ -47,83 +81,170 @@ class GmailTokenService:
                 detail="Failed to resolve Google access token",
             ) from exc
 
+    async def _load_access_token(self, user_id: str) -> str:
+        """Read the stored token, refresh it when near expiry, and populate the cache."""
+        oauth_account = await self._get_oauth_account(user_id)
+        oauth_account = await self.refresh_access_token_if_needed(oauth_account)
+        if not oauth_account.access_token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Missing Google access token",
+            )
+        access_token_cache.put(user_id, oauth_account.access_token, oauth_account.expires_at)
+        return oauth_account.access_token
+
     async def refresh_access_token_if_needed(self, oauth_account: OauthAccount) -> OauthAccount:
         """Refresh token with Google when expiry is near and persist updated credentials."""
         try:
             expiry = oauth_account.expires_at
-            should_refresh = expiry is not None and expiry <= datetime.now(UTC) + timedelta(
-                seconds=60
+            should_refresh = (
+                expiry is not None
+                and expiry <= datetime.now(UTC) + access_token_cache.refresh_margin
             )
             if not should_refresh:
                 return oauth_account
+            return await self._refresh_access_token(oauth_account)
+        except HTTPException as exc:
+            print(f"Error in GmailTokenService.refresh_access_token_if_needed: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in GmailTokenService.refresh_access_token_if_needed: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to refresh Google token",
+            ) from exc
 
-            if not oauth_account.refresh_token:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Google refresh token unavailable; re-authenticate",
-                )
+    async def refresh_access_token_ahead(
+        self, oauth_account: OauthAccount, lead_time: timedelta
+    ) -> OauthAccount:
+        """Refresh a token that expires within `lead_time` and warm the access-token cache."""
+        try:
+            refreshed_account = await self._refresh_access_token(oauth_account, lead_time)
+            access_token_cache.put(
+                str(refreshed_account.user_id),
+                refreshed_account.access_token,
+                refreshed_account.expires_at,
+            )
+            return refreshed_account
+        except HTTPException as exc:
+            print(f"Error in GmailTokenService.refresh_access_token_ahead: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in GmailTokenService.refresh_access_token_ahead: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to refresh Google token",
+            ) from exc
 
-            client_id = os.getenv("GOOGLE_CLIENT_ID")
-            client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
-            if not client_id or not client_secret:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Google OAuth credentials missing",
+    async def _refresh_access_token(
+        self, oauth_account: OauthAccount, refresh_margin: timedelta | None = None
+    ) -> OauthAccount:
+        """Refresh under a per-account advisory lock so only one worker calls Google."""
+        try:
+            session_maker = get_session_maker()
+            async with session_maker() as session, session.begin():
+                await session.execute(
+                    text(f"SET LOCAL lock_timeout = '{self.REFRESH_LOCK_TIMEOUT_MS}ms'")
                 )
-
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=20)) as client:
-                async with client.post(
-                    GOOGLE_TOKEN_URL,
-                    data={
-                        "client_id": client_id,
-                        "client_secret": client_secret,
-                        "refresh_token": oauth_account.refresh_token,
-                        "grant_type": "refresh_token",
-                    },
-                ) as response:
-                    payload = await response.json(content_type=None)
-                    if response.status >= 400:
-                        raise HTTPException(
-                            status_code=status.HTTP_401_UNAUTHORIZED,
-                            detail=payload.get("error_description")
-                            or payload.get("error")
-                            or "Failed to refresh Google token",
-                        )
-
-            access_token = payload.get("access_token")
-            expires_in = int(payload.get("expires_in", 3600))
-            if not access_token:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Invalid Google refresh response",
+                await session.execute(
+                    select(func.pg_advisory_xact_lock(self._refresh_lock_key(oauth_account.id)))
+                )
+                db_account = await session.get(
+                    OauthAccount, oauth_account.id, populate_existing=True
                 )
-
-            session_maker = get_session_maker()
-            async with session_maker() as session:
-                db_account = await session.get(OauthAccount, oauth_account.id)
                 if db_account is None:
                     raise HTTPException(
                         status_code=status.HTTP_404_NOT_FOUND,
                         detail="OAuth account no longer exists",
                     )
-                db_account.access_token = access_token
-                db_account.expires_at = datetime.now(UTC) + timedelta(seconds=expires_in)
+                # Another worker may have refreshed while this one waited for the lock.
+                refresh_before = datetime.now(UTC) + (
+                    refresh_margin or access_token_cache.refresh_margin
+                )
+                if db_account.expires_at is not None and db_account.expires_at > refresh_before:
+                    return db_account
+
+                started_at = time.perf_counter()
+                try:
+                    payload = await self._request_token_refresh(db_account)
+                except Exception:
+                    access_token_cache.record_refresh(
+                        (time.perf_counter() - started_at) * 1000, succeeded=False
+                    )
+                    raise
+                access_token_cache.record_refresh(
+                    (time.perf_counter() - started_at) * 1000, succeeded=True
+                )
+                db_account.access_token = payload["access_token"]
+                db_account.expires_at = datetime.now(UTC) + timedelta(
+                    seconds=int(payload.get("expires_in", 3600))
+                )
                 if payload.get("scope"):
                     db_account.scope = payload["scope"]
                 if payload.get("token_type"):
                     db_account.token_type = payload["token_type"]
-                await session.commit()
-                await session.refresh(db_account)
-                return db_account
-        except HTTPException as exc:
-            print(f"Error in GmailTokenService.refresh_access_token_if_needed: {exc}")
+            # Leaving session.begin() commits and releases the transaction-scoped lock.
+            return db_account
+        except DBAPIError as exc:
+            if getattr(exc.orig, "sqlstate", None) == "55P03":
+                print(f"Error in GmailTokenService._refresh_access_token: {exc}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Google token refresh is busy; retry shortly",
+                ) from exc
             raise
-        except Exception as exc:
-            print(f"Error in GmailTokenService.refresh_access_token_if_needed: {exc}")
+
+    async def _request_token_refresh(self, oauth_account: OauthAccount) -> dict:
+        """Exchange the stored refresh token with Google and return the token payload."""
+        if not oauth_account.refresh_token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Google refresh token unavailable; re-authenticate",
+            )
+
+        client_id = os.getenv("GOOGLE_CLIENT_ID")
+        client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
+        if not client_id or not client_secret:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to refresh Google token",
-            ) from exc
+                detail="Google OAuth credentials missing",
+            )
+
+        client = get_http_client()
+        async with client.post(
+            GOOGLE_TOKEN_URL,
+            data={
+                "client_id": client_id,
+                "client_secret": client_secret,
+                "refresh_token": oauth_account.refresh_token,
+                "grant_type": "refresh_token",
+            },
+        ) as response:
+            # A Google outage is retryable; only a rejected grant means signing in again.
+            if response.status >= 500:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Google token endpoint unavailable; retry shortly",
+                )
+            payload = await response.json(content_type=None)
+            if response.status >= 400:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail=payload.get("error_description")
+                    or payload.get("error")
+                    or "Failed to refresh Google token",
+                )
+
+        if not payload.get("access_token"):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Invalid Google refresh response",
+            )
+        return payload
+
+    def _refresh_lock_key(self, oauth_account_id: uuid.UUID) -> int:
+        """Map an account id onto the signed 64-bit key space of pg advisory locks."""
+        return int.from_bytes(oauth_account_id.bytes[:8], "big", signed=True)
 
     async def _get_oauth_account(self, user_id: str) -> OauthAccount:
         """Load Google OAuth credentials for the app user."""
@@ -163,17 +284,46 @@ class GmailTokenService:
 class GmailMailService:
     """Read and update Gmail messages used by the mail workspace UI."""
 
-    LIST_FETCH_CONCURRENCY = 10
+    LIST_BATCH_SIZE = 100
+    BULK_MODIFY_CHUNK_SIZE = 1000
+    BULK_QUERY_PAGE_SIZE = 500
+    LIST_METADATA_PARAMS: dict[str, str | list[str]] = {
+        "format": "metadata",
+        "metadataHeaders": ["From", "Subject", "Date"],
+        "fields": "id,snippet,labelIds,internalDate,payload/headers",
+    }
+    THREAD_METADATA_PARAMS: dict[str, str | list[str]] = {
+        "format": "metadata",
+        "metadataHeaders": ["From", "Subject", "Date"],
+        "fields": "id,messages(id,snippet,labelIds,internalDate,payload/headers)",
+    }
+    DETAIL_MESSAGE_FIELDS = (
+        "id,snippet,labelIds,internalDate,payload/mimeType,payload/filename,"
+        "payload/headers,payload/body,payload/parts"
+    )
 
     def __init__(self):
         self.token_service = GmailTokenService()
+        self.batch_hydration_enabled = os.getenv("GMAIL_BATCH_HYDRATION", "true").lower() == "true"
+        self.batch_fallback_max_ids = int(os.getenv("GMAIL_BATCH_FALLBACK_MAX_IDS", "10"))
+        self.mirror_enabled = os.getenv("MAIL_MIRROR_ENABLED", "true").lower() == "true"
+        self.mirror_stale_after = timedelta(
+            seconds=int(os.getenv("MAIL_MIRROR_STALE_SECONDS", "300"))
+        )
+        self.mirror_refresh_after = timedelta(
+            seconds=int(os.getenv("MAIL_MIRROR_REFRESH_SECONDS", "30"))
+        )
+        self.bulk_max_messages = int(os.getenv("MAIL_BULK_MAX_MESSAGES", "10000"))
+        self.mirror_service = MailMirrorService()
+        self.search_index_service = MailSearchIndexService()
+        self.sync_service = GmailMailboxSyncService(self, self.mirror_service)
 
-    def extract_ai_readable_content(self, detail: MailDetailResponse) -> str:
+    async def extract_ai_readable_content(self, detail: MailDetailResponse) -> str:
         """Build plain AI-readable mail content by preferring HTML text then plain body/snippet."""
         try:
             html_body = detail.html_body
             if html_body:
-                normalized_html_text = self._html_to_text(html_body)
+                normalized_html_text = await self._html_to_text(html_body)
                 if normalized_html_text:
                     return normalized_html_text
 
@@ -186,6 +336,33 @@ class GmailMailService:
             print(f"Error in GmailMailService.extract_ai_readable_content: {exc}")
             return (detail.snippet or "").strip()
 
+    async def extract_payload_text(self, payload: dict, max_chars: int | None = None) -> str:
+        """Extract readable text from a raw Gmail payload tree, preferring the HTML part.
+
+        Only inline body data is used; parts Gmail moved behind an attachment id are skipped
+        rather than downloaded.
+        """
+        try:
+            part_index = build_mime_index(payload)
+            html_part = part_index.first_body("text/html")
+            if html_part is not None and html_part.data:
+                html_body = await mail_offloader.run(
+                    decode_part_data, html_part.data, html_part.charset, size=len(html_part.data)
+                )
+                normalized_html_text = await self._html_to_text(html_body, max_chars)
+                if normalized_html_text:
+                    return normalized_html_text
+            plain_part = part_index.first_body("text/plain")
+            if plain_part is None or not plain_part.data:
+                return ""
+            plain_body = await mail_offloader.run(
+                decode_part_data, plain_part.data, plain_part.charset, size=len(plain_part.data)
+            )
+            return plain_body.strip()
+        except Exception as exc:
+            print(f"Error in GmailMailService.extract_payload_text: {exc}")
+            return ""
+
     async def list_messages(
         self,
         user_id: str,
@@ -195,34 +372,11 @@ class GmailMailService:
     ) -> MailListResponse:
         """Fetch paginated inbox or sent messages and return summarized list items."""
         try:
-            access_token = await self.token_service.get_valid_access_token(user_id)
-            headers = {"Authorization": f"Bearer {access_token}"}
-
-            params: dict[str, str | int] = {"maxResults": page_size}
-            if page_token:
-                params["pageToken"] = page_token
-            params["labelIds"] = "SENT" if mailbox == "sent" else "INBOX"
-
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=20)) as client:
-                async with client.get(
-                    f"{GMAIL_API_BASE_URL}/users/me/messages",
-                    headers=headers,
-                    params=params,
-                ) as response:
-                    payload = await response.json(content_type=None)
-                    if response.status >= 400:
-                        detail = payload.get("error", {}).get(
-                            "message", "Failed to fetch Gmail messages"
-                        )
-                        raise HTTPException(
-                            status_code=status.HTTP_502_BAD_GATEWAY,
-                            detail=detail,
-                        )
-
-                messages = payload.get("messages", [])
-                items = await self._fetch_list_items(client, headers, messages)
-
-            return MailListResponse(items=items, nextPageToken=payload.get("nextPageToken"))
+            return await mail_request_coalescer.run(
+                "list_messages",
+                (str(user_id), mailbox, page_token or "", page_size),
+                lambda: self._resolve_list_page(user_id, mailbox, page_token, page_size),
+            )
         except HTTPException as exc:
             print(f"Error in GmailMailService.list_messages: {exc}")
             raise
@@ -233,6 +387,77 @@ class GmailMailService:
                 detail="Failed to list mail messages",
             ) from exc
 
+    async def stream_list_messages(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> AsyncIterator[MailListStreamFrame]:
+        """Yield list items as soon as each one is hydrated, then a final page-token frame.
+
+        Errors before the first frame raise HTTPException so callers can still answer with a
+        regular error response; later per-item failures become ``item_error`` frames.
+        """
+        try:
+            mirror_page = await self._list_messages_from_mirror(
+                user_id, mailbox, page_token, page_size
+            )
+            if mirror_page is not None:
+                for index, item in enumerate(mirror_page.items):
+                    yield MailListStreamFrame(type="item", index=index, item=item)
+                yield MailListStreamFrame(type="done", nextPageToken=mirror_page.next_page_token)
+                return
+
+            prefetched_page = await mail_page_prefetcher.take(
+                user_id, mailbox, page_token, page_size
+            )
+            if prefetched_page is not None:
+                self._schedule_next_page_prefetch(user_id, mailbox, prefetched_page, page_size)
+                for index, item in enumerate(prefetched_page.items):
+                    yield MailListStreamFrame(type="item", index=index, item=item)
+                yield MailListStreamFrame(
+                    type="done", nextPageToken=prefetched_page.next_page_token
+                )
+                return
+
+            access_token = await self.token_service.get_valid_access_token(user_id)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            payload = await self._fetch_mailbox_page(
+                user_id, headers, mailbox, page_token, page_size
+            )
+            message_ids = [
+                message.get("id") for message in payload.get("messages", []) if message.get("id")
+            ]
+
+            async for index, message_id, item in self._iter_list_items(
+                user_id, headers, message_ids
+            ):
+                if item is None:
+                    yield MailListStreamFrame(type="item_error", index=index, id=message_id)
+                else:
+                    yield MailListStreamFrame(type="item", index=index, item=item)
+            if payload.get("nextPageToken"):
+                mail_page_prefetcher.schedule(
+                    user_id,
+                    mailbox,
+                    payload["nextPageToken"],
+                    page_size,
+                    lambda: self._load_live_page(
+                        user_id, mailbox, payload["nextPageToken"], page_size
+                    ),
+                )
+            yield MailListStreamFrame(type="done", nextPageToken=payload.get("nextPageToken"))
+        except HTTPException as exc:
+            print(f"Error in GmailMailService.stream_list_messages: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in GmailMailService.stream_list_messages: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to stream mail messages",
+            ) from exc
+
     async def search_messages(
         self,
         user_id: str,
@@ -243,37 +468,11 @@ class GmailMailService:
     ) -> MailListResponse:
         """Search mailbox messages using Gmail query syntax and return hydrated list items."""
         try:
-            access_token = await self.token_service.get_valid_access_token(user_id)
-            headers = {"Authorization": f"Bearer {access_token}"}
-
-            params: dict[str, str | int] = {
-                "maxResults": page_size,
-                "q": query,
-            }
-            if page_token:
-                params["pageToken"] = page_token
-            params["labelIds"] = "SENT" if mailbox == "sent" else "INBOX"
-
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=20)) as client:
-                async with client.get(
-                    f"{GMAIL_API_BASE_URL}/users/me/messages",
-                    headers=headers,
-                    params=params,
-                ) as response:
-                    payload = await response.json(content_type=None)
-                    if response.status >= 400:
-                        detail = payload.get("error", {}).get(
-                            "message", "Failed to search Gmail messages"
-                        )
-                        raise HTTPException(
-                            status_code=status.HTTP_502_BAD_GATEWAY,
-                            detail=detail,
-                        )
-
-                messages = payload.get("messages", [])
-                items = await self._fetch_list_items(client, headers, messages)
-
-            return MailListResponse(items=items, nextPageToken=payload.get("nextPageToken"))
+            return await mail_request_coalescer.run(
+                "search_messages",
+                (str(user_id), mailbox, " ".join(query.split()), page_size, page_token or ""),
+                lambda: self._search_live(user_id, mailbox, query, page_size, page_token),
+            )
         except HTTPException as exc:
             print(f"Error in GmailMailService.search_messages: {exc}")
             raise
@@ -284,66 +483,101 @@ class GmailMailService:
                 detail="Failed to search mail messages",
             ) from exc
 
+    async def search_candidates(
+        self,
+        user_id: str,
+        mailbox: str,
+        query: str,
+        page_size: int,
+    ) -> MailListResponse:
+        """Search the local full-text index first and use live Gmail search when it can't."""
+        try:
+            if self.mirror_enabled:
+                rows = await self.search_index_service.search(
+                    user_id, mailbox, query, page_size, self.mirror_stale_after
+                )
+                if rows is not None:
+                    return MailListResponse(
+                        items=[self._mirror_row_to_list_item(row) for row in rows]
+                    )
+            return await self.search_messages(user_id, mailbox, query, page_size)
+        except HTTPException as exc:
+            print(f"Error in GmailMailService.search_candidates: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in GmailMailService.search_candidates: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to search mail messages",
+            ) from exc
+
     async def get_message_detail(self, user_id: str, message_id: str) -> MailDetailResponse:
         """Fetch a single Gmail message with full body content for the detail panel."""
-        try:
-            access_token = await self.token_service.get_valid_access_token(user_id)
-            headers = {"Authorization": f"Bearer {access_token}"}
-            params = {
-                "format": "full",
-                "fields": (
-                    "id,snippet,labelIds,internalDate,payload/headers,"
-                    "payload/body,payload/parts"
-                ),
-            }
+        detail, _ = await self.get_message_detail_with_etag(user_id, message_id)
+        return detail
 
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=20)) as client:
-                async with client.get(
-                    f"{GMAIL_API_BASE_URL}/users/me/messages/{message_id}",
-                    headers=headers,
-                    params=params,
-                ) as response:
-                    payload = await response.json(content_type=None)
-                    if response.status >= 400:
-                        detail = payload.get("error", {}).get(
-                            "message", "Failed to fetch message detail"
-                        )
-                        raise HTTPException(
-                            status_code=status.HTTP_502_BAD_GATEWAY,
-                            detail=detail,
-                        )
-
-            header_map = self._extract_header_map(payload.get("payload", {}).get("headers", []))
-            sender = header_map.get("from", "Unknown sender")
-            to_recipient = header_map.get("to")
-            subject = header_map.get("subject", "(no subject)")
-            internal_date = payload.get("internalDate")
-            unread = "UNREAD" in (payload.get("labelIds") or [])
-            raw_payload = payload.get("payload", {})
-            html_body = self._extract_html_body(raw_payload)
-            body = self._extract_plain_text_body(raw_payload)
-
-            return MailDetailResponse(
-                id=payload.get("id", message_id),
-                sender=sender,
-                to=to_recipient,
-                subject=subject,
-                snippet=payload.get("snippet", ""),
-                body=body or payload.get("snippet", ""),
-                htmlBody=html_body,
-                dateLabel=self._format_date_label(internal_date),
-                unread=unread,
+    async def get_message_detail_with_etag(
+        self, user_id: str, message_id: str
+    ) -> tuple[MailDetailResponse, str]:
+        """Serve message detail from the detail cache, refreshing only label-derived state."""
+        try:
+            return await mail_request_coalescer.run(
+                "get_message_detail",
+                (str(user_id), message_id),
+                lambda: self._resolve_message_detail(user_id, message_id),
             )
         except HTTPException as exc:
-            print(f"Error in GmailMailService.get_message_detail: {exc}")
+            print(f"Error in GmailMailService.get_message_detail_with_etag: {exc}")
             raise
         except Exception as exc:
-            print(f"Error in GmailMailService.get_message_detail: {exc}")
+            print(f"Error in GmailMailService.get_message_detail_with_etag: {exc}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to fetch message detail",
             ) from exc
 
+    async def list_threads(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> MailThreadListResponse:
+        """List one page of conversations, hydrating every summary in one batch call."""
+        try:
+            return await mail_request_coalescer.run(
+                "list_threads",
+                (str(user_id), mailbox, page_token or "", page_size),
+                lambda: self._load_thread_page(user_id, mailbox, page_token, page_size),
+            )
+        except HTTPException as exc:
+            print(f"Error in GmailMailService.list_threads: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in GmailMailService.list_threads: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to list mail threads",
+            ) from exc
+
+    async def get_thread_detail(self, user_id: str, thread_id: str) -> MailThreadDetailResponse:
+        """Fetch a whole conversation with one threads.get and parse every message in it."""
+        try:
+            return await mail_request_coalescer.run(
+                "get_thread_detail",
+                (str(user_id), thread_id),
+                lambda: self._fetch_thread_detail(user_id, thread_id),
+            )
+        except HTTPException as exc:
+            print(f"Error in GmailMailService.get_thread_detail: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in GmailMailService.get_thread_detail: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to fetch thread detail",
+            ) from exc
+
     async def mark_message_read(self, user_id: str, message_id: str) -> MarkMailReadResponse:
         """Mark a Gmail message as read by removing the UNREAD label."""
         try:
@@ -353,23 +587,26 @@ class GmailMailService:
                 "Content-Type": "application/json",
             }
 
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=20)) as client:
-                async with client.post(
-                    f"{GMAIL_API_BASE_URL}/users/me/messages/{message_id}/modify",
-                    headers=headers,
-                    json={"removeLabelIds": ["UNREAD"]},
-                ) as response:
-                    payload = await response.json(content_type=None)
-                    if response.status >= 400:
-                        detail = payload.get("error", {}).get(
-                            "message", "Failed to mark message as read"
-                        )
-                        raise HTTPException(
-                            status_code=status.HTTP_502_BAD_GATEWAY,
-                            detail=detail,
-                        )
+            response = await gmail_scheduler.request(
+                user_id,
+                "messages.modify",
+                "POST",
+                f"{GMAIL_API_BASE_URL}/users/me/messages/{message_id}/modify",
+                headers=headers,
+                json={"removeLabelIds": ["UNREAD"]},
+            )
+            payload = response.json()
+            if response.status >= 400:
+                detail = payload.get("error", {}).get("message", "Failed to mark message as read")
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=detail,
+                )
 
             unread = "UNREAD" in (payload.get("labelIds") or [])
+            mail_detail_cache.set_unread(user_id, message_id, unread)
+            if self.mirror_enabled and not unread:
+                await self.mirror_service.remove_label(user_id, message_id, "UNREAD")
             return MarkMailReadResponse(ok=True, id=message_id, unread=unread)
         except HTTPException as exc:
             print(f"Error in GmailMailService.mark_message_read: {exc}")
@@ -381,6 +618,111 @@ class GmailMailService:
                 detail="Failed to update message read state",
             ) from exc
 
+    async def bulk_modify_messages(
+        self,
+        user_id: str,
+        selection: BulkMailSelection,
+        add_label_ids: list[str],
+        remove_label_ids: list[str],
+    ) -> AsyncIterator[BulkModifyFrame]:
+        """Change labels on many messages with batchModify, yielding a frame per step.
+
+        Query matches are collected before anything is modified, because changing labels
+        while paging (e.g. marking `is:unread` as read) would shift later pages.
+        """
+        try:
+            if not selection.ids and not selection.query:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Provide message ids or a query",
+                )
+            if not add_label_ids and not remove_label_ids:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="No label changes requested",
+                )
+
+            access_token = await self.token_service.get_valid_access_token(user_id)
+            headers = {"Authorization": f"Bearer {access_token}"}
+
+            message_ids = [message_id for message_id in dict.fromkeys(selection.ids) if message_id]
+            truncated = len(message_ids) > self.bulk_max_messages
+            message_ids = message_ids[: self.bulk_max_messages]
+            if selection.query and not truncated:
+                seen_ids = set(message_ids)
+                page_token: str | None = None
+                while True:
+                    page = await self._list_query_ids_page(
+                        user_id, headers, selection.query, page_token
+                    )
+                    for message in page.get("messages", []):
+                        if message.get("id") and message["id"] not in seen_ids:
+                            seen_ids.add(message["id"])
+                            message_ids.append(message["id"])
+                    page_token = page.get("nextPageToken")
+                    if len(message_ids) >= self.bulk_max_messages:
+                        truncated = len(message_ids) > self.bulk_max_messages or bool(page_token)
+                        message_ids = message_ids[: self.bulk_max_messages]
+                        break
+                    if not page_token:
+                        break
+                    yield BulkModifyFrame(type="progress", matched=len(message_ids))
+
+            # batchModify does not return labels, but the UNREAD outcome follows from the request.
+            unread = None
+            if "UNREAD" in remove_label_ids:
+                unread = False
+            elif "UNREAD" in add_label_ids:
+                unread = True
+
+            modified = 0
+            for offset in range(0, len(message_ids), self.BULK_MODIFY_CHUNK_SIZE):
+                chunk = message_ids[offset : offset + self.BULK_MODIFY_CHUNK_SIZE]
+                await self._batch_modify(user_id, headers, chunk, add_label_ids, remove_label_ids)
+                modified += len(chunk)
+                if unread is not None:
+                    for message_id in chunk:
+                        mail_detail_cache.set_unread(user_id, message_id, unread)
+                if self.mirror_enabled:
+                    await self.mirror_service.apply_label_changes(
+                        user_id, chunk, add_label_ids, remove_label_ids
+                    )
+                yield BulkModifyFrame(
+                    type="progress",
+                    matched=len(message_ids),
+                    modified=modified,
+                    items=[BulkModifyItem(id=message_id, unread=unread) for message_id in chunk],
+                )
+
+            yield BulkModifyFrame(
+                type="done", matched=len(message_ids), modified=modified, truncated=truncated
+            )
+        except HTTPException as exc:
+            print(f"Error in GmailMailService.bulk_modify_messages: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in GmailMailService.bulk_modify_messages: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to update messages",
+            ) from exc
+
+    async def get_attachment(self, user_id: str, message_id: str, attachment_id: str) -> bytes:
+        """Download one attachment body on demand through messages.attachments.get."""
+        try:
+            access_token = await self.token_service.get_valid_access_token(user_id)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            return await self._fetch_attachment_bytes(user_id, headers, message_id, attachment_id)
+        except HTTPException as exc:
+            print(f"Error in GmailMailService.get_attachment: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in GmailMailService.get_attachment: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to fetch attachment",
+            ) from exc
+
     async def send_message(
         self,
         user_id: str,
@@ -397,30 +739,25 @@ class GmailMailService:
                 "Content-Type": "application/json",
             }
 
-            mime_message = EmailMessage()
-            mime_message["To"] = to
-            if cc:
-                mime_message["Cc"] = cc
-            mime_message["Subject"] = subject
-            mime_message.set_content(body)
-
-            raw_message = base64.urlsafe_b64encode(mime_message.as_bytes()).decode().rstrip("=")
-
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=20)) as client:
-                async with client.post(
-                    f"{GMAIL_API_BASE_URL}/users/me/messages/send",
-                    headers=headers,
-                    json={"raw": raw_message},
-                ) as response:
-                    payload = await response.json(content_type=None)
-                    if response.status >= 400:
-                        detail = payload.get("error", {}).get(
-                            "message", "Failed to send mail message"
-                        )
-                        raise HTTPException(
-                            status_code=status.HTTP_502_BAD_GATEWAY,
-                            detail=detail,
-                        )
+            raw_message = await mail_offloader.run(
+                encode_raw_message, to, cc, subject, body, size=len(body)
+            )
+
+            response = await gmail_scheduler.request(
+                user_id,
+                "messages.send",
+                "POST",
+                f"{GMAIL_API_BASE_URL}/users/me/messages/send",
+                headers=headers,
+                json={"raw": raw_message},
+            )
+            payload = response.json()
+            if response.status >= 400:
+                detail = payload.get("error", {}).get("message", "Failed to send mail message")
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=detail,
+                )
 
             message_id = payload.get("id")
             if not message_id:
@@ -429,6 +766,8 @@ class GmailMailService:
                     detail="Invalid Gmail send response",
                 )
 
+            if self.mirror_enabled:
+                self.sync_service.schedule_sync(user_id)
             return SendMailResponse(ok=True, id=message_id)
         except HTTPException as exc:
             print(f"Error in GmailMailService.send_message: {exc}")
@@ -440,9 +779,554 @@ class GmailMailService:
                 detail="Failed to send mail message",
             ) from exc
 
+    async def _resolve_list_page(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> MailListResponse:
+        """Serve a list page from the mirror, a finished prefetch, or live Gmail, in that order."""
+        mirror_page = await self._list_messages_from_mirror(user_id, mailbox, page_token, page_size)
+        if mirror_page is not None:
+            return mirror_page
+
+        page = await mail_page_prefetcher.take(user_id, mailbox, page_token, page_size)
+        if page is None:
+            page = await self._load_live_page(user_id, mailbox, page_token, page_size)
+        self._schedule_next_page_prefetch(user_id, mailbox, page, page_size)
+        return page
+
+    async def _search_live(
+        self,
+        user_id: str,
+        mailbox: str,
+        query: str,
+        page_size: int,
+        page_token: str | None,
+    ) -> MailListResponse:
+        """Run one live Gmail search page and hydrate its list items."""
+        access_token = await self.token_service.get_valid_access_token(user_id)
+        headers = {"Authorization": f"Bearer {access_token}"}
+
+        params: dict[str, str | int] = {
+            "maxResults": page_size,
+            "q": query,
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        params["labelIds"] = "SENT" if mailbox == "sent" else "INBOX"
+
+        response = await gmail_scheduler.request(
+            user_id,
+            "messages.list",
+            "GET",
+            f"{GMAIL_API_BASE_URL}/users/me/messages",
+            headers=headers,
+            params=params,
+        )
+        payload = response.json()
+        if response.status >= 400:
+            detail = payload.get("error", {}).get("message", "Failed to search Gmail messages")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=detail,
+            )
+
+        messages = payload.get("messages", [])
+        items = await self._fetch_list_items(user_id, headers, messages)
+
+        return MailListResponse(items=items, nextPageToken=payload.get("nextPageToken"))
+
+    async def _resolve_message_detail(
+        self,
+        user_id: str,
+        message_id: str,
+    ) -> tuple[MailDetailResponse, str]:
+        """Build the detail response from the cache, fetching or relabeling it as needed."""
+        cached = await mail_detail_cache.get(user_id, message_id)
+        if cached is None:
+            cached = await self._fetch_message_detail(user_id, message_id)
+        else:
+            entry, _ = cached
+            if not mail_detail_cache.is_label_state_fresh(entry):
+                unread = await self._fetch_unread_state(user_id, message_id)
+                mail_detail_cache.set_unread(user_id, message_id, unread)
+
+        entry, cached_body = cached
+        detail = self._to_detail_response(entry, cached_body)
+        return detail, mail_detail_cache.build_etag(entry, detail.date_label)
+
+    def _to_detail_response(
+        self, entry: CachedMailDetail, cached_body: CachedMailBody
+    ) -> MailDetailResponse:
+        """Render a cached detail entry in the detail panel's response shape."""
+        return MailDetailResponse(
+            id=entry.message_id,
+            sender=entry.sender,
+            to=entry.to,
+            subject=entry.subject,
+            snippet=entry.snippet,
+            body=cached_body.body,
+            htmlBody=cached_body.html_body,
+            attachments=[MailAttachment.model_validate(item) for item in entry.attachments],
+            dateLabel=self._format_date_label(entry.internal_date),
+            unread=entry.unread,
+        )
+
+    async def _list_messages_from_mirror(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> MailListResponse | None:
+        """Serve a page from the local mirror, or return None to fall back to live Gmail."""
+        try:
+            if not self.mirror_enabled:
+                return None
+            is_mirror_token = self.mirror_service.is_mirror_page_token(page_token)
+            if page_token and not is_mirror_token:
+                # Gmail-issued tokens continue past the mirrored window, so stay live.
+                return None
+
+            sync_state = await self.mirror_service.get_sync_state(user_id)
+            if (
+                sync_state is None
+                or sync_state.backfilled_at is None
+                or sync_state.last_synced_at is None
+            ):
+                self.sync_service.schedule_sync(user_id)
+                return None
+
+            sync_age = datetime.now(UTC) - sync_state.last_synced_at
+            if sync_age > self.mirror_refresh_after:
+                self.sync_service.schedule_sync(user_id)
+            if sync_age > self.mirror_stale_after and not is_mirror_token:
+                return None
+
+            rows, next_page_token = await self.mirror_service.read_page(
+                user_id, mailbox, page_token, page_size
+            )
+            if next_page_token is None:
+                # Hand over to live Gmail where the backfill window ended, if it was capped.
+                next_page_token = (sync_state.backfill_page_tokens or {}).get(mailbox)
+
+            return MailListResponse(
+                items=[self._mirror_row_to_list_item(row) for row in rows],
+                nextPageToken=next_page_token,
+            )
+        except Exception as exc:
+            print(f"Error in GmailMailService._list_messages_from_mirror: {exc}")
+            return None
+
+    def _mirror_row_to_list_item(self, row: MailMessage) -> MailListItem:
+        """Map a mirrored message row to list item shape."""
+        return MailListItem(
+            id=row.gmail_message_id,
+            sender=row.sender or "Unknown sender",
+            subject=row.subject or "(no subject)",
+            snippet=row.snippet or "",
+            dateLabel=self._format_date_label(str(row.internal_date)),
+            unread="UNREAD" in (row.label_ids or []),
+        )
+
+    async def _fetch_message_detail(
+        self, user_id: str, message_id: str
+    ) -> tuple[CachedMailDetail, CachedMailBody]:
+        """Fetch one full message and cache its decoded detail."""
+        access_token = await self.token_service.get_valid_access_token(user_id)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        params = {"format": "full", "fields": self.DETAIL_MESSAGE_FIELDS}
+
+        response = await gmail_scheduler.request(
+            user_id,
+            "messages.get",
+            "GET",
+            f"{GMAIL_API_BASE_URL}/users/me/messages/{message_id}",
+            headers=headers,
+            params=params,
+        )
+        payload = response.json()
+        if response.status >= 400:
+            detail = payload.get("error", {}).get("message", "Failed to fetch message detail")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=detail,
+            )
+        return await self._cache_detail_payload(user_id, headers, message_id, payload)
+
+    async def _cache_detail_payload(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        message_id: str,
+        payload: dict,
+    ) -> tuple[CachedMailDetail, CachedMailBody]:
+        """Index the MIME tree of a full message payload, decode its bodies, and cache it."""
+        header_map = self._extract_header_map(payload.get("payload", {}).get("headers", []))
+        part_index = build_mime_index(payload.get("payload", {}))
+        plain_body, html_body = await asyncio.gather(
+            self._read_part_text(user_id, headers, message_id, part_index.first_body("text/plain")),
+            self._read_part_text(user_id, headers, message_id, part_index.first_body("text/html")),
+        )
+        snippet = payload.get("snippet", "")
+        content = {
+            "sender": header_map.get("from", "Unknown sender"),
+            "to": header_map.get("to"),
+            "subject": header_map.get("subject", "(no subject)"),
+            "snippet": snippet,
+            "internalDate": payload.get("internalDate"),
+            "body": plain_body or snippet,
+            "htmlBody": html_body or None,
+            "attachments": self._attachment_summaries(part_index),
+        }
+        unread = "UNREAD" in (payload.get("labelIds") or [])
+        return await mail_detail_cache.put(user_id, message_id, content, unread)
+
+    async def _load_thread_page(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> MailThreadListResponse:
+        """List one page of thread ids and batch-hydrate their message headers."""
+        access_token = await self.token_service.get_valid_access_token(user_id)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        params: dict[str, str | int] = {
+            "maxResults": page_size,
+            "labelIds": "SENT" if mailbox == "sent" else "INBOX",
+            "fields": "threads/id,nextPageToken",
+        }
+        if page_token:
+            params["pageToken"] = page_token
+
+        response = await gmail_scheduler.request(
+            user_id,
+            "threads.list",
+            "GET",
+            f"{GMAIL_API_BASE_URL}/users/me/threads",
+            headers=headers,
+            params=params,
+        )
+        payload = response.json()
+        if response.status >= 400:
+            detail = payload.get("error", {}).get("message", "Failed to fetch Gmail threads")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=detail,
+            )
+
+        thread_ids = [thread["id"] for thread in payload.get("threads", []) if thread.get("id")]
+        thread_payloads = await self._fetch_resource_metadata(
+            user_id, headers, "threads", thread_ids, self.THREAD_METADATA_PARAMS
+        )
+        return MailThreadListResponse(
+            items=[
+                self._to_thread_list_item(thread_payload, thread_id)
+                for thread_payload, thread_id in zip(thread_payloads, thread_ids, strict=True)
+            ],
+            nextPageToken=payload.get("nextPageToken"),
+        )
+
+    async def _fetch_thread_detail(self, user_id: str, thread_id: str) -> MailThreadDetailResponse:
+        """Parse every message of one threads.get call and cache each as a message detail."""
+        access_token = await self.token_service.get_valid_access_token(user_id)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        response = await gmail_scheduler.request(
+            user_id,
+            "threads.get",
+            "GET",
+            f"{GMAIL_API_BASE_URL}/users/me/threads/{thread_id}",
+            headers=headers,
+            params={"format": "full", "fields": f"id,messages({self.DETAIL_MESSAGE_FIELDS})"},
+        )
+        payload = response.json()
+        if response.status >= 400:
+            detail = payload.get("error", {}).get("message", "Failed to fetch thread detail")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=detail,
+            )
+
+        message_payloads = [message for message in payload.get("messages", []) if message.get("id")]
+        # Cached per message, so opening one of them afterwards costs no Gmail call.
+        cached_messages = await asyncio.gather(
+            *(
+                self._cache_detail_payload(user_id, headers, message["id"], message)
+                for message in message_payloads
+            )
+        )
+        messages = [self._to_detail_response(entry, body) for entry, body in cached_messages]
+        return MailThreadDetailResponse(
+            id=payload.get("id", thread_id),
+            subject=messages[0].subject if messages else "(no subject)",
+            messages=messages,
+        )
+
+    def _to_thread_list_item(self, payload: dict, thread_id: str) -> MailThreadListItem:
+        """Summarize a thread metadata payload: first subject, latest sender and snippet."""
+        messages = payload.get("messages") or []
+        if not messages:
+            return MailThreadListItem(
+                id=payload.get("id", thread_id),
+                sender="Unknown sender",
+                subject="(no subject)",
+                snippet="",
+                dateLabel="",
+                unread=False,
+                messageCount=0,
+            )
+        first = self._to_list_item(messages[0], messages[0].get("id", ""))
+        latest = self._to_list_item(messages[-1], messages[-1].get("id", ""))
+        return MailThreadListItem(
+            id=payload.get("id", thread_id),
+            sender=latest.sender,
+            subject=first.subject,
+            snippet=latest.snippet,
+            dateLabel=latest.date_label,
+            unread=any("UNREAD" in (message.get("labelIds") or []) for message in messages),
+            messageCount=len(messages),
+            latestMessageId=latest.id,
+        )
+
+    async def _list_query_ids_page(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        query: str,
+        page_token: str | None,
+    ) -> dict:
+        """List one page of message ids matching a Gmail query, without hydrating them."""
+        params: dict[str, str | int] = {
+            "q": query,
+            "maxResults": self.BULK_QUERY_PAGE_SIZE,
+            "fields": "messages/id,nextPageToken",
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        response = await gmail_scheduler.request(
+            user_id,
+            "messages.list",
+            "GET",
+            f"{GMAIL_API_BASE_URL}/users/me/messages",
+            headers=headers,
+            params=params,
+        )
+        payload = response.json()
+        if response.status >= 400:
+            detail = payload.get("error", {}).get("message", "Failed to search Gmail messages")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=detail,
+            )
+        return payload
+
+    async def _batch_modify(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        message_ids: list[str],
+        add_label_ids: list[str],
+        remove_label_ids: list[str],
+    ) -> None:
+        """Apply one users.messages.batchModify call for up to 1000 ids."""
+        response = await gmail_scheduler.request(
+            user_id,
+            "messages.batchModify",
+            "POST",
+            f"{GMAIL_API_BASE_URL}/users/me/messages/batchModify",
+            headers=headers,
+            json={
+                "ids": message_ids,
+                "addLabelIds": add_label_ids,
+                "removeLabelIds": remove_label_ids,
+            },
+        )
+        if response.status >= 400:
+            detail = response.json().get("error", {}).get("message", "Failed to update messages")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=detail,
+            )
+
+    async def _read_part_text(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        message_id: str,
+        part: MimePart | None,
+    ) -> str | None:
+        """Decode a body part, fetching it on demand when Gmail did not inline the data."""
+        if part is None:
+            return None
+        if part.data:
+            return await mail_offloader.run(
+                decode_part_data, part.data, part.charset, size=len(part.data)
+            )
+        if not part.attachment_id:
+            return None
+        raw = await self._fetch_attachment_bytes(user_id, headers, message_id, part.attachment_id)
+        return await mail_offloader.run(decode_part_text, raw, part.charset, size=len(raw))
+
+    async def _fetch_attachment_bytes(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        message_id: str,
+        attachment_id: str,
+    ) -> bytes:
+        response = await gmail_scheduler.request(
+            user_id,
+            "messages.attachments.get",
+            "GET",
+            f"{GMAIL_API_BASE_URL}/users/me/messages/{message_id}/attachments/{attachment_id}",
+            headers=headers,
+            params={"fields": "data"},
+        )
+        if response.status >= 400:
+            detail = response.json().get("error", {}).get("message", "Failed to fetch attachment")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=detail,
+            )
+        # Attachment bodies can be megabytes of JSON-wrapped base64.
+        return await mail_offloader.run(
+            decode_attachment_response, response.body, size=len(response.body)
+        )
+
+    def _attachment_summaries(self, part_index: MimePartIndex) -> list[dict]:
+        """Describe downloadable attachments without fetching their bodies."""
+        return [
+            {
+                "attachmentId": part.attachment_id,
+                "partId": part.part_id,
+                "filename": part.filename,
+                "mimeType": part.mime_type,
+                "size": part.size,
+            }
+            for part in part_index.attachments
+            if part.attachment_id
+        ]
+
+    async def _fetch_unread_state(self, user_id: str, message_id: str) -> bool:
+        """Re-read only the label ids of a cached message to refresh its unread flag."""
+        access_token = await self.token_service.get_valid_access_token(user_id)
+        response = await gmail_scheduler.request(
+            user_id,
+            "messages.get",
+            "GET",
+            f"{GMAIL_API_BASE_URL}/users/me/messages/{message_id}",
+            headers={"Authorization": f"Bearer {access_token}"},
+            params={"format": "minimal", "fields": "labelIds"},
+        )
+        payload = response.json()
+        if response.status >= 400:
+            detail = payload.get("error", {}).get("message", "Failed to fetch message labels")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=detail,
+            )
+        return "UNREAD" in (payload.get("labelIds") or [])
+
+    async def _load_live_page(
+        self,
+        user_id: str,
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> MailListResponse:
+        """List one Gmail page and hydrate its items."""
+        access_token = await self.token_service.get_valid_access_token(user_id)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        payload = await self._fetch_mailbox_page(user_id, headers, mailbox, page_token, page_size)
+        items = await self._fetch_list_items(user_id, headers, payload.get("messages", []))
+        return MailListResponse(items=items, nextPageToken=payload.get("nextPageToken"))
+
+    def _schedule_next_page_prefetch(
+        self, user_id: str, mailbox: str, page: MailListResponse, page_size: int
+    ) -> None:
+        """Speculatively warm the page after `page` while the user reads this one."""
+        next_page_token = page.next_page_token
+        # Mirror tokens are served from Postgres and are cheap enough not to prefetch.
+        if not next_page_token or self.mirror_service.is_mirror_page_token(next_page_token):
+            return
+        mail_page_prefetcher.schedule(
+            user_id,
+            mailbox,
+            next_page_token,
+            page_size,
+            lambda: self._load_live_page(user_id, mailbox, next_page_token, page_size),
+        )
+
+    async def _fetch_mailbox_page(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        mailbox: str,
+        page_token: str | None,
+        page_size: int,
+    ) -> dict:
+        """Fetch one page of message ids for the inbox or sent label."""
+        params: dict[str, str | int] = {"maxResults": page_size}
+        if page_token:
+            params["pageToken"] = page_token
+        params["labelIds"] = "SENT" if mailbox == "sent" else "INBOX"
+
+        response = await gmail_scheduler.request(
+            user_id,
+            "messages.list",
+            "GET",
+            f"{GMAIL_API_BASE_URL}/users/me/messages",
+            headers=headers,
+            params=params,
+        )
+        payload = response.json()
+        if response.status >= 400:
+            detail = payload.get("error", {}).get("message", "Failed to fetch Gmail messages")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=detail,
+            )
+        return payload
+
+    async def _iter_list_items(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        message_ids: list[str],
+    ) -> AsyncIterator[tuple[int, str, MailListItem | None]]:
+        """Hydrate ids concurrently and yield each result in completion order."""
+        if not message_ids:
+            return
+
+        async def fetch_item(index: int, message_id: str) -> tuple[int, str, MailListItem | None]:
+            try:
+                payload = await self._fetch_single_metadata(
+                    user_id, headers, message_id, self.LIST_METADATA_PARAMS
+                )
+                return index, message_id, self._to_list_item(payload, message_id)
+            except HTTPException:
+                return index, message_id, None
+
+        # Concurrency is bounded by the user's shared Gmail scheduler, not per call.
+        tasks = [
+            asyncio.create_task(fetch_item(index, message_id))
+            for index, message_id in enumerate(message_ids)
+        ]
+        try:
+            for next_completed in asyncio.as_completed(tasks):
+                yield await next_completed
+        finally:
+            # The client may disconnect mid-stream; don't leave hydration calls running.
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
     async def _fetch_list_items(
         self,
-        client: aiohttp.ClientSession,
+        user_id: str,
         headers: dict[str, str],
         messages: list[dict],
     ) -> list[MailListItem]:
@@ -452,146 +1336,271 @@ class GmailMailService:
             if not message_ids:
                 return []
 
-            concurrency = min(self.LIST_FETCH_CONCURRENCY, len(message_ids))
-            semaphore = asyncio.Semaphore(concurrency)
+            payloads = await self.fetch_message_metadata(user_id, headers, message_ids)
+            return [
+                self._to_list_item(payload, message_id)
+                for payload, message_id in zip(payloads, message_ids, strict=True)
+            ]
+        except Exception as exc:
+            print(f"Error in GmailMailService._fetch_list_items: {exc}")
+            raise
+
+    async def fetch_message_metadata(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        message_ids: list[str],
+        params: dict[str, str | list[str]] | None = None,
+        skip_missing: bool = False,
+    ) -> list[dict]:
+        """Fetch raw metadata payloads for message ids in order, batching when enabled.
+
+        With ``skip_missing`` a message that cannot be fetched yields an empty dict instead
+        of failing the whole call, which suits sync jobs racing against deletions. Rate limits
+        still raise a 429 either way.
+        """
+        try:
+            return await self._fetch_resource_metadata(
+                user_id,
+                headers,
+                "messages",
+                message_ids,
+                params or self.LIST_METADATA_PARAMS,
+                skip_missing,
+            )
+        except Exception as exc:
+            print(f"Error in GmailMailService.fetch_message_metadata: {exc}")
+            raise
 
-            async def fetch_with_limit(index: int, message_id: str) -> tuple[int, MailListItem]:
-                async with semaphore:
-                    item = await self._fetch_single_list_item(client, headers, message_id)
-                    return index, item
+    async def _fetch_resource_metadata(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        resource: str,
+        resource_ids: list[str],
+        params: dict[str, str | list[str]],
+        skip_missing: bool = False,
+    ) -> list[dict]:
+        """Fetch message or thread payloads in order, batching when enabled."""
+        if not resource_ids:
+            return []
+        if not self.batch_hydration_enabled:
+            return await self._fetch_metadata_individually(
+                user_id, headers, resource_ids, params, skip_missing, resource
+            )
+
+        resolved: dict[int, dict] = {}
+        for offset in range(0, len(resource_ids), self.LIST_BATCH_SIZE):
+            chunk_ids = resource_ids[offset : offset + self.LIST_BATCH_SIZE]
+            chunk_payloads, not_found_indexes = await self._fetch_metadata_batch(
+                user_id, headers, chunk_ids, params, resource
+            )
+            for index, payload in chunk_payloads.items():
+                resolved[offset + index] = payload
+            if skip_missing:
+                for index in not_found_indexes:
+                    resolved[offset + index] = {}
+
+        missing_indexes = [index for index in range(len(resource_ids)) if index not in resolved]
+        if len(missing_indexes) > self.batch_fallback_max_ids:
+            # A batch that failed as a whole would otherwise turn into one GET per id.
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Failed to fetch {len(missing_indexes)} Gmail {resource} in batch",
+            )
+        if missing_indexes:
+            fallback_payloads = await self._fetch_metadata_individually(
+                user_id,
+                headers,
+                [resource_ids[index] for index in missing_indexes],
+                params,
+                skip_missing,
+                resource,
+            )
+            for index, payload in zip(missing_indexes, fallback_payloads, strict=True):
+                resolved[index] = payload
+
+        return [resolved[index] for index in range(len(resource_ids))]
+
+    async def _fetch_metadata_batch(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        resource_ids: list[str],
+        params: dict[str, str | list[str]],
+        resource: str = "messages",
+    ) -> tuple[dict[int, dict], set[int]]:
+        """Hydrate up to LIST_BATCH_SIZE ids in one multipart call.
+
+        Returns the payloads that came back by index, and the indexes Gmail answered with a
+        404. Other failed parts are left out for the caller to retry one by one; a rate limit
+        on the batch or any of its parts raises a 429 instead.
+        """
+        try:
+            boundary, body = build_batch_request(
+                urlsplit(GMAIL_API_BASE_URL).path,
+                resource_ids,
+                params,
+                resource,
+            )
+            batch_headers = {
+                "Authorization": headers["Authorization"],
+                "Content-Type": f"multipart/mixed; boundary={boundary}",
+            }
+            # Gmail charges each sub-request of a batch separately.
+            operation = f"{resource}.get"
+            response = await gmail_scheduler.request(
+                user_id,
+                operation,
+                "POST",
+                GMAIL_BATCH_URL,
+                cost=GMAIL_QUOTA_COSTS[operation] * len(resource_ids),
+                headers=batch_headers,
+                data=body,
+            )
+            # The scheduler has already retried and recorded a rate-limited batch response.
+            if gmail_scheduler.is_rate_limited(response):
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Gmail rate limit reached; retry later",
+                )
+            if response.status >= 400:
+                print(
+                    "Error in GmailMailService._fetch_metadata_batch: "
+                    f"batch request failed with status {response.status}"
+                )
+                return {}, set()
+            parts = parse_batch_response(response.body, response.headers.get("Content-Type", ""))
+
+            if any(
+                gmail_scheduler.is_rate_limited_error(part_status, payload)
+                for part_status, payload in parts.values()
+            ):
+                gmail_scheduler.record_rate_limited(user_id)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Gmail rate limit reached; retry later",
+                )
+            payloads = {
+                index: payload
+                for index, (part_status, payload) in parts.items()
+                if index < len(resource_ids) and part_status < 400
+            }
+            not_found_indexes = {
+                index
+                for index, (part_status, _) in parts.items()
+                if index < len(resource_ids) and part_status == status.HTTP_404_NOT_FOUND
+            }
+            return payloads, not_found_indexes
+        except HTTPException as exc:
+            print(f"Error in GmailMailService._fetch_metadata_batch: {exc}")
+            raise
+        except Exception as exc:
+            print(f"Error in GmailMailService._fetch_metadata_batch: {exc}")
+            return {}, set()
+
+    async def _fetch_metadata_individually(
+        self,
+        user_id: str,
+        headers: dict[str, str],
+        resource_ids: list[str],
+        params: dict[str, str | list[str]],
+        skip_missing: bool = False,
+        resource: str = "messages",
+    ) -> list[dict]:
+        """Fetch metadata with one GET per id through the user's Gmail scheduler."""
+        try:
+
+            async def fetch_payload(resource_id: str) -> dict:
+                try:
+                    return await self._fetch_single_metadata(
+                        user_id, headers, resource_id, params, resource
+                    )
+                except HTTPException as exc:
+                    if not skip_missing or exc.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                        raise
+                    return {}
 
             tasks = [
-                fetch_with_limit(index, message_id)
-                for index, message_id in enumerate(message_ids)
+                asyncio.create_task(fetch_payload(resource_id)) for resource_id in resource_ids
             ]
-            indexed_items = await asyncio.gather(*tasks)
-            indexed_items.sort(key=lambda item: item[0])
-            return [item for _, item in indexed_items]
+            try:
+                return list(await asyncio.gather(*tasks))
+            finally:
+                # The first failure fails the call; don't keep spending quota on the rest.
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
         except Exception as exc:
-            print(f"Error in GmailMailService._fetch_list_items: {exc}")
+            print(f"Error in GmailMailService._fetch_metadata_individually: {exc}")
             raise
 
-    async def _fetch_single_list_item(
+    async def _fetch_single_metadata(
         self,
-        client: aiohttp.ClientSession,
+        user_id: str,
         headers: dict[str, str],
-        message_id: str,
-    ) -> MailListItem:
-        """Fetch metadata for one message id and map it to list item shape."""
+        resource_id: str,
+        params: dict[str, str | list[str]],
+        resource: str = "messages",
+    ) -> dict:
+        """Fetch the metadata payload for one message (or thread) id."""
         try:
-            params = {
-                "format": "metadata",
-                "metadataHeaders": ["From", "Subject", "Date"],
-                "fields": "id,snippet,labelIds,internalDate,payload/headers",
-            }
-            async with client.get(
-                f"{GMAIL_API_BASE_URL}/users/me/messages/{message_id}",
+            response = await gmail_scheduler.request(
+                user_id,
+                f"{resource}.get",
+                "GET",
+                f"{GMAIL_API_BASE_URL}/users/me/{resource}/{resource_id}",
                 headers=headers,
                 params=params,
-            ) as response:
-                payload = await response.json(content_type=None)
-                if response.status >= 400:
-                    detail = payload.get("error", {}).get(
-                        "message", "Failed to fetch message summary"
-                    )
-                    raise HTTPException(
-                        status_code=status.HTTP_502_BAD_GATEWAY,
-                        detail=detail,
-                    )
-
-            headers_map = self._extract_header_map(payload.get("payload", {}).get("headers", []))
-            return MailListItem(
-                id=payload.get("id", message_id),
-                sender=headers_map.get("from", "Unknown sender"),
-                subject=headers_map.get("subject", "(no subject)"),
-                snippet=payload.get("snippet", ""),
-                dateLabel=self._format_date_label(payload.get("internalDate")),
-                unread="UNREAD" in (payload.get("labelIds") or []),
             )
+            payload = response.json()
+            if gmail_scheduler.is_rate_limited(response):
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Gmail rate limit reached; retry later",
+                )
+            if response.status >= 400:
+                detail = payload.get("error", {}).get("message", "Failed to fetch message summary")
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=detail,
+                )
+            return payload
         except HTTPException as exc:
-            print(f"Error in GmailMailService._fetch_single_list_item: {exc}")
+            print(f"Error in GmailMailService._fetch_single_metadata: {exc}")
             raise
         except Exception as exc:
-            print(f"Error in GmailMailService._fetch_single_list_item: {exc}")
+            print(f"Error in GmailMailService._fetch_single_metadata: {exc}")
             raise
 
+    def _to_list_item(self, payload: dict, message_id: str) -> MailListItem:
+        """Map a Gmail metadata payload to list item shape."""
+        headers_map = self._extract_header_map(payload.get("payload", {}).get("headers", []))
+        return MailListItem(
+            id=payload.get("id", message_id),
+            sender=headers_map.get("from", "Unknown sender"),
+            subject=headers_map.get("subject", "(no subject)"),
+            snippet=payload.get("snippet", ""),
+            dateLabel=self._format_date_label(payload.get("internalDate")),
+            unread="UNREAD" in (payload.get("labelIds") or []),
+        )
+
     def _extract_header_map(self, headers: list[dict]) -> dict[str, str]:
         """Convert Gmail header array into case-insensitive lookup map."""
         return {
             str(header.get("name", "")).lower(): str(header.get("value", "")) for header in headers
         }
 
-    def _html_to_text(self, html_content: str) -> str:
+    async def _html_to_text(self, html_content: str, max_chars: int | None = None) -> str:
         """Convert HTML mail body into readable plain text for AI summarization prompts."""
         try:
-            if not html_content:
-                return ""
-            without_style = re.sub(
-                r"<(script|style)[^>]*>.*?</\1>",
-                " ",
-                html_content,
-                flags=re.IGNORECASE | re.DOTALL,
-            )
-            with_line_breaks = re.sub(r"</(p|div|li|h1|h2|h3|h4|h5|h6|br)>", "\n", without_style)
-            without_tags = re.sub(r"<[^>]+>", " ", with_line_breaks)
-            unescaped = html.unescape(without_tags)
-            collapsed = re.sub(r"[ \t]+", " ", unescaped)
-            normalized = re.sub(r"\n{3,}", "\n\n", collapsed)
-            return normalized.strip()
+            return await mail_offloader.run(
+                html_to_text, html_content, max_chars, size=len(html_content)
+            )
         except Exception as exc:
             print(f"Error in GmailMailService._html_to_text: {exc}")
             return ""
 
-    def _extract_plain_text_body(self, payload: dict) -> str:
-        """Decode the first text/plain body part from a Gmail payload tree."""
-        try:
-            data = self._find_body_data_by_mime(payload, "text/plain")
-            if not data:
-                return ""
-            return self._decode_base64_urlsafe(data)
-        except Exception as exc:
-            print(f"Error in GmailMailService._extract_plain_text_body: {exc}")
-            return ""
-
-    def _extract_html_body(self, payload: dict) -> str | None:
-        """Decode the first text/html body part from a Gmail payload tree."""
-        try:
-            data = self._find_body_data_by_mime(payload, "text/html")
-            if not data:
-                return None
-            decoded = self._decode_base64_urlsafe(data)
-            return decoded or None
-        except Exception as exc:
-            print(f"Error in GmailMailService._extract_html_body: {exc}")
-            return None
-
-    def _find_body_data_by_mime(self, payload: dict, mime_type: str) -> str | None:
-        """Recursively search a Gmail payload for a specific mime body data block."""
-        try:
-            if payload.get("mimeType") == mime_type:
-                data = payload.get("body", {}).get("data")
-                if data:
-                    return data
-
-            for part in payload.get("parts", []) or []:
-                data = self._find_body_data_by_mime(part, mime_type)
-                if data:
-                    return data
-            return None
-        except Exception as exc:
-            print(f"Error in GmailMailService._find_body_data_by_mime: {exc}")
-            return None
-
-    def _decode_base64_urlsafe(self, value: str) -> str:
-        """Decode urlsafe base64 Gmail body content into utf-8 text."""
-        try:
-            padding = "=" * (-len(value) % 4)
-            decoded = base64.urlsafe_b64decode(value + padding)
-            return decoded.decode("utf-8", errors="replace")
-        except Exception as exc:
-            print(f"Error in GmailMailService._decode_base64_urlsafe: {exc}")
-            return ""
-
     def _format_date_label(self, internal_date: str | None) -> str:
         """Create compact date labels for list and detail rendering."""
         try:
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import TYPE_CHECKING
+
+from fastapi import HTTPException, status
+
+from app.mail.mirror import MAILBOX_LABELS, MailMirrorService
+from app.mail.scheduler import gmail_scheduler
+from app.utils.constants import GMAIL_API_BASE_URL
+
+if TYPE_CHECKING:
+    from app.mail.service import GmailMailService
+
+_sync_tasks: dict[str, asyncio.Task] = {}
+
+
+class GmailMailboxSyncService:
+    """Keep the local mailbox mirror current via one backfill then Gmail history deltas."""
+
+    MIRROR_METADATA_PARAMS: dict[str, str | list[str]] = {
+        "format": "metadata",
+        "metadataHeaders": ["From", "To", "Subject", "Date"],
+        "fields": "id,threadId,labelIds,snippet,internalDate,historyId,payload/headers",
+    }
+    BODY_INDEX_PARAMS: dict[str, str | list[str]] = {
+        "format": "full",
+        "fields": "id,snippet,payload/mimeType,payload/headers,payload/body,payload/parts",
+    }
+    HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+
+    def __init__(self, mail_service: GmailMailService, mirror_service: MailMirrorService):
+        self.mail_service = mail_service
+        self.mirror_service = mirror_service
+        self.backfill_limit = int(os.getenv("MAIL_MIRROR_BACKFILL_LIMIT", "500"))
+        self.list_page_size = 100
+        self.body_index_enabled = os.getenv("MAIL_INDEX_BODIES", "true").lower() == "true"
+        self.body_index_batch_size = int(os.getenv("MAIL_INDEX_BODY_BATCH_SIZE", "50"))
+        self.body_index_max_chars = int(os.getenv("MAIL_INDEX_BODY_MAX_CHARS", "20000"))
+
+    def schedule_sync(self, user_id: str) -> None:
+        """Start a background sync for the user unless one is already running."""
+        try:
+            existing_task = _sync_tasks.get(user_id)
+            if existing_task is not None and not existing_task.done():
+                return
+            task = asyncio.create_task(self.sync_user(user_id))
+            _sync_tasks[user_id] = task
+            task.add_done_callback(lambda _: _sync_tasks.pop(user_id, None))
+        except Exception as exc:
+            print(f"Error in GmailMailboxSyncService.schedule_sync: {exc}")
+
+    async def sync_user(self, user_id: str) -> None:
+        """Run an incremental history sync, falling back to a full backfill when needed."""
+        try:
+            sync_state = await self.mirror_service.get_sync_state(user_id)
+            if sync_state is None or not sync_state.history_id or sync_state.backfilled_at is None:
+                await self.backfill(user_id)
+            else:
+                synced = await self.sync_history(user_id, sync_state.history_id)
+                if not synced:
+                    await self.backfill(user_id)
+
+            if self.body_index_enabled:
+                await self.index_bodies(user_id)
+        except Exception as exc:
+            print(f"Error in GmailMailboxSyncService.sync_user: {exc}")
+
+    async def backfill(self, user_id: str) -> None:
+        """Mirror the newest inbox and sent messages and record the starting history id.
+
+        Also the recovery path when the stored history id has expired, so mirrored rows the
+        fresh listing no longer contains (deleted or moved meanwhile) are removed afterwards.
+        """
+        try:
+            access_token = await self.mail_service.token_service.get_valid_access_token(user_id)
+            headers = {"Authorization": f"Bearer {access_token}"}
+
+            # Capture the history id before listing so changes made mid-backfill are replayed.
+            profile = await self._get_json(
+                user_id,
+                "users.getProfile",
+                f"{GMAIL_API_BASE_URL}/users/me/profile",
+                headers,
+                {},
+                "Failed to load Gmail profile",
+            )
+            start_history_id = str(profile.get("historyId") or "")
+
+            backfill_page_tokens: dict[str, str | None] = {}
+            listed_ids: set[str] = set()
+            # Per label, the oldest internal date the listing covers; None when it is complete.
+            covered_since: dict[str, int | None] = {}
+            for mailbox, label_id in MAILBOX_LABELS.items():
+                message_ids: list[str] = []
+                page_token: str | None = None
+                while len(message_ids) < self.backfill_limit:
+                    params: dict[str, str | int] = {
+                        "maxResults": min(
+                            self.list_page_size, self.backfill_limit - len(message_ids)
+                        ),
+                        "labelIds": label_id,
+                    }
+                    if page_token:
+                        params["pageToken"] = page_token
+                    payload = await self._get_json(
+                        user_id,
+                        "messages.list",
+                        f"{GMAIL_API_BASE_URL}/users/me/messages",
+                        headers,
+                        params,
+                        "Failed to list Gmail messages for backfill",
+                    )
+                    message_ids.extend(
+                        message["id"]
+                        for message in payload.get("messages", [])
+                        if message.get("id")
+                    )
+                    page_token = payload.get("nextPageToken")
+                    if not page_token:
+                        break
+
+                metadata_payloads = await self.mail_service.fetch_message_metadata(
+                    user_id, headers, message_ids, self.MIRROR_METADATA_PARAMS, skip_missing=True
+                )
+                await self.mirror_service.upsert_messages(user_id, metadata_payloads)
+                backfill_page_tokens[mailbox] = page_token
+                listed_ids.update(message_ids)
+                if page_token is None:
+                    covered_since[label_id] = None
+                else:
+                    internal_dates = [
+                        int(payload["internalDate"])
+                        for payload in metadata_payloads
+                        if str(payload.get("internalDate") or "").isdigit()
+                    ]
+                    if internal_dates:
+                        covered_since[label_id] = min(internal_dates)
+
+            # Reconcile after every mailbox is upserted, so a message that moved between them
+            # already carries its fresh labels and is kept.
+            for label_id, oldest_internal_date in covered_since.items():
+                await self.mirror_service.delete_unlisted_messages(
+                    user_id, label_id, listed_ids, oldest_internal_date
+                )
+
+            await self.mirror_service.save_sync_state(
+                user_id,
+                start_history_id or None,
+                backfill_page_tokens=backfill_page_tokens,
+                backfilled=True,
+            )
+        except Exception as exc:
+            print(f"Error in GmailMailboxSyncService.backfill: {exc}")
+            raise
+
+    async def sync_history(self, user_id: str, start_history_id: str) -> bool:
+        """Apply Gmail history since the stored cursor; return False if a backfill is needed."""
+        try:
+            access_token = await self.mail_service.token_service.get_valid_access_token(user_id)
+            headers = {"Authorization": f"Bearer {access_token}"}
+
+            changed_ids: set[str] = set()
+            deleted_ids: set[str] = set()
+            latest_history_id = start_history_id
+            page_token: str | None = None
+            while True:
+                params: dict[str, str | list[str]] = {
+                    "startHistoryId": start_history_id,
+                    "historyTypes": self.HISTORY_TYPES,
+                }
+                if page_token:
+                    params["pageToken"] = page_token
+                response = await gmail_scheduler.request(
+                    user_id,
+                    "history.list",
+                    "GET",
+                    f"{GMAIL_API_BASE_URL}/users/me/history",
+                    headers=headers,
+                    params=params,
+                )
+                payload = response.json()
+                if response.status == status.HTTP_404_NOT_FOUND:
+                    # The stored history id is too old for Gmail to replay.
+                    return False
+                if response.status >= 400:
+                    detail = payload.get("error", {}).get("message", "Failed to load Gmail history")
+                    raise HTTPException(
+                        status_code=status.HTTP_502_BAD_GATEWAY,
+                        detail=detail,
+                    )
+
+                for record in payload.get("history", []) or []:
+                    for entry in record.get("messagesDeleted", []) or []:
+                        message_id = entry.get("message", {}).get("id")
+                        if message_id:
+                            deleted_ids.add(message_id)
+                    for key in ("messagesAdded", "labelsAdded", "labelsRemoved"):
+                        for entry in record.get(key, []) or []:
+                            message_id = entry.get("message", {}).get("id")
+                            if message_id:
+                                changed_ids.add(message_id)
+
+                latest_history_id = str(payload.get("historyId") or latest_history_id)
+                page_token = payload.get("nextPageToken")
+                if not page_token:
+                    break
+
+            changed_ids -= deleted_ids
+            if changed_ids:
+                metadata_payloads = await self.mail_service.fetch_message_metadata(
+                    user_id,
+                    headers,
+                    sorted(changed_ids),
+                    self.MIRROR_METADATA_PARAMS,
+                    skip_missing=True,
+                )
+                await self.mirror_service.upsert_messages(user_id, metadata_payloads)
+            await self.mirror_service.delete_messages(user_id, sorted(deleted_ids))
+            await self.mirror_service.save_sync_state(user_id, latest_history_id)
+            return True
+        except Exception as exc:
+            print(f"Error in GmailMailboxSyncService.sync_history: {exc}")
+            raise
+
+    async def index_bodies(self, user_id: str) -> int:
+        """Extract body text for the next slice of unindexed mirrored messages."""
+        try:
+            message_ids = await self.mirror_service.list_unindexed_message_ids(
+                user_id, self.body_index_batch_size
+            )
+            if not message_ids:
+                return 0
+
+            access_token = await self.mail_service.token_service.get_valid_access_token(user_id)
+            headers = {"Authorization": f"Bearer {access_token}"}
+            full_payloads = await self.mail_service.fetch_message_metadata(
+                user_id,
+                headers,
+                message_ids,
+                self.BODY_INDEX_PARAMS,
+                skip_missing=True,
+            )
+
+            body_texts: dict[str, str] = {}
+            for message_id, payload in zip(message_ids, full_payloads, strict=True):
+                # A message that could not be fetched stays unindexed, so a throttled or failed
+                # call is retried on a later slice instead of indexing it as empty. Messages
+                # deleted in Gmail leave the mirror through history sync.
+                if not payload.get("id"):
+                    continue
+                body_text = await self.mail_service.extract_payload_text(
+                    payload.get("payload", {}), self.body_index_max_chars
+                )
+                body_texts[message_id] = (body_text or "")[: self.body_index_max_chars]
+
+            await self.mirror_service.save_body_texts(user_id, body_texts)
+            return len(body_texts)
+        except Exception as exc:
+            print(f"Error in GmailMailboxSyncService.index_bodies: {exc}")
+            return 0
+
+    async def _get_json(
+        self,
+        user_id: str,
+        operation: str,
+        url: str,
+        headers: dict[str, str],
+        params: dict,
+        error_detail: str,
+    ) -> dict:
+        """Issue one Gmail GET through the user's scheduler and raise 502 on API errors."""
+        response = await gmail_scheduler.request(
+            user_id, operation, "GET", url, headers=headers, params=params
+        )
+        payload = response.json()
+        if response.status >= 400:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=payload.get("error", {}).get("message", error_detail),
+            )
+        return payload
+
+
+async def cancel_mailbox_syncs() -> None:
+    """Cancel in-flight background syncs during application shutdown."""
+    tasks = [task for task in _sync_tasks.values() if not task.done()]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    _sync_tasks.clear()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from app.mail.coalesce import MailRequestCoalescer
+from app.utils.stats import percentile
+
+
+@dataclass(frozen=True)
+class CachedAccessToken:
+    access_token: str
+    expires_at: datetime | None
+
+
+class AccessTokenCache:
+    """Process-wide Google access-token cache with one in-flight load per user."""
+
+    def __init__(self):
+        self.refresh_margin = timedelta(
+            seconds=int(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS", "60"))
+        )
+        self._tokens: dict[str, CachedAccessToken] = {}
+        self._loads = MailRequestCoalescer()
+        self._refresh_latencies_ms: deque[float] = deque(maxlen=256)
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+        }
+
+    def get(self, user_id: str) -> str | None:
+        """Return a cached token that stays valid beyond the refresh margin."""
+        cached = self._tokens.get(user_id)
+        if cached is not None and self._is_fresh(cached):
+            self._counters["hits"] += 1
+            return cached.access_token
+        self._counters["misses"] += 1
+        return None
+
+    def put(self, user_id: str, access_token: str, expires_at: datetime | None) -> None:
+        self._tokens[user_id] = CachedAccessToken(access_token, expires_at)
+
+    def invalidate(self, user_id: str) -> None:
+        self._tokens.pop(user_id, None)
+
+    async def load_once(self, user_id: str, loader: Callable[[], Awaitable[str]]) -> str:
+        """Run `loader` for the user unless a load is already in flight, then share its result."""
+        return await self._loads.run("access_token", user_id, loader)
+
+    def record_refresh(self, latency_ms: float, succeeded: bool) -> None:
+        """Record one call to Google's token endpoint."""
+        self._counters["refreshes"] += 1
+        if not succeeded:
+            self._counters["refresh_failures"] += 1
+        self._refresh_latencies_ms.append(latency_ms)
+
+    def get_stats(self) -> dict:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        latencies = sorted(self._refresh_latencies_ms)
+        load_stats = self._loads.get_stats()
+        return {
+            "entries": len(self._tokens),
+            "inFlight": load_stats["inFlight"],
+            "hits": self._counters["hits"],
+            "misses": self._counters["misses"],
+            "coalesced": load_stats["coalesced"],
+            "hitRate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            "refreshes": self._counters["refreshes"],
+            "refreshFailures": self._counters["refresh_failures"],
+            "refreshLatencyMs": {
+                "last": round(self._refresh_latencies_ms[-1], 2) if latencies else None,
+                "p50": round(percentile(latencies, 0.50), 2) if latencies else None,
+                "p95": round(percentile(latencies, 0.95), 2) if latencies else None,
+                "max": round(latencies[-1], 2) if latencies else None,
+            },
+        }
+
+    def _is_fresh(self, cached: CachedAccessToken) -> bool:
+        if cached.expires_at is None:
+            return True
+        return cached.expires_at > datetime.now(UTC) + self.refresh_margin
+
+
+access_token_cache = AccessTokenCache()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+
+from app.config.db import get_session_maker
+from app.mail.service import GmailTokenService
+from app.models import OauthAccount
+from app.utils.constants import PROVIDER_NAME
+
+
+@dataclass
+class _RefreshFailure:
+    """Backoff state for one account whose proactive refresh failed."""
+
+    count: int
+    retry_at: float
+    # The failure holds until the stored expiry changes, i.e. a login or another refresh.
+    expires_at: datetime | None
+    unrecoverable: bool
+
+
+class GmailTokenRefresher:
+    """Refresh Google tokens for recently active users before requests hit the expiry window.
+
+    A failed refresh backs off exponentially per account. An account whose grant Google
+    rejects (for example ``invalid_grant``) is not retried until its stored token changes, as
+    it does on the next interactive login.
+    """
+
+    def __init__(self):
+        self.interval_seconds = float(os.getenv("TOKEN_REFRESHER_INTERVAL_SECONDS", "30"))
+        self.active_window_seconds = float(os.getenv("TOKEN_REFRESHER_ACTIVE_SECONDS", "900"))
+        self.lead_time = timedelta(seconds=int(os.getenv("TOKEN_REFRESHER_LEAD_SECONDS", "300")))
+        self.jitter_seconds = float(os.getenv("TOKEN_REFRESHER_JITTER_SECONDS", "60"))
+        self.concurrency = int(os.getenv("TOKEN_REFRESHER_CONCURRENCY", "4"))
+        self.backoff_max_seconds = float(os.getenv("TOKEN_REFRESHER_BACKOFF_MAX_SECONDS", "3600"))
+        self.token_service = GmailTokenService()
+        self._last_seen: dict[str, float] = {}
+        self._pending: dict[str, asyncio.Task] = {}
+        self._failures: dict[str, _RefreshFailure] = {}
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._loop_task: asyncio.Task | None = None
+        self._counters = {
+            "scans": 0,
+            "scheduled": 0,
+            "refreshed": 0,
+            "failures": 0,
+            "backed_off": 0,
+        }
+
+    def mark_active(self, user_id: str) -> None:
+        """Record user activity; only recently seen users get proactive refreshes."""
+        self._last_seen[str(user_id)] = time.monotonic()
+
+    def start(self) -> None:
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._loop_task, *self._pending.values()) if task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        self._pending.clear()
+
+    async def scan(self) -> int:
+        """Schedule refreshes for active users whose tokens expire within the lead time."""
+        try:
+            self._counters["scans"] += 1
+            active_cutoff = time.monotonic() - self.active_window_seconds
+            for user_id, seen_at in list(self._last_seen.items()):
+                if seen_at < active_cutoff:
+                    del self._last_seen[user_id]
+                    self._failures.pop(user_id, None)
+
+            candidate_ids = [
+                uuid.UUID(user_id) for user_id in self._last_seen if user_id not in self._pending
+            ]
+            if not candidate_ids:
+                return 0
+
+            session_maker = get_session_maker()
+            async with session_maker() as session:
+                accounts = list(
+                    await session.scalars(
+                        select(OauthAccount).where(
+                            OauthAccount.user_id.in_(candidate_ids),
+                            OauthAccount.provider == PROVIDER_NAME,
+                            OauthAccount.refresh_token.is_not(None),
+                            OauthAccount.expires_at <= datetime.now(UTC) + self.lead_time,
+                        )
+                    )
+                )
+
+            accounts = [account for account in accounts if not self._is_backing_off(account)]
+            for account in accounts:
+                user_id = str(account.user_id)
+                task = asyncio.create_task(self._refresh_after_jitter(account))
+                self._pending[user_id] = task
+                task.add_done_callback(lambda _, user_id=user_id: self._pending.pop(user_id, None))
+            self._counters["scheduled"] += len(accounts)
+            return len(accounts)
+        except Exception as exc:
+            print(f"Error in GmailTokenRefresher.scan: {exc}")
+            return 0
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self._loop_task is not None and not self._loop_task.done(),
+            "activeUsers": len(self._last_seen),
+            "pending": len(self._pending),
+            "scans": self._counters["scans"],
+            "scheduled": self._counters["scheduled"],
+            "refreshed": self._counters["refreshed"],
+            "failures": self._counters["failures"],
+            "backedOff": self._counters["backed_off"],
+            "backingOffAccounts": sum(
+                1 for failure in self._failures.values() if not failure.unrecoverable
+            ),
+            "unrecoverableAccounts": sum(
+                1 for failure in self._failures.values() if failure.unrecoverable
+            ),
+        }
+
+    def _is_backing_off(self, account: OauthAccount) -> bool:
+        user_id = str(account.user_id)
+        failure = self._failures.get(user_id)
+        if failure is None:
+            return False
+        if account.expires_at != failure.expires_at:
+            # The user signed in again or another worker refreshed; start over.
+            del self._failures[user_id]
+            return False
+        if failure.unrecoverable or time.monotonic() < failure.retry_at:
+            self._counters["backed_off"] += 1
+            return True
+        return False
+
+    def _record_failure(self, account: OauthAccount, exc: Exception) -> None:
+        user_id = str(account.user_id)
+        previous = self._failures.get(user_id)
+        count = previous.count + 1 if previous is not None else 1
+        delay = min(self.backoff_max_seconds, self.interval_seconds * 2**count)
+        self._failures[user_id] = _RefreshFailure(
+            count=count,
+            retry_at=time.monotonic() + delay,
+            expires_at=account.expires_at,
+            # Google answered but refused the grant; retrying cannot succeed.
+            unrecoverable=isinstance(exc, HTTPException)
+            and exc.status_code == status.HTTP_401_UNAUTHORIZED,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await self.scan()
+            await asyncio.sleep(self.interval_seconds)
+
+    async def _refresh_after_jitter(self, account: OauthAccount) -> None:
+        try:
+            # Spread refreshes out so a burst of logins does not expire and refresh in lockstep.
+            await asyncio.sleep(random.uniform(0, self.jitter_seconds))
+            async with self._semaphore:
+                await self.token_service.refresh_access_token_ahead(account, self.lead_time)
+            self._counters["refreshed"] += 1
+            self._failures.pop(str(account.user_id), None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self._counters["failures"] += 1
+            self._record_failure(account, exc)
+            print(f"Error in GmailTokenRefresher._refresh_after_jitter: {exc}")
+
+
+token_refresher = GmailTokenRefresher()
+
+
+def start_token_refresher() -> None:
+    token_refresher.start()
+
+
+async def stop_token_refresher() -> None:
+    await token_refresher.stop()
@@ -3,12 +3,20 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 import app as project_root
+from app.auth.revocations import start_revocation_refresher, stop_revocation_refresher
+from app.auth.session_cache import start_session_flusher, stop_session_flusher
 from app.config.db import close_db, init_db
-from app.middleware.auth import auth_middleware
+from app.config.http import close_http_client, init_http_client
+from app.mail.offload import shutdown_mail_offloader
+from app.mail.prefetch import cancel_mail_prefetches
+from app.mail.sync_service import cancel_mailbox_syncs
+from app.mail.token_refresher import start_token_refresher, stop_token_refresher
+from app.middleware.auth import AuthMiddleware
 from app.routes import health_router
 from app.routes.ai import router as ai_router
 from app.routes.auth import router as auth_router
 from app.routes.mail import router as mail_router
+from app.routes.metrics import router as metrics_router
 from app.routes.ws import router as ws_router
 from app.routes.ws_auth import router as ws_auth_router
 
@@ -18,17 +26,29 @@ async def lifespan(app: FastAPI):
     project_root.init()
     await init_db()
     print("Database initialized")
+    await init_http_client()
+    start_token_refresher()
+    start_session_flusher()
+    await start_revocation_refresher()
     init_routes(app)
     yield
+    await stop_token_refresher()
+    await cancel_mail_prefetches()
+    await cancel_mailbox_syncs()
+    shutdown_mail_offloader()
+    await stop_session_flusher()
+    await stop_revocation_refresher()
+    await close_http_client()
     await close_db()
 
 
 app = FastAPI(lifespan=lifespan)
-app.middleware("http")(auth_middleware)
+app.add_middleware(AuthMiddleware)
 
 
 def init_routes(app_instance: FastAPI) -> None:
     app_instance.include_router(health_router)
+    app_instance.include_router(metrics_router)
     app_instance.include_router(auth_router)
     app_instance.include_router(mail_router)
     app_instance.include_router(ai_router)
@@ -1,34 +1,76 @@
-from fastapi import HTTPException, Request, status
+import re
+
+from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.auth.service import get_current_user
+from app.mail.token_refresher import token_refresher
 
 PROTECTED_PATHS = {"/auth/me", "/auth/logout", "/ws/token"}
 PROTECTED_PREFIXES = ("/mail", "/ai")
 
+# One anchored match per request: exact protected paths, or a protected prefix. The named
+# group tells the two apart, since only prefix routes count as mailbox activity.
+_PROTECTED_PATH_PATTERN = re.compile(
+    "|".join(
+        [
+            r"(?P<exact>{})\Z".format("|".join(map(re.escape, sorted(PROTECTED_PATHS)))),
+            "(?P<prefix>{})".format("|".join(map(re.escape, PROTECTED_PREFIXES))),
+        ]
+    )
+)
+
+
+class AuthMiddleware:
+    """Resolve the session user for protected HTTP paths as plain ASGI middleware.
+
+    Unprotected requests, websockets and lifespan events pass straight through without the
+    task and stream wrapping of `BaseHTTPMiddleware`. The user and session token are stored
+    in the scope state, where `request.state` reads them.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        match = _PROTECTED_PATH_PATTERN.match(scope["path"])
+        if match is None:
+            await self.app(scope, receive, send)
+            return
 
-async def auth_middleware(request: Request, call_next):
-    path = request.url.path
-    if path in PROTECTED_PATHS or path.startswith(PROTECTED_PREFIXES):
-        session_token = request.headers.get("x-session-token")
+        session_token = Headers(scope=scope).get("x-session-token")
         if not session_token:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"error": "Unauthorized"},
             )
+            await response(scope, receive, send)
+            return
 
         try:
             current_user = await get_current_user(session_token)
-            request.state.current_user = current_user
-            request.state.session_token = session_token
         except HTTPException as exc:
-            print(f"Error in auth_middleware: {exc}")
-            return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+            print(f"Error in AuthMiddleware: {exc}")
+            response = JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+            await response(scope, receive, send)
+            return
         except Exception as exc:
-            print(f"Error in auth_middleware: {exc}")
-            return JSONResponse(
+            print(f"Error in AuthMiddleware: {exc}")
+            response = JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"error": "Internal server error"},
             )
+            await response(scope, receive, send)
+            return
 
-    return await call_next(request)
+        state = scope.setdefault("state", {})
+        state["current_user"] = current_user
+        state["session_token"] = session_token
+        if match.lastgroup == "prefix":
+            token_refresher.mark_active(current_user.id)
+        await self.app(scope, receive, send)
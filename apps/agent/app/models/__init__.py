@@ -1,6 +1,9 @@
 from .ai_conversation import AIConversation
 from .ai_conversation_message import AIConversationMessage
 from .base import Base
+from .mail_detail_cache_entry import MailDetailCacheEntry
+from .mail_message import MailMessage
+from .mailbox_sync_state import MailboxSyncState
 from .oauth_account import OauthAccount
 from .refresh_token import RefreshToken
 from .user import User
@@ -12,4 +15,7 @@ __all__ = [
     "OauthAccount",
     "AIConversation",
     "AIConversationMessage",
+    "MailMessage",
+    "MailboxSyncState",
+    "MailDetailCacheEntry",
 ]
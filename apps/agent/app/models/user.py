@@ -28,3 +28,10 @@ class User(Base, TimestampMixin):
     ai_conversation_messages = relationship(
         "AIConversationMessage", back_populates="user", cascade="all, delete-orphan"
     )
+    mail_messages = relationship("MailMessage", back_populates="user", cascade="all, delete-orphan")
+    mailbox_sync_state = relationship(
+        "MailboxSyncState", back_populates="user", cascade="all, delete-orphan", uselist=False
+    )
+    mail_detail_cache_entries = relationship(
+        "MailDetailCacheEntry", back_populates="user", cascade="all, delete-orphan"
+    )
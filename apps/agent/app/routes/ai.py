@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 
 from app.ai.handler import handle_ai_chat
 from app.ai.schemas import AIChatRequest
@@ -8,6 +8,6 @@ router = APIRouter(prefix="/ai", tags=["ai"])
 
 
 @router.post("/chat")
-async def ai_chat(request: Request, payload: AIChatRequest) -> JSONResponse:
+async def ai_chat(request: Request, payload: AIChatRequest) -> Response:
     user_id = request.state.current_user.id
     return await handle_ai_chat(str(user_id), payload)
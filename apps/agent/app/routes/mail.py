@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Query, Request
-from fastapi.responses import JSONResponse
+from typing import Literal
+
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import JSONResponse, Response
 
 from app.mail.handler import MailHandler
-from app.mail.schemas import SendMailRequest
+from app.mail.schemas import BulkLabelRequest, BulkMailSelection, SendMailRequest
 
 router = APIRouter(prefix="/mail", tags=["mail"])
 mail_handler = MailHandler()
@@ -13,7 +15,7 @@ async def get_inbox_messages(
     request: Request,
     page_token: str | None = Query(default=None),
     page_size: int = Query(default=20, ge=1, le=50),
-) -> JSONResponse:
+) -> Response:
     user_id = request.state.current_user.id
     return await mail_handler.handle_list_messages(user_id, "inbox", page_token, page_size)
 
@@ -23,15 +25,96 @@ async def get_sent_messages(
     request: Request,
     page_token: str | None = Query(default=None),
     page_size: int = Query(default=20, ge=1, le=50),
-) -> JSONResponse:
+) -> Response:
     user_id = request.state.current_user.id
     return await mail_handler.handle_list_messages(user_id, "sent", page_token, page_size)
 
 
+@router.get("/inbox/stream")
+async def stream_inbox_messages(
+    request: Request,
+    page_token: str | None = Query(default=None),
+    page_size: int = Query(default=20, ge=1, le=50),
+) -> Response:
+    user_id = request.state.current_user.id
+    return await mail_handler.handle_stream_list_messages(user_id, "inbox", page_token, page_size)
+
+
+@router.get("/sent/stream")
+async def stream_sent_messages(
+    request: Request,
+    page_token: str | None = Query(default=None),
+    page_size: int = Query(default=20, ge=1, le=50),
+) -> Response:
+    user_id = request.state.current_user.id
+    return await mail_handler.handle_stream_list_messages(user_id, "sent", page_token, page_size)
+
+
+@router.get("/threads")
+async def get_threads(
+    request: Request,
+    mailbox: Literal["inbox", "sent"] = Query(default="inbox"),
+    page_token: str | None = Query(default=None),
+    page_size: int = Query(default=20, ge=1, le=50),
+) -> Response:
+    user_id = request.state.current_user.id
+    return await mail_handler.handle_list_threads(user_id, mailbox, page_token, page_size)
+
+
+@router.get("/threads/{thread_id}")
+async def get_thread_detail(request: Request, thread_id: str) -> Response:
+    user_id = request.state.current_user.id
+    return await mail_handler.handle_get_thread_detail(user_id, thread_id)
+
+
+@router.post("/bulk/read")
+async def bulk_mark_read(request: Request, payload: BulkMailSelection) -> Response:
+    user_id = request.state.current_user.id
+    return await mail_handler.handle_bulk_modify(user_id, payload, [], ["UNREAD"])
+
+
+@router.post("/bulk/unread")
+async def bulk_mark_unread(request: Request, payload: BulkMailSelection) -> Response:
+    user_id = request.state.current_user.id
+    return await mail_handler.handle_bulk_modify(user_id, payload, ["UNREAD"], [])
+
+
+@router.post("/bulk/archive")
+async def bulk_archive(request: Request, payload: BulkMailSelection) -> Response:
+    user_id = request.state.current_user.id
+    return await mail_handler.handle_bulk_modify(user_id, payload, [], ["INBOX"])
+
+
+@router.post("/bulk/labels")
+async def bulk_modify_labels(request: Request, payload: BulkLabelRequest) -> Response:
+    user_id = request.state.current_user.id
+    return await mail_handler.handle_bulk_modify(
+        user_id, payload, payload.add_label_ids, payload.remove_label_ids
+    )
+
+
 @router.get("/{message_id}")
-async def get_message_detail(request: Request, message_id: str) -> JSONResponse:
+async def get_message_detail(
+    request: Request,
+    message_id: str,
+    if_none_match: str | None = Header(default=None),
+) -> Response:
     user_id = request.state.current_user.id
-    return await mail_handler.handle_get_message_detail(user_id, message_id)
+    return await mail_handler.handle_get_message_detail(user_id, message_id, if_none_match)
+
+
+@router.get("/{message_id}/attachments/{attachment_id}")
+async def get_attachment(
+    request: Request,
+    message_id: str,
+    attachment_id: str,
+    filename: str | None = Query(default=None),
+    mime_type: str | None = Query(default=None, alias="mimeType"),
+) -> Response:
+    user_id = request.state.current_user.id
+    return await mail_handler.handle_get_attachment(
+        user_id, message_id, attachment_id, filename, mime_type
+    )
 
 
 @router.post("/{message_id}/read")
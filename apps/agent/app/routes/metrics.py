@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from app.handlers.metrics import handle_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def metrics(request: Request) -> JSONResponse:
+    return await handle_metrics(request)
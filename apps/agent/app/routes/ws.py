@@ -4,7 +4,9 @@ from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 
 from app.ai.schemas import WsClientEvent
 from app.ai.ws_chat_handler import AIWebSocketChatHandler
-from app.auth.service import get_current_user
+from app.auth.revocations import revoked_sessions
+from app.mail.token_refresher import token_refresher
+from app.utils.serialization import send_ws_json
 from app.utils.ws_security import verify_ws_token
 
 router = APIRouter(tags=["ws"])
@@ -20,20 +22,22 @@ async def websocket_events(websocket: WebSocket):
             await websocket.close(code=4401, reason="Missing websocket token")
             return
 
+        # Verified in memory: signature, lifetime and the cached revocation set, no DB hit.
         token_payload = verify_ws_token(token)
-        session_token = token_payload["session_token"]
-
-        current_user = await get_current_user(session_token)
-        user_id = str(current_user.id)
+        if revoked_sessions.is_revoked(token_payload["session_id"]):
+            await websocket.close(code=4401, reason="Unauthorized")
+            return
+        user_id = token_payload["user_id"]
 
         await websocket.accept()
-        await websocket.send_json(
+        await send_ws_json(
+            websocket,
             {
                 "type": "system.ready",
                 "eventId": "ws-ready",
                 "ts": "",
                 "payload": {"ok": True},
-            }
+            },
         )
 
         while True:
@@ -42,6 +46,7 @@ async def websocket_events(websocket: WebSocket):
                 parsed_message = json.loads(raw_message)
                 client_event = WsClientEvent.model_validate(parsed_message)
                 if client_event.type == "chat_request":
+                    token_refresher.mark_active(user_id)
                     await chat_handler.handle_chat_request(
                         websocket=websocket,
                         user_id=user_id,
@@ -49,7 +54,8 @@ async def websocket_events(websocket: WebSocket):
                     )
             except Exception as exc:
                 print(f"Error in websocket_events.message_parse: {exc}")
-                await websocket.send_json(
+                await send_ws_json(
+                    websocket,
                     {
                         "type": "chat_error",
                         "eventId": "chat-invalid-event",
@@ -58,7 +64,7 @@ async def websocket_events(websocket: WebSocket):
                             "chatId": None,
                             "message": "Invalid websocket chat event",
                         },
-                    }
+                    },
                 )
     except WebSocketDisconnect:
         return
@@ -1,5 +1,7 @@
+import os
+
 GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
-GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+GOOGLE_TOKEN_URL = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
 GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
 
 GOOGLE_SCOPES = [
@@ -12,4 +14,6 @@ GOOGLE_SCOPES = [
 ]
 
 PROVIDER_NAME = "google"
-GMAIL_API_BASE_URL = "https://gmail.googleapis.com/gmail/v1"
+# Overridable so benchmarks can point the app at `benchmarks/fake_gmail.py` instead of Google.
+GMAIL_API_BASE_URL = os.getenv("GMAIL_API_BASE_URL", "https://gmail.googleapis.com/gmail/v1")
+GMAIL_BATCH_URL = os.getenv("GMAIL_BATCH_URL", "https://gmail.googleapis.com/batch/gmail/v1")
@@ -0,0 +1,35 @@
+from typing import Any
+
+from fastapi import WebSocket, status
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+
+def encode_json(content: Any) -> bytes:
+    """Serialize plain data and nested pydantic models (by alias) to compact UTF-8 JSON."""
+    return to_json(content, by_alias=True)
+
+
+def model_json_response(
+    adapter: TypeAdapter,
+    value: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """Serialize `value` straight to bytes through a prebuilt adapter and wrap it.
+
+    Skips the `model_dump` -> dict -> stdlib `json` round trip of `JSONResponse`; the output
+    is byte-for-byte the same compact JSON.
+    """
+    return Response(
+        content=adapter.dump_json(value, by_alias=True),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+async def send_ws_json(websocket: WebSocket, event: dict[str, Any]) -> None:
+    """Send one JSON text frame using the same encoder as HTTP responses."""
+    await websocket.send_text(encode_json(event).decode("utf-8"))
@@ -0,0 +1,5 @@
+def percentile(ordered: list[float], quantile: float) -> float | None:
+    """Nearest-rank percentile of an already sorted sample list, or None when it is empty."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(quantile * (len(ordered) - 1))))]
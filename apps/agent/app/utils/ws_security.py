@@ -3,6 +3,7 @@ import hashlib
 import hmac
 import json
 import os
+import time
 
 from fastapi import HTTPException, status
 
@@ -47,19 +48,49 @@ def _get_ws_token_secret() -> str:
         ) from exc
 
 
+def _get_ws_token_keys() -> dict[str, str]:
+    """Map key ids to secrets: the signing key plus retired keys still accepted for verify.
+
+    `WS_TOKEN_PREVIOUS_SECRETS` is a comma-separated list of `kid:secret` pairs, so a secret
+    can be rotated without closing the door on tokens issued just before the switch.
+    """
+    keys: dict[str, str] = {}
+    for entry in os.getenv("WS_TOKEN_PREVIOUS_SECRETS", "").split(","):
+        key_id, separator, secret = entry.strip().partition(":")
+        if separator and key_id and secret:
+            keys[key_id] = secret
+    keys[os.getenv("WS_TOKEN_KEY_ID", "v1")] = _get_ws_token_secret()
+    return keys
+
+
+def _sign(secret: str, payload_part: str) -> bytes:
+    return hmac.new(secret.encode("utf-8"), payload_part.encode("utf-8"), hashlib.sha256).digest()
+
+
+def ws_session_id(session_token: str) -> str:
+    """Stable identifier for a session that does not reveal the session token itself."""
+    return hashlib.sha256(session_token.encode("utf-8")).hexdigest()[:32]
+
+
 def create_ws_token(user_id: str, session_token: str) -> str:
-    """Create a signed websocket token bound to user and session token."""
+    """Create a short-lived signed websocket token bound to the user and session.
+
+    The token carries issued-at, expiry, the session id and the signing key id, so it can be
+    verified in memory at connect time.
+    """
     try:
+        issued_at = int(time.time())
+        key_id = os.getenv("WS_TOKEN_KEY_ID", "v1")
         payload = {
-            "user_id": user_id,
-            "session_token": session_token,
+            "sub": user_id,
+            "sid": ws_session_id(session_token),
+            "iat": issued_at,
+            "exp": issued_at + int(os.getenv("WS_TOKEN_TTL_SECONDS", "300")),
+            "kid": key_id,
         }
         payload_json = json.dumps(payload, separators=(",", ":")).encode("utf-8")
         payload_part = _base64_url_encode(payload_json)
-
-        secret = _get_ws_token_secret().encode("utf-8")
-        signature = hmac.new(secret, payload_part.encode("utf-8"), hashlib.sha256).digest()
-        signature_part = _base64_url_encode(signature)
+        signature_part = _base64_url_encode(_sign(_get_ws_token_secret(), payload_part))
 
         return f"{payload_part}.{signature_part}"
     except HTTPException as exc:
@@ -74,7 +105,7 @@ def create_ws_token(user_id: str, session_token: str) -> str:
 
 
 def verify_ws_token(token: str) -> dict[str, str]:
-    """Verify websocket token signature and return payload values."""
+    """Verify websocket token signature and lifetime and return the user and session ids."""
     try:
         parts = token.split(".")
         if len(parts) != 2:
@@ -84,34 +115,50 @@ def verify_ws_token(token: str) -> dict[str, str]:
             )
 
         payload_part, signature_part = parts
-        secret = _get_ws_token_secret().encode("utf-8")
-        expected_signature = hmac.new(
-            secret,
-            payload_part.encode("utf-8"),
-            hashlib.sha256,
-        ).digest()
-        provided_signature = _base64_url_decode(signature_part)
-
-        if not hmac.compare_digest(expected_signature, provided_signature):
+        payload = json.loads(_base64_url_decode(payload_part).decode("utf-8"))
+        if not isinstance(payload, dict):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid websocket token signature",
+                detail="Invalid websocket token payload",
             )
 
-        payload_raw = _base64_url_decode(payload_part)
-        payload = json.loads(payload_raw.decode("utf-8"))
+        # The key id is read before the signature is checked, but only selects among our
+        # own secrets; an unknown or forged kid simply fails verification.
+        secret = _get_ws_token_keys().get(str(payload.get("kid")))
+        if secret is None or not hmac.compare_digest(
+            _sign(secret, payload_part), _base64_url_decode(signature_part)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid websocket token signature",
+            )
 
-        user_id = payload.get("user_id")
-        session_token = payload.get("session_token")
-        if not user_id or not session_token:
+        user_id = payload.get("sub")
+        session_id = payload.get("sid")
+        issued_at = payload.get("iat")
+        expires_at = payload.get("exp")
+        if (
+            not user_id
+            or not session_id
+            or not isinstance(issued_at, int)
+            or not isinstance(expires_at, int)
+        ):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid websocket token payload",
             )
 
+        now = time.time()
+        leeway = int(os.getenv("WS_TOKEN_LEEWAY_SECONDS", "30"))
+        if expires_at + leeway < now or issued_at - leeway > now:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Expired websocket token",
+            )
+
         return {
             "user_id": str(user_id),
-            "session_token": str(session_token),
+            "session_id": str(session_id),
         }
     except HTTPException as exc:
         print(f"Error in verify_ws_token: {exc}")
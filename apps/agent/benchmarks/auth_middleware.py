@@ -0,0 +1,149 @@
+"""Compare per-request overhead of the old `BaseHTTPMiddleware` auth with `AuthMiddleware`.
+
+Builds two minimal FastAPI apps, one per middleware, each with an unprotected route and a
+protected `/mail` route, and calls them directly over ASGI (no sockets). The session is
+pre-seeded in the session cache so neither path touches Postgres, leaving only middleware
+and routing cost. Reports microseconds per request as JSON.
+
+    uv run python -m benchmarks.auth_middleware --iterations 20000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import UTC, datetime, timedelta
+
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+
+from app.auth.schemas import AuthUserResponse
+from app.auth.service import get_current_user
+from app.auth.session_cache import session_cache
+from app.mail.token_refresher import token_refresher
+from app.middleware.auth import PROTECTED_PATHS, PROTECTED_PREFIXES, AuthMiddleware
+
+SESSION_TOKEN = "benchmark-session-token"
+
+
+async def legacy_auth_middleware(request: Request, call_next):
+    """The `app.middleware("http")` implementation this benchmark measures against."""
+    path = request.url.path
+    if path in PROTECTED_PATHS or path.startswith(PROTECTED_PREFIXES):
+        session_token = request.headers.get("x-session-token")
+        if not session_token:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"error": "Unauthorized"},
+            )
+        try:
+            current_user = await get_current_user(session_token)
+            request.state.current_user = current_user
+            request.state.session_token = session_token
+            if path.startswith(PROTECTED_PREFIXES):
+                token_refresher.mark_active(current_user.id)
+        except HTTPException as exc:
+            return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+    return await call_next(request)
+
+
+def build_app(use_asgi_middleware: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"ok": True}
+
+    @app.get("/mail/ping")
+    async def mail_ping(request: Request) -> dict:
+        return {"user": request.state.current_user.id}
+
+    if use_asgi_middleware:
+        app.add_middleware(AuthMiddleware)
+    else:
+        app.middleware("http")(legacy_auth_middleware)
+    return app
+
+
+def _scope(path: str, session_token: str | None) -> dict:
+    headers = [(b"host", b"bench")]
+    if session_token:
+        headers.append((b"x-session-token", session_token.encode()))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def _call(app: FastAPI, path: str, session_token: str | None) -> int:
+    statuses: list[int] = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await app(_scope(path, session_token), receive, send)
+    return statuses[0]
+
+
+async def _per_request_us(app: FastAPI, path: str, token: str | None, iterations: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        await _call(app, path, token)
+    return (time.perf_counter() - started_at) / iterations * 1_000_000
+
+
+async def _main(iterations: int) -> None:
+    now = datetime.now(UTC)
+    user = AuthUserResponse(
+        id="00000000-0000-0000-0000-000000000001",
+        first_name="Bench",
+        last_name="User",
+        country_code=None,
+        avatar=None,
+        created_at=now,
+        updated_at=now,
+    )
+    session_cache.ttl_seconds = 3600
+    session_cache.put(SESSION_TOKEN, user, now + timedelta(days=1))
+
+    apps = {"baseHttpMiddleware": build_app(False), "asgiMiddleware": build_app(True)}
+    cases = [
+        ("unprotected", "/health", None),
+        ("protected", "/mail/ping", SESSION_TOKEN),
+        ("missingToken", "/mail/ping", None),
+    ]
+    results = []
+    for case, path, token in cases:
+        row: dict = {"case": case, "path": path}
+        for name, app in apps.items():
+            row[f"{name}Status"] = await _call(app, path, token)
+            await _per_request_us(app, path, token, iterations // 10)
+            row[f"{name}Us"] = round(await _per_request_us(app, path, token, iterations), 1)
+        row["speedup"] = round(row["baseHttpMiddlewareUs"] / row["asgiMiddlewareUs"], 2)
+        results.append(row)
+    print(json.dumps({"iterations": iterations, "results": results}, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(_main(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Compare database time per chat turn for the old memory calls and `begin_turn`.
+
+Seeds a user, then plays the same number of chat turns through both persistence paths, each
+in its own fresh conversation: the old sequence (`resolve_conversation`, ORM append of the
+user message, `fetch_recent_messages`, ORM append of the answer) and the new one
+(`begin_turn`, single-statement `append_message`). Reports per-turn latency percentiles plus
+statements and commits per turn as JSON.
+
+    DATABASE_URL=postgresql://... uv run python -m benchmarks.chat_turn_persistence --turns 200
+
+Requires a migrated local Postgres. The seeded user and its conversations are deleted at the
+end. Round-trip savings grow with network latency, so also run it against a remote database.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import UTC, datetime
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+import app.config.db as db_config
+from app.ai.memory_service import AIConversationMemoryService
+from app.config.db import close_db, get_session_maker, init_db
+from app.models import AIConversation, AIConversationMessage, User
+
+HISTORY_LIMIT = 14
+ASSISTANT_REPLY = "Here are the three most recent invoices from Acme, newest first."
+
+
+async def legacy_append_message(
+    conversation_id: str, user_id: str, role: str, content: str
+) -> AIConversationMessage:
+    """The get + insert + commit + refresh `append_message` this benchmark measures against."""
+    async with get_session_maker()() as session:
+        conversation = await session.get(AIConversation, uuid.UUID(conversation_id))
+        message = AIConversationMessage(
+            conversation_id=conversation.id,
+            user_id=uuid.UUID(user_id),
+            role=role,
+            content=content,
+            token_count=max(1, len(content.split())),
+        )
+        conversation.last_message_at = datetime.now(UTC)
+        session.add(message)
+        await session.commit()
+        await session.refresh(message)
+        return message
+
+
+async def legacy_turn(
+    service: AIConversationMemoryService, user_id: str, conversation_id: str | None, text: str
+) -> str:
+    conversation = await service.resolve_conversation(user_id, "inbox", conversation_id)
+    resolved_id = str(conversation.id)
+    await legacy_append_message(resolved_id, user_id, "user", text)
+    messages = await service.fetch_recent_messages(resolved_id, user_id, limit=HISTORY_LIMIT)
+    service.build_history_context(messages)
+    await legacy_append_message(resolved_id, user_id, "assistant", ASSISTANT_REPLY)
+    return resolved_id
+
+
+async def combined_turn(
+    service: AIConversationMemoryService, user_id: str, conversation_id: str | None, text: str
+) -> str:
+    turn = await service.begin_turn(user_id, "inbox", conversation_id, text, HISTORY_LIMIT)
+    await service.append_message(turn.conversation_id, user_id, "assistant", ASSISTANT_REPLY)
+    return turn.conversation_id
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    def attach(self) -> None:
+        sync_engine = db_config.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._on_statement)
+        event.listen(sync_engine, "commit", self._on_commit)
+
+    def _on_statement(self, *_) -> None:
+        self.statements += 1
+
+    def _on_commit(self, *_) -> None:
+        self.commits += 1
+
+
+async def _run_path(name: str, turn, user_id: str, turns: int) -> dict:
+    service = AIConversationMemoryService()
+    counter = StatementCounter()
+    counter.attach()
+    durations_ms: list[float] = []
+    conversation_id = None
+    for index in range(turns):
+        started_at = time.perf_counter()
+        conversation_id = await turn(service, user_id, conversation_id, f"find invoices {index}")
+        durations_ms.append((time.perf_counter() - started_at) * 1000)
+    event.remove(db_config.engine.sync_engine, "before_cursor_execute", counter._on_statement)
+    event.remove(db_config.engine.sync_engine, "commit", counter._on_commit)
+    # Archive the conversation so the next path starts a fresh one instead of continuing it.
+    async with get_session_maker()() as session:
+        conversation = await session.get(AIConversation, uuid.UUID(conversation_id))
+        conversation.is_archived = True
+        await session.commit()
+
+    # Skip the turn that created the conversation: later turns are what a chat session pays.
+    steady = durations_ms[1:]
+    percentiles = statistics.quantiles(steady, n=100, method="inclusive")
+    return {
+        "path": name,
+        "turns": turns,
+        "p50Ms": round(statistics.median(steady), 3),
+        "p95Ms": round(percentiles[94], 3),
+        "p99Ms": round(percentiles[98], 3),
+        "meanMs": round(statistics.fmean(steady), 3),
+        "statementsPerTurn": round(counter.statements / turns, 2),
+        "commitsPerTurn": round(counter.commits / turns, 2),
+    }
+
+
+async def _main(turns: int, warmup: int) -> None:
+    await init_db()
+    try:
+        async with get_session_maker()() as session:
+            user = User(first_name="Chat", last_name="Bench")
+            session.add(user)
+            await session.commit()
+            user_id = str(user.id)
+        try:
+            # Warm the pool and prepared statement caches for both paths before measuring.
+            await _run_path("warmup", legacy_turn, user_id, warmup)
+            await _run_path("warmup", combined_turn, user_id, warmup)
+            results = [
+                await _run_path("legacy", legacy_turn, user_id, turns),
+                await _run_path("beginTurn", combined_turn, user_id, turns),
+            ]
+        finally:
+            async with get_session_maker()() as session:
+                user = await session.get(User, uuid.UUID(user_id))
+                if user is not None:
+                    await session.delete(user)
+                    await session.commit()
+    finally:
+        await close_db()
+
+    legacy, combined = results
+    print(
+        json.dumps(
+            {
+                "turns": turns,
+                "historyLimit": HISTORY_LIMIT,
+                "results": results,
+                "p50Speedup": round(legacy["p50Ms"] / combined["p50Ms"], 2),
+            },
+            indent=2,
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+    if min(args.turns, args.warmup) < 2:
+        parser.error("--turns and --warmup must be at least 2")
+    load_dotenv()
+    asyncio.run(_main(args.turns, args.warmup))
+
+
+if __name__ == "__main__":
+    main()
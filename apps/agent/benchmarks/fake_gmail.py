@@ -0,0 +1,734 @@
+"""Local stand-in for the Gmail API and Google's token endpoint, for offline benchmarks.
+
+Serves a deterministic synthetic mailbox with the endpoints the agent uses:
+`users.getProfile`, `messages.list/get/modify/batchModify/send`, `messages.attachments.get`,
+`threads.list/get`, `history.list`, the multipart batch endpoint and the OAuth token endpoint.
+Latency, 5xx error rate, injected 429s and a per-user quota bucket are configurable, and
+`/_fake/stats` reports how many calls of each kind the app made.
+
+    uv run python -m benchmarks.fake_gmail --port 8088 --messages 5000 --latency-ms 80
+
+Then start the app with the printed `GMAIL_API_BASE_URL`, `GMAIL_BATCH_URL` and
+`GOOGLE_TOKEN_URL`. Every access token is accepted and all users share one mailbox.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from email import message_from_bytes
+from email.utils import format_datetime
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+from multidict import MultiDict
+
+API_PREFIX = "/gmail/v1/users/me"
+BATCH_PATH = "/batch/gmail/v1"
+TOKEN_PATH = "/token"
+
+# Google's per-user quota units. Kept separate from the app's copy so the fake imports nothing
+# from `app` and callers can set GMAIL_API_BASE_URL before the app's settings load.
+QUOTA_COSTS = {
+    "users.getProfile": 1,
+    "history.list": 2,
+    "messages.list": 5,
+    "messages.get": 5,
+    "messages.modify": 5,
+    "messages.attachments.get": 5,
+    "messages.batchModify": 50,
+    "messages.send": 100,
+    "threads.list": 10,
+    "threads.get": 10,
+}
+
+_SENDERS = [
+    ("Alex Kim", "alex@example.com"),
+    ("Billing", "billing@payments.example"),
+    ("Design Weekly", "newsletter@designweekly.example"),
+    ("Priya Natarajan", "priya@partner.example"),
+    ("GitHub", "notifications@github.example"),
+    ("Sam Ortiz", "sam@example.com"),
+]
+_SUBJECTS = [
+    "Quarterly planning notes",
+    "Your invoice is ready",
+    "This week in design",
+    "Contract review follow-up",
+    "[repo] New pull request opened",
+    "Lunch on Friday?",
+]
+_QUERY_TOKEN_PATTERN = re.compile(r'(\w+):("[^"]*"|\S+)|("[^"]*"|\S+)')
+_BATCH_REQUEST_LINE = re.compile(r"^(GET|POST)\s+(\S+)", re.MULTILINE)
+_CONTENT_ID_PATTERN = re.compile(r"Content-ID:\s*<([^>]+)>", re.IGNORECASE)
+
+
+@dataclass
+class FakeGmailConfig:
+    messages: int = 2000
+    body_kb: int = 8
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    quota_per_second: float = 0.0
+    seed: int = 7
+
+
+@dataclass
+class FakeMessage:
+    id: str
+    thread_id: str
+    label_ids: list[str]
+    internal_date: int
+    sender: str
+    to: str
+    subject: str
+    snippet: str
+    plain_body: str
+    html_body: str
+    html_as_attachment: bool
+    attachment: bytes | None
+
+
+@dataclass
+class _QuotaBucket:
+    tokens: float
+    refilled_at: float = field(default_factory=time.monotonic)
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _gmail_error(status: int, message: str, reason: str) -> web.Response:
+    body = {"error": {"code": status, "message": message, "errors": [{"reason": reason}]}}
+    return web.json_response(body, status=status)
+
+
+class FakeMailbox:
+    """Synthetic mailbox plus a history log of label and send changes."""
+
+    def __init__(self, config: FakeGmailConfig):
+        self.config = config
+        rng = random.Random(config.seed)
+        now_ms = int(time.time() * 1000)
+        self.messages: dict[str, FakeMessage] = {}
+        self.order: list[str] = []
+        self.history_id = 1000
+        self.history: list[dict] = []
+        paragraph = "Here is the latest update with details, numbers and next steps. " * 8
+        for index in range(config.messages):
+            sender_name, sender_email = _SENDERS[index % len(_SENDERS)]
+            subject = f"{_SUBJECTS[index % len(_SUBJECTS)]} #{index}"
+            paragraphs = max(1, config.body_kb * 1024 // len(paragraph))
+            labels = ["SENT"] if index % 9 == 4 else ["INBOX"]
+            if "INBOX" in labels and rng.random() < 0.3:
+                labels.append("UNREAD")
+            message = FakeMessage(
+                id=f"{0x18D0000000000000 + index * 7919:016x}",
+                thread_id=f"{0x18D0000000000000 + (index // 3) * 7919:016x}",
+                label_ids=labels,
+                internal_date=now_ms - index * 15 * 60 * 1000,
+                sender=f"{sender_name} <{sender_email}>",
+                to="me@example.com",
+                subject=subject,
+                snippet=f"{subject}: {paragraph[:120]}",
+                plain_body=f"{subject}\n\n" + (paragraph + "\n\n") * paragraphs,
+                html_body=(
+                    f"<html><body><h1>{subject}</h1>"
+                    + f"<table><tr><td><p>{paragraph}</p></td></tr></table>" * paragraphs
+                    + "</body></html>"
+                ),
+                # Every 50th message has a large HTML part Gmail serves by attachment id.
+                html_as_attachment=index % 50 == 0,
+                attachment=b"%PDF-1.4 fake" * 64 if index % 7 == 0 else None,
+            )
+            self.messages[message.id] = message
+            self.order.append(message.id)
+
+    def query(self, query: str, label_ids: list[str]) -> list[FakeMessage]:
+        required_labels = set(label_ids)
+        filters: list[tuple[str, str]] = []
+        for match in _QUERY_TOKEN_PATTERN.finditer(query or ""):
+            operator, operand, bare = match.groups()
+            value = (operand or bare or "").strip('"').lower()
+            filters.append(((operator or "").lower(), value))
+
+        matches = []
+        for message_id in self.order:
+            message = self.messages[message_id]
+            if not required_labels.issubset(message.label_ids):
+                continue
+            if all(self._matches(message, operator, value) for operator, value in filters):
+                matches.append(message)
+        return matches
+
+    def query_threads(self, query: str, label_ids: list[str]) -> list[str]:
+        """Thread ids with at least one matching message, newest activity first."""
+        return list(dict.fromkeys(message.thread_id for message in self.query(query, label_ids)))
+
+    def thread_messages(self, thread_id: str) -> list[FakeMessage]:
+        """Messages of one thread, oldest first, as Gmail returns them."""
+        messages = [m for m in self.messages.values() if m.thread_id == thread_id]
+        return sorted(messages, key=lambda message: message.internal_date)
+
+    def apply_labels(self, message: FakeMessage, add: list[str], remove: list[str]) -> None:
+        removed = [label for label in remove if label in message.label_ids]
+        added = [label for label in add if label not in message.label_ids]
+        if not removed and not added:
+            return
+        message.label_ids = [label for label in message.label_ids if label not in removed] + added
+        self.history_id += 1
+        record: dict = {"id": str(self.history_id), "messages": [{"id": message.id}]}
+        ref = {"message": {"id": message.id, "labelIds": message.label_ids}}
+        if added:
+            record["labelsAdded"] = [{**ref, "labelIds": added}]
+        if removed:
+            record["labelsRemoved"] = [{**ref, "labelIds": removed}]
+        self.history.append(record)
+
+    def add_sent(self, raw: str) -> FakeMessage:
+        parsed = message_from_bytes(base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)))
+        body = parsed.get_payload(decode=True) if not parsed.is_multipart() else b""
+        text = (body or b"").decode("utf-8", errors="replace")
+        index = len(self.order)
+        message = FakeMessage(
+            id=f"{0x18E0000000000000 + index:016x}",
+            thread_id=f"{0x18E0000000000000 + index:016x}",
+            label_ids=["SENT"],
+            internal_date=int(time.time() * 1000),
+            sender="Me <me@example.com>",
+            to=str(parsed.get("To", "")),
+            subject=str(parsed.get("Subject", "")),
+            snippet=text[:120],
+            plain_body=text,
+            html_body="",
+            html_as_attachment=False,
+            attachment=None,
+        )
+        self.messages[message.id] = message
+        self.order.insert(0, message.id)
+        self.history_id += 1
+        self.history.append(
+            {
+                "id": str(self.history_id),
+                "messages": [{"id": message.id}],
+                "messagesAdded": [{"message": {"id": message.id, "labelIds": ["SENT"]}}],
+            }
+        )
+        return message
+
+    def to_resource(self, message: FakeMessage, format_: str, metadata_headers: list[str]) -> dict:
+        resource: dict = {
+            "id": message.id,
+            "threadId": message.thread_id,
+            "labelIds": message.label_ids,
+            "snippet": message.snippet,
+            "internalDate": str(message.internal_date),
+            "historyId": str(self.history_id),
+            "sizeEstimate": len(message.plain_body) + len(message.html_body),
+        }
+        if format_ == "minimal":
+            return resource
+        headers = [
+            {"name": "From", "value": message.sender},
+            {"name": "To", "value": message.to},
+            {"name": "Subject", "value": message.subject},
+            {
+                "name": "Date",
+                "value": format_datetime(
+                    datetime.fromtimestamp(message.internal_date / 1000, tz=UTC)
+                ),
+            },
+        ]
+        if format_ == "metadata":
+            wanted = {name.lower() for name in metadata_headers}
+            if wanted:
+                headers = [header for header in headers if header["name"].lower() in wanted]
+            resource["payload"] = {"mimeType": "multipart/alternative", "headers": headers}
+            return resource
+        resource["payload"] = self._full_payload(message, headers)
+        return resource
+
+    def attachment_data(self, message: FakeMessage, attachment_id: str) -> bytes | None:
+        if attachment_id == f"html-{message.id}" and message.html_as_attachment:
+            return message.html_body.encode("utf-8")
+        if attachment_id == f"file-{message.id}" and message.attachment is not None:
+            return message.attachment
+        return None
+
+    def _full_payload(self, message: FakeMessage, headers: list[dict]) -> dict:
+        utf8 = [{"name": "Content-Type", "value": "text/plain; charset=UTF-8"}]
+        html_bytes = message.html_body.encode("utf-8")
+        html_body: dict = {"size": len(html_bytes)}
+        if message.html_as_attachment:
+            html_body["attachmentId"] = f"html-{message.id}"
+        else:
+            html_body["data"] = _b64(html_bytes)
+        alternative = {
+            "partId": "0",
+            "mimeType": "multipart/alternative",
+            "body": {"size": 0},
+            "parts": [
+                {
+                    "partId": "0.0",
+                    "mimeType": "text/plain",
+                    "headers": utf8,
+                    "body": {
+                        "size": len(message.plain_body),
+                        "data": _b64(message.plain_body.encode("utf-8")),
+                    },
+                },
+                {
+                    "partId": "0.1",
+                    "mimeType": "text/html",
+                    "headers": [{"name": "Content-Type", "value": "text/html; charset=UTF-8"}],
+                    "body": html_body,
+                },
+            ],
+        }
+        if not message.html_body:
+            alternative["parts"] = alternative["parts"][:1]
+        parts = [alternative]
+        if message.attachment is not None:
+            parts.append(
+                {
+                    "partId": "1",
+                    "mimeType": "application/pdf",
+                    "filename": "report.pdf",
+                    "headers": [{"name": "Content-Disposition", "value": "attachment"}],
+                    "body": {"size": len(message.attachment), "attachmentId": f"file-{message.id}"},
+                }
+            )
+        return {
+            "mimeType": "multipart/mixed",
+            "headers": headers,
+            "body": {"size": 0},
+            "parts": parts,
+        }
+
+    def _matches(self, message: FakeMessage, operator: str, value: str) -> bool:
+        if operator == "is":
+            return ("UNREAD" in message.label_ids) == (value == "unread")
+        if operator == "from":
+            return value in message.sender.lower()
+        if operator == "to":
+            return value in message.to.lower()
+        if operator == "subject":
+            return value in message.subject.lower()
+        if operator in {"in", "label"}:
+            return value.upper() in message.label_ids
+        if operator == "has":
+            return value == "attachment" and message.attachment is not None
+        if operator:
+            # Date and other operators are accepted but not evaluated.
+            return True
+        return value in f"{message.subject} {message.snippet} {message.sender}".lower()
+
+
+class FakeGmailServer:
+    """aiohttp app exposing the fake mailbox with configurable latency and failures."""
+
+    def __init__(self, config: FakeGmailConfig):
+        self.config = config
+        self.mailbox = FakeMailbox(config)
+        self.rng = random.Random(config.seed)
+        self.calls: Counter[str] = Counter()
+        self.faults: Counter[str] = Counter()
+        self._buckets: dict[str, _QuotaBucket] = {}
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._fault_middleware], client_max_size=64 * 2**20)
+        app.router.add_post(TOKEN_PATH, self.token)
+        app.router.add_get(f"{API_PREFIX}/profile", self.get_profile)
+        app.router.add_get(f"{API_PREFIX}/messages", self.list_messages)
+        app.router.add_post(f"{API_PREFIX}/messages/batchModify", self.batch_modify)
+        app.router.add_post(f"{API_PREFIX}/messages/send", self.send_message)
+        app.router.add_get(f"{API_PREFIX}/messages/{{id}}", self.get_message)
+        app.router.add_post(f"{API_PREFIX}/messages/{{id}}/modify", self.modify_message)
+        app.router.add_get(
+            f"{API_PREFIX}/messages/{{id}}/attachments/{{attachment_id}}", self.get_attachment
+        )
+        app.router.add_get(f"{API_PREFIX}/threads", self.list_threads)
+        app.router.add_get(f"{API_PREFIX}/threads/{{id}}", self.get_thread)
+        app.router.add_get(f"{API_PREFIX}/history", self.list_history)
+        app.router.add_post(BATCH_PATH, self.batch)
+        app.router.add_get("/_fake/stats", self.stats)
+        app.router.add_post("/_fake/reset", self.reset_stats)
+        return app
+
+    @web.middleware
+    async def _fault_middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        if request.path.startswith("/_fake"):
+            return await handler(request)
+        operation = self._operation_for(request.method, request.path)
+        self.calls[operation] += 1
+        await self._sleep_latency()
+        fault = self._inject_fault(request.headers.get("Authorization", ""), operation)
+        if fault is not None:
+            return fault
+        return await handler(request)
+
+    async def token(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        payload = {
+            "access_token": f"fake-access-{uuid.uuid4().hex}",
+            "expires_in": 3599,
+            "token_type": "Bearer",
+            "scope": "https://www.googleapis.com/auth/gmail.modify",
+        }
+        if form.get("grant_type") == "authorization_code":
+            payload["refresh_token"] = f"fake-refresh-{uuid.uuid4().hex}"
+        return web.json_response(payload)
+
+    async def get_profile(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "emailAddress": "me@example.com",
+                "messagesTotal": len(self.mailbox.order),
+                "threadsTotal": len({m.thread_id for m in self.mailbox.messages.values()}),
+                "historyId": str(self.mailbox.history_id),
+            }
+        )
+
+    async def list_messages(self, request: web.Request) -> web.Response:
+        query = request.query
+        matches = self.mailbox.query(query.get("q", ""), query.getall("labelIds", []))
+        max_results = min(int(query.get("maxResults", "100")), 500)
+        offset = int(query.get("pageToken") or 0)
+        page = matches[offset : offset + max_results]
+        body: dict = {
+            "messages": [{"id": m.id, "threadId": m.thread_id} for m in page],
+            "resultSizeEstimate": len(matches),
+        }
+        if offset + max_results < len(matches):
+            body["nextPageToken"] = str(offset + max_results)
+        if not page:
+            body.pop("messages")
+        return web.json_response(body)
+
+    async def get_message(self, request: web.Request) -> web.Response:
+        status, body = self._message_resource(request.match_info["id"], request.query)
+        return web.json_response(body, status=status)
+
+    async def list_threads(self, request: web.Request) -> web.Response:
+        query = request.query
+        thread_ids = self.mailbox.query_threads(query.get("q", ""), query.getall("labelIds", []))
+        max_results = min(int(query.get("maxResults", "100")), 500)
+        offset = int(query.get("pageToken") or 0)
+        page = thread_ids[offset : offset + max_results]
+        body: dict = {
+            "threads": [
+                {"id": thread_id, "snippet": self.mailbox.thread_messages(thread_id)[-1].snippet}
+                for thread_id in page
+            ],
+            "resultSizeEstimate": len(thread_ids),
+        }
+        if offset + max_results < len(thread_ids):
+            body["nextPageToken"] = str(offset + max_results)
+        if not page:
+            body.pop("threads")
+        return web.json_response(body)
+
+    async def get_thread(self, request: web.Request) -> web.Response:
+        status, body = self._thread_resource(request.match_info["id"], request.query)
+        return web.json_response(body, status=status)
+
+    async def modify_message(self, request: web.Request) -> web.Response:
+        message = self.mailbox.messages.get(request.match_info["id"])
+        if message is None:
+            return _gmail_error(404, "Requested entity was not found.", "notFound")
+        payload = await request.json()
+        self.mailbox.apply_labels(
+            message, payload.get("addLabelIds") or [], payload.get("removeLabelIds") or []
+        )
+        return web.json_response(
+            {"id": message.id, "threadId": message.thread_id, "labelIds": message.label_ids}
+        )
+
+    async def batch_modify(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        ids = payload.get("ids") or []
+        if len(ids) > 1000:
+            return _gmail_error(400, "Too many ids in batchModify", "invalidArgument")
+        for message_id in ids:
+            message = self.mailbox.messages.get(message_id)
+            if message is not None:
+                self.mailbox.apply_labels(
+                    message, payload.get("addLabelIds") or [], payload.get("removeLabelIds") or []
+                )
+        return web.Response(status=204)
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        if not payload.get("raw"):
+            return _gmail_error(400, "Missing raw message", "invalidArgument")
+        message = self.mailbox.add_sent(payload["raw"])
+        return web.json_response(
+            {"id": message.id, "threadId": message.thread_id, "labelIds": message.label_ids}
+        )
+
+    async def get_attachment(self, request: web.Request) -> web.Response:
+        message = self.mailbox.messages.get(request.match_info["id"])
+        data = (
+            self.mailbox.attachment_data(message, request.match_info["attachment_id"])
+            if message is not None
+            else None
+        )
+        if data is None:
+            return _gmail_error(404, "Requested entity was not found.", "notFound")
+        return web.json_response({"size": len(data), "data": _b64(data)})
+
+    async def list_history(self, request: web.Request) -> web.Response:
+        start = int(request.query.get("startHistoryId", "0"))
+        if start < 1000:
+            return _gmail_error(404, "Requested entity was not found.", "notFound")
+        records = [record for record in self.mailbox.history if int(record["id"]) > start]
+        max_results = int(request.query.get("maxResults", "100"))
+        offset = int(request.query.get("pageToken") or 0)
+        body: dict = {
+            "history": records[offset : offset + max_results],
+            "historyId": str(self.mailbox.history_id),
+        }
+        if offset + max_results < len(records):
+            body["nextPageToken"] = str(offset + max_results)
+        return web.json_response(body)
+
+    async def batch(self, request: web.Request) -> web.Response:
+        content_type = request.headers.get("Content-Type", "")
+        boundary_match = re.search(r'boundary="?([^";]+)"?', content_type)
+        if boundary_match is None:
+            return _gmail_error(400, "Missing multipart boundary", "invalidArgument")
+        raw_body = (await request.text()).replace("\r\n", "\n")
+        authorization = request.headers.get("Authorization", "")
+
+        response_boundary = f"batch_{uuid.uuid4().hex}"
+        chunks: list[str] = []
+        for part in raw_body.split(f"--{boundary_match.group(1)}"):
+            request_line = _BATCH_REQUEST_LINE.search(part)
+            if request_line is None:
+                continue
+            content_id = _CONTENT_ID_PATTERN.search(part)
+            path, _, query_string = request_line.group(2).partition("?")
+            resource_id = path.rsplit("/", 1)[-1]
+            operation = "threads.get" if "/threads/" in path else "messages.get"
+            self.calls[operation] += 1
+            fault = self._inject_fault(authorization, operation, in_batch=True)
+            if fault is not None:
+                status, body = fault.status, json.loads(fault.body)
+            else:
+                resolve = (
+                    self._thread_resource if operation == "threads.get" else self._message_resource
+                )
+                status, body = resolve(resource_id, MultiDict(parse_qsl(query_string)))
+            reason = "OK" if status == 200 else "Error"
+            chunks.append(
+                "\r\n".join(
+                    [
+                        f"--{response_boundary}",
+                        "Content-Type: application/http",
+                        f"Content-ID: <response-{content_id.group(1) if content_id else ''}>",
+                        "",
+                        f"HTTP/1.1 {status} {reason}",
+                        "Content-Type: application/json; charset=UTF-8",
+                        "",
+                        json.dumps(body),
+                    ]
+                )
+            )
+        chunks.append(f"--{response_boundary}--\r\n")
+        return web.Response(
+            body="\r\n".join(chunks).encode("utf-8"),
+            headers={"Content-Type": f"multipart/mixed; boundary={response_boundary}"},
+        )
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "calls": dict(self.calls),
+                "totalCalls": sum(self.calls.values()),
+                "faults": dict(self.faults),
+                "historyId": self.mailbox.history_id,
+            }
+        )
+
+    async def reset_stats(self, request: web.Request) -> web.Response:
+        self.calls.clear()
+        self.faults.clear()
+        return web.json_response({"ok": True})
+
+    def _message_resource(self, message_id: str, query: MultiDict) -> tuple[int, dict]:
+        message = self.mailbox.messages.get(message_id)
+        if message is None:
+            return 404, {
+                "error": {
+                    "code": 404,
+                    "message": "Requested entity was not found.",
+                    "errors": [{"reason": "notFound"}],
+                }
+            }
+        format_ = query.get("format", "full")
+        return 200, self.mailbox.to_resource(message, format_, query.getall("metadataHeaders", []))
+
+    def _thread_resource(self, thread_id: str, query: MultiDict) -> tuple[int, dict]:
+        messages = self.mailbox.thread_messages(thread_id)
+        if not messages:
+            return 404, {
+                "error": {
+                    "code": 404,
+                    "message": "Requested entity was not found.",
+                    "errors": [{"reason": "notFound"}],
+                }
+            }
+        format_ = query.get("format", "full")
+        headers = query.getall("metadataHeaders", [])
+        return 200, {
+            "id": thread_id,
+            "historyId": str(self.mailbox.history_id),
+            "messages": [
+                self.mailbox.to_resource(message, format_, headers) for message in messages
+            ],
+        }
+
+    def _operation_for(self, method: str, path: str) -> str:
+        if path == TOKEN_PATH:
+            return "oauth.token"
+        if path == BATCH_PATH:
+            return "batch"
+        relative = path.removeprefix(API_PREFIX)
+        if relative == "/profile":
+            return "users.getProfile"
+        if relative == "/history":
+            return "history.list"
+        if relative == "/messages":
+            return "messages.list"
+        if relative == "/threads":
+            return "threads.list"
+        if relative.startswith("/threads/"):
+            return "threads.get"
+        if relative.endswith("/batchModify"):
+            return "messages.batchModify"
+        if relative.endswith("/send"):
+            return "messages.send"
+        if relative.endswith("/modify"):
+            return "messages.modify"
+        if "/attachments/" in relative:
+            return "messages.attachments.get"
+        return "messages.get" if method == "GET" else "unknown"
+
+    async def _sleep_latency(self) -> None:
+        delay_ms = self.config.latency_ms
+        if self.config.latency_jitter_ms:
+            delay_ms += self.rng.uniform(-1, 1) * self.config.latency_jitter_ms
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+    def _inject_fault(
+        self, authorization: str, operation: str, in_batch: bool = False
+    ) -> web.Response | None:
+        if operation in {"oauth.token", "batch"} and not in_batch:
+            return None
+        if self.config.quota_per_second and not self._take_quota(authorization, operation):
+            self.faults["quota_exceeded"] += 1
+            return _gmail_error(429, "User-rate limit exceeded", "userRateLimitExceeded")
+        roll = self.rng.random()
+        if roll < self.config.rate_limit_rate:
+            self.faults["rate_limited"] += 1
+            return _gmail_error(429, "Rate Limit Exceeded", "rateLimitExceeded")
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            self.faults["server_error"] += 1
+            return _gmail_error(503, "The service is currently unavailable.", "backendError")
+        return None
+
+    def _take_quota(self, authorization: str, operation: str) -> bool:
+        capacity = self.config.quota_per_second
+        bucket = self._buckets.setdefault(authorization, _QuotaBucket(tokens=capacity))
+        now = time.monotonic()
+        bucket.tokens = min(capacity, bucket.tokens + (now - bucket.refilled_at) * capacity)
+        bucket.refilled_at = now
+        cost = QUOTA_COSTS.get(operation, 5)
+        if bucket.tokens < cost:
+            return False
+        bucket.tokens -= cost
+        return True
+
+
+async def start_fake_gmail(
+    config: FakeGmailConfig, host: str = "127.0.0.1", port: int = 0
+) -> tuple[web.AppRunner, str, FakeGmailServer]:
+    """Start the fake in the current loop and return its runner, base URL and server."""
+    server = FakeGmailServer(config)
+    runner = web.AppRunner(server.create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}", server
+
+
+def environment_for(base_url: str) -> dict[str, str]:
+    """Settings that point the agent at a fake server running at `base_url`."""
+    return {
+        "GMAIL_API_BASE_URL": f"{base_url}/gmail/v1",
+        "GMAIL_BATCH_URL": f"{base_url}{BATCH_PATH}",
+        "GOOGLE_TOKEN_URL": f"{base_url}{TOKEN_PATH}",
+    }
+
+
+async def _serve(config: FakeGmailConfig, host: str, port: int) -> None:
+    runner, base_url, _ = await start_fake_gmail(config, host, port)
+    print(f"Fake Gmail listening on {base_url}; point the agent at it with:")
+    for name, value in environment_for(base_url).items():
+        print(f"  {name}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--body-kb", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503s")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429s")
+    parser.add_argument(
+        "--quota-per-second",
+        type=float,
+        default=0.0,
+        help="Per-token quota units per second (Gmail allows 250); 0 disables",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    config = FakeGmailConfig(
+        messages=args.messages,
+        body_kb=args.body_kb,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        quota_per_second=args.quota_per_second,
+        seed=args.seed,
+    )
+    try:
+        asyncio.run(_serve(config, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
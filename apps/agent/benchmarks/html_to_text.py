@@ -0,0 +1,178 @@
+"""Compare the single-pass HTML-to-text extractor with the previous regex pipeline.
+
+Builds a synthetic corpus shaped like real mail (short personal notes, table-heavy
+newsletters, multi-megabyte marketing mail with large style blocks and hidden
+preheaders, very long quoted threads, broken markup) and reports throughput for
+both implementations as JSON. The legacy pipeline takes tens of seconds on the
+broken-markup document.
+
+    uv run python -m benchmarks.html_to_text --repeat 5
+
+Also checks the extractor against `REGRESSION_CASES`, markup it once got wrong, and exits
+non-zero on a mismatch.
+"""
+
+import argparse
+import html
+import json
+import re
+import time
+
+from app.mail.html_text import html_to_text
+
+# Input -> expected text. Hidden elements whose end tag is omitted end where a parser would end
+# them, and "hidden" only counts as an attribute name, never inside a quoted value.
+REGRESSION_CASES = {
+    "hidden_p_without_end_tag": (
+        '<p style="display:none">pre<p>Real content<p>More',
+        "Real content\nMore",
+    ),
+    "hidden_word_in_attribute_value": ('<p title="a hidden gem">Hello</p>', "Hello"),
+    "hidden_li_without_end_tag": ("<ul><li hidden>preheader<li>Visible</ul>", "Visible"),
+    "hidden_td_without_end_tag": (
+        "<table><tr><td style='display:none'>preheader<td>Visible</table>",
+        "Visible",
+    ),
+    "hidden_p_closed_by_parent": ("<div><p hidden>preheader</div>Visible", "Visible"),
+    # A tag left open at the end of the document, or an attribute quote that never closes,
+    # must be handled in one linear scan rather than by backtracking over the attributes.
+    "unclosed_tag_at_end": ("<p>hi</p><a " + "x" * 40, "hi"),
+    "unclosed_img_unquoted_attributes": (
+        "<p>hello</p><img src=https://example.com/a.png width=1",
+        "hello",
+    ),
+    "unterminated_quote_at_end": ('<p>hello</p><a title="' + "x" * 40, "hello"),
+}
+
+
+def legacy_html_to_text(html_content: str) -> str:
+    """The five-pass regex conversion `GmailMailService._html_to_text` used before."""
+    without_style = re.sub(
+        r"<(script|style)[^>]*>.*?</\1>",
+        " ",
+        html_content,
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+    with_line_breaks = re.sub(r"</(p|div|li|h1|h2|h3|h4|h5|h6|br)>", "\n", without_style)
+    without_tags = re.sub(r"<[^>]+>", " ", with_line_breaks)
+    unescaped = html.unescape(without_tags)
+    collapsed = re.sub(r"[ \t]+", " ", unescaped)
+    normalized = re.sub(r"\n{3,}", "\n\n", collapsed)
+    return normalized.strip()
+
+
+def _personal_note() -> str:
+    return (
+        "<div dir='ltr'><p>Hi Sam,</p><p>Thanks for the notes from Tuesday &amp; the"
+        " follow-up doc.</p><p>Can we move the review to Friday?</p><br><p>Best,<br>Alex</p>"
+        "</div>"
+    )
+
+
+def _newsletter(sections: int) -> str:
+    rows = "".join(
+        f"<tr><td style='padding:8px'><h2>Story {index}</h2><p>Lorem ipsum dolor sit amet,"
+        f" consectetur adipiscing elit &mdash; item {index}.</p><a href='https://x.test/{index}'>"
+        "Read more</a></td><td><img src='https://x.test/i.png' alt=''></td></tr>"
+        for index in range(sections)
+    )
+    return (
+        "<html><head><title>Weekly</title><style>td{font-family:Arial}</style></head><body>"
+        "<div style='display:none;max-height:0'>Preheader text you should not see</div>"
+        f"<table width='600'>{rows}</table></body></html>"
+    )
+
+
+def _marketing(megabytes: int) -> str:
+    style_block = "<style>" + ".c{color:#333;margin:0 auto;padding:4px}" * 2000 + "</style>"
+    product = (
+        "<table role='presentation'><tr><td class='c'><div class='c'><span>Limited offer"
+        " &ndash; 40% off everything</span></div><p>Shop now</p></td></tr></table>"
+    )
+    body = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        chunk = style_block + product * 50
+        body.append(chunk)
+        size += len(chunk)
+    return "<html><head></head><body>" + "".join(body) + "</body></html>"
+
+
+def _long_thread(paragraphs: int) -> str:
+    paragraph = "<p>" + "quoted reply text with several words " * 40 + "</p>"
+    return "<html><body><blockquote>" + paragraph * paragraphs + "</blockquote></body></html>"
+
+
+def _unclosed_styles(count: int) -> str:
+    # Broken markup like this sends the old `.*?` DOTALL pattern quadratic.
+    return "<p>Hello</p>" + "<style>a{}" * count
+
+
+def _unclosed_tags(count: int) -> str:
+    # Every `<` without a `>` after it used to rescan the rest of the document.
+    return "<p>Hello</p>" + "<a href=x " * count
+
+
+def build_corpus() -> dict[str, str]:
+    return {
+        "personal_note": _personal_note(),
+        "newsletter_40": _newsletter(40),
+        "newsletter_400": _newsletter(400),
+        "marketing_1mb": _marketing(1),
+        "marketing_4mb": _marketing(4),
+        "long_thread_5mb": _long_thread(3500),
+        "unclosed_style_20k": _unclosed_styles(20_000),
+        "unclosed_tags_20k": _unclosed_tags(20_000),
+        "unterminated_quote_1mb": '<p>Hello</p><a title="' + "x" * 1_000_000,
+        "unterminated_quote_before_tags_20k": '<a title="oops>' + "<p>para</p>" * 20_000,
+        **{name: html_content for name, (html_content, _) in REGRESSION_CASES.items()},
+    }
+
+
+def _measure(function, html_content: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        function(html_content)
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    mismatches = {
+        name: html_to_text(html_content)
+        for name, (html_content, expected) in REGRESSION_CASES.items()
+        if html_to_text(html_content) != expected
+    }
+    results = []
+    for name, html_content in build_corpus().items():
+        legacy_seconds = _measure(legacy_html_to_text, html_content, args.repeat)
+        single_pass_seconds = _measure(html_to_text, html_content, args.repeat)
+        size_mb = len(html_content.encode("utf-8")) / (1024 * 1024)
+        results.append(
+            {
+                "document": name,
+                "sizeBytes": len(html_content.encode("utf-8")),
+                "legacyMs": round(legacy_seconds * 1000, 3),
+                "singlePassMs": round(single_pass_seconds * 1000, 3),
+                "legacyMbPerSecond": round(size_mb / legacy_seconds, 2),
+                "singlePassMbPerSecond": round(size_mb / single_pass_seconds, 2),
+                "speedup": round(legacy_seconds / single_pass_seconds, 2),
+            }
+        )
+    print(
+        json.dumps(
+            {"repeat": args.repeat, "results": results, "regressionMismatches": mismatches},
+            indent=2,
+        )
+    )
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
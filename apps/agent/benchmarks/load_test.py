@@ -0,0 +1,497 @@
+"""End-to-end load test for /mail, /ai/chat and /ws/events against local stand-ins.
+
+Starts the fake Gmail server and the FastAPI app (uvicorn, one worker) in separate processes,
+with the search agent's LLM replaced by a scripted tool-calling model, and seeds users and
+sessions straight into Postgres. Each virtual user then loops through inbox paging, detail
+opens and a chat turn (over its own /ws/events socket, or POST /ai/chat for a share of turns).
+Per-endpoint p50/p95/p99 latency, throughput and error rate, the app's /metrics payload and
+the fake's call counts are written as JSON so runs can be diffed across commits.
+
+    DATABASE_URL=postgresql://... uv run python -m benchmarks.load_test \
+        --users 50 --duration 60 --gmail-latency-ms 60 --output load-test.json
+
+Requires a migrated local Postgres. Seeded users are deleted at the end of the run.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import UTC, datetime, timedelta
+
+import aiohttp
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.utils.stats import percentile
+from benchmarks.fake_gmail import FakeGmailConfig, environment_for, start_fake_gmail
+
+ENDPOINT_INBOX = "GET /mail/inbox"
+ENDPOINT_DETAIL = "GET /mail/{id}"
+ENDPOINT_WS_TOKEN = "POST /ws/token"
+ENDPOINT_WS_CONNECT = "WS /ws/events connect"
+ENDPOINT_WS_CHAT = "WS /ws/events chat turn"
+ENDPOINT_HTTP_CHAT = "POST /ai/chat"
+METRICS_TOKEN = "load-test-metrics"
+
+
+class ScriptedSearchChatModel(BaseChatModel):
+    """Chat model that searches once, then answers, without calling a provider.
+
+    The first turn asks for the candidate search tool; once a tool result is in the history it
+    returns the JSON answer the search agent expects. `latency_ms` stands in for model time.
+    """
+
+    tool_name: str = "search_mail_candidates"
+    query: str = "invoice"
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "load-test-scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next_message(self, messages) -> AIMessage:
+        if any(isinstance(message, ToolMessage) for message in messages):
+            return AIMessage(
+                content=json.dumps(
+                    {
+                        "assistant_message": "Here are the messages that match.",
+                        "ui_actions": [],
+                        "result_ids": [],
+                    }
+                )
+            )
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": self.tool_name,
+                    "args": {"query": self.query, "top_k": 10},
+                    "id": f"call_{uuid.uuid4().hex}",
+                }
+            ],
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _gmail_process(config: FakeGmailConfig, port: int, ready, stop) -> None:
+    async def serve() -> None:
+        runner, _, _ = await start_fake_gmail(config, "127.0.0.1", port)
+        ready.set()
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        await runner.cleanup()
+
+    asyncio.run(serve())
+
+
+def _app_process(environment: dict[str, str], port: int, llm_latency_ms: float) -> None:
+    # Settings are read at import time, so point the app at the fake before importing it.
+    os.environ.update(environment)
+    import uvicorn
+
+    from app.ai.search_agent import SearchAgent
+    from app.main import app
+
+    def build_scripted_llm(self, provider: str) -> ScriptedSearchChatModel:
+        return ScriptedSearchChatModel(
+            tool_name=self.settings.tool_config.search_tool_name,
+            latency_ms=llm_latency_ms,
+        )
+
+    SearchAgent._build_llm = build_scripted_llm
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+async def _seed_sessions(users: int) -> list[tuple[str, str]]:
+    from app.config.db import close_db, get_session_maker, init_db
+    from app.models import OauthAccount, RefreshToken, User
+    from app.utils.constants import PROVIDER_NAME
+    from app.utils.security import generate_session_token
+
+    await init_db()
+    try:
+        seeded: list[tuple[str, str]] = []
+        far_future = datetime.now(UTC) + timedelta(days=1)
+        async with get_session_maker()() as session:
+            for index in range(users):
+                user = User(first_name="Load", last_name=f"User {index}")
+                session.add(user)
+                await session.flush()
+                session_token = generate_session_token()
+                session.add(
+                    OauthAccount(
+                        user_id=user.id,
+                        provider=PROVIDER_NAME,
+                        provider_user_id=f"load-test-{uuid.uuid4().hex}",
+                        email=f"load-test-{uuid.uuid4().hex}@example.com",
+                        access_token="load-test-access",
+                        refresh_token="load-test-refresh",
+                        expires_at=far_future,
+                    )
+                )
+                session.add(
+                    RefreshToken(user_id=user.id, token_id=session_token, expires_at=far_future)
+                )
+                seeded.append((str(user.id), session_token))
+            await session.commit()
+        return seeded
+    finally:
+        await close_db()
+
+
+async def _delete_users(user_ids: list[str]) -> None:
+    from sqlalchemy import delete
+
+    from app.config.db import close_db, get_session_maker, init_db
+    from app.models import User
+
+    await init_db()
+    try:
+        async with get_session_maker()() as session:
+            await session.execute(
+                delete(User).where(User.id.in_([uuid.UUID(user_id) for user_id in user_ids]))
+            )
+            await session.commit()
+    finally:
+        await close_db()
+
+
+class LoadRecorder:
+    """Collect latencies and outcomes per endpoint, ignoring samples taken during warm-up."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies_ms: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, started_at: float, outcome: str, ok: bool) -> None:
+        if started_at < self.measure_from:
+            return
+        self.latencies_ms[endpoint].append((time.perf_counter() - started_at) * 1000)
+        self.statuses[endpoint][outcome] += 1
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def summary(self, measured_seconds: float) -> dict:
+        endpoints = {}
+        for endpoint, samples in sorted(self.latencies_ms.items()):
+            ordered = sorted(samples)
+            count = len(ordered)
+            endpoints[endpoint] = {
+                "count": count,
+                "errors": self.errors[endpoint],
+                "errorRate": round(self.errors[endpoint] / count, 4),
+                "throughputRps": round(count / measured_seconds, 2),
+                "p50Ms": round(percentile(ordered, 0.50), 1),
+                "p95Ms": round(percentile(ordered, 0.95), 1),
+                "p99Ms": round(percentile(ordered, 0.99), 1),
+                "maxMs": round(ordered[-1], 1),
+                "outcomes": dict(self.statuses[endpoint]),
+            }
+        return endpoints
+
+
+class VirtualUser:
+    """One signed-in client paging the inbox, opening mail and chatting until the deadline."""
+
+    def __init__(
+        self,
+        index: int,
+        session_token: str,
+        base_url: str,
+        http: aiohttp.ClientSession,
+        recorder: LoadRecorder,
+        args: argparse.Namespace,
+    ):
+        self.index = index
+        self.base_url = base_url
+        self.http = http
+        self.recorder = recorder
+        self.args = args
+        self.headers = {"x-session-token": session_token}
+        self.rng = random.Random(args.seed + index)
+        self.websocket: aiohttp.ClientWebSocketResponse | None = None
+        self.turns = 0
+
+    async def run(self, deadline: float) -> None:
+        try:
+            while time.perf_counter() < deadline:
+                message_ids = await self._page_inbox()
+                for message_id in self.rng.sample(
+                    message_ids, min(self.args.opens, len(message_ids))
+                ):
+                    await self._open_detail(message_id)
+                if self.rng.random() < self.args.http_chat_ratio:
+                    await self._http_chat_turn()
+                else:
+                    await self._ws_chat_turn()
+                await asyncio.sleep(self.args.think_ms / 1000)
+        finally:
+            if self.websocket is not None:
+                await self.websocket.close()
+
+    async def _request(self, endpoint: str, method: str, path: str, **kwargs) -> dict | None:
+        started_at = time.perf_counter()
+        try:
+            async with self.http.request(
+                method, f"{self.base_url}{path}", headers=self.headers, **kwargs
+            ) as response:
+                body = await response.read()
+                ok = response.status < 400
+                self.recorder.record(endpoint, started_at, str(response.status), ok)
+                return json.loads(body) if ok and body else None
+        except Exception as exc:
+            self.recorder.record(endpoint, started_at, type(exc).__name__, False)
+            return None
+
+    async def _page_inbox(self) -> list[str]:
+        message_ids: list[str] = []
+        page_token: str | None = None
+        for _ in range(self.args.pages):
+            params = {"page_size": str(self.args.page_size)}
+            if page_token:
+                params["page_token"] = page_token
+            page = await self._request(ENDPOINT_INBOX, "GET", "/mail/inbox", params=params)
+            if not page:
+                break
+            message_ids.extend(item["id"] for item in page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
+        return message_ids
+
+    async def _open_detail(self, message_id: str) -> None:
+        await self._request(ENDPOINT_DETAIL, "GET", f"/mail/{message_id}")
+
+    def _chat_payload(self) -> dict:
+        return {
+            "message": f"find invoices from last month ({self.turns})",
+            "model": "gemini",
+            "context": {"activeMailbox": "inbox", "timezone": "UTC"},
+        }
+
+    async def _http_chat_turn(self) -> None:
+        self.turns += 1
+        await self._request(ENDPOINT_HTTP_CHAT, "POST", "/ai/chat", json=self._chat_payload())
+
+    async def _connect(self) -> aiohttp.ClientWebSocketResponse | None:
+        token_body = await self._request(ENDPOINT_WS_TOKEN, "POST", "/ws/token")
+        if not token_body or not token_body.get("token"):
+            return None
+        started_at = time.perf_counter()
+        ws_url = self.base_url.replace("http", "ws", 1) + "/ws/events"
+        try:
+            websocket = await self.http.ws_connect(ws_url, params={"token": token_body["token"]})
+        except Exception as exc:
+            self.recorder.record(ENDPOINT_WS_CONNECT, started_at, type(exc).__name__, False)
+            return None
+        self.recorder.record(ENDPOINT_WS_CONNECT, started_at, "open", True)
+        return websocket
+
+    async def _ws_chat_turn(self) -> None:
+        if self.websocket is None or self.websocket.closed:
+            self.websocket = await self._connect()
+            if self.websocket is None:
+                return
+        self.turns += 1
+        chat_id = f"load-{self.index}-{self.turns}"
+        started_at = time.perf_counter()
+        try:
+            await self.websocket.send_json(
+                {"type": "chat_request", "payload": {"chatId": chat_id, **self._chat_payload()}}
+            )
+            async with asyncio.timeout(self.args.chat_timeout):
+                while True:
+                    frame = await self.websocket.receive()
+                    if frame.type != aiohttp.WSMsgType.TEXT:
+                        raise ConnectionError(f"socket {frame.type.name.lower()}")
+                    event = json.loads(frame.data)
+                    if event.get("payload", {}).get("chatId") not in (chat_id, None):
+                        continue
+                    if event.get("type") == "chat_completed":
+                        self.recorder.record(ENDPOINT_WS_CHAT, started_at, "chat_completed", True)
+                        return
+                    if event.get("type") == "chat_error":
+                        self.recorder.record(ENDPOINT_WS_CHAT, started_at, "chat_error", False)
+                        return
+        except Exception as exc:
+            self.recorder.record(ENDPOINT_WS_CHAT, started_at, type(exc).__name__, False)
+            await self.websocket.close()
+            self.websocket = None
+
+
+async def _wait_until_ready(base_url: str, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as http:
+        while time.perf_counter() < deadline:
+            try:
+                async with http.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"App at {base_url} did not become healthy within {timeout}s")
+
+
+async def _fetch_json(
+    http: aiohttp.ClientSession, url: str, headers: dict[str, str] | None = None
+) -> dict | None:
+    try:
+        async with http.get(url, headers=headers) as response:
+            return await response.json() if response.status == 200 else None
+    except Exception as exc:
+        print(f"Error in load_test._fetch_json({url}): {exc}")
+        return None
+
+
+async def _drive(base_url: str, gmail_url: str, sessions: list[str], args) -> dict:
+    async with aiohttp.ClientSession() as http:
+        async with http.post(f"{gmail_url}/_fake/reset"):
+            pass
+        started_at = time.perf_counter()
+        measure_from = started_at + args.warmup
+        deadline = measure_from + args.duration
+        recorder = LoadRecorder(measure_from)
+        virtual_users = [
+            VirtualUser(index, session_token, base_url, http, recorder, args)
+            for index, session_token in enumerate(sessions)
+        ]
+
+        async def staggered(virtual_user: VirtualUser) -> None:
+            # Spread logins over the ramp so the first second is not one thundering herd.
+            await asyncio.sleep(args.ramp * virtual_user.index / max(1, len(virtual_users)))
+            await virtual_user.run(deadline)
+
+        await asyncio.gather(*(staggered(virtual_user) for virtual_user in virtual_users))
+        measured_seconds = max(0.001, time.perf_counter() - measure_from)
+        return {
+            "measuredSeconds": round(measured_seconds, 2),
+            "endpoints": recorder.summary(measured_seconds),
+            "appMetrics": await _fetch_json(
+                http, f"{base_url}/metrics", {"Authorization": f"Bearer {METRICS_TOKEN}"}
+            ),
+            "gmailCalls": await _fetch_json(http, f"{gmail_url}/_fake/stats"),
+        }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds first")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Seconds to start all users")
+    parser.add_argument("--pages", type=int, default=3, help="Inbox pages per iteration")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--opens", type=int, default=3, help="Detail opens per iteration")
+    parser.add_argument("--http-chat-ratio", type=float, default=0.2)
+    parser.add_argument("--think-ms", type=float, default=250.0)
+    parser.add_argument("--chat-timeout", type=float, default=30.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=400.0)
+    parser.add_argument("--gmail-messages", type=int, default=2000)
+    parser.add_argument("--gmail-body-kb", type=int, default=8)
+    parser.add_argument("--gmail-latency-ms", type=float, default=40.0)
+    parser.add_argument("--gmail-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--gmail-error-rate", type=float, default=0.0)
+    parser.add_argument("--gmail-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="load-test.json", help="Where to write results")
+    args = parser.parse_args()
+    load_dotenv()
+
+    gmail_config = FakeGmailConfig(
+        messages=args.gmail_messages,
+        body_kb=args.gmail_body_kb,
+        latency_ms=args.gmail_latency_ms,
+        latency_jitter_ms=args.gmail_jitter_ms,
+        error_rate=args.gmail_error_rate,
+        rate_limit_rate=args.gmail_rate_limit_rate,
+        seed=args.seed,
+    )
+    gmail_port, app_port = _free_port(), _free_port()
+    gmail_url = f"http://127.0.0.1:{gmail_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+
+    context = multiprocessing.get_context("spawn")
+    gmail_ready, gmail_stop = context.Event(), context.Event()
+    gmail = context.Process(
+        target=_gmail_process, args=(gmail_config, gmail_port, gmail_ready, gmail_stop)
+    )
+    gmail.start()
+    app_server = None
+    user_ids: list[str] = []
+    try:
+        if not gmail_ready.wait(timeout=30):
+            raise RuntimeError("Fake Gmail did not start")
+        seeded = asyncio.run(_seed_sessions(args.users))
+        user_ids = [user_id for user_id, _ in seeded]
+        app_server = context.Process(
+            target=_app_process,
+            args=(
+                {**environment_for(gmail_url), "METRICS_TOKEN": METRICS_TOKEN},
+                app_port,
+                args.llm_latency_ms,
+            ),
+        )
+        app_server.start()
+        asyncio.run(_wait_until_ready(app_url, timeout=60))
+
+        started_at = datetime.now(UTC)
+        run = asyncio.run(_drive(app_url, gmail_url, [token for _, token in seeded], args))
+        report = {
+            "gitRevision": _git_revision(),
+            "startedAt": started_at.isoformat(),
+            "config": vars(args),
+            **run,
+        }
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+        print(json.dumps({"output": args.output, "endpoints": report["endpoints"]}, indent=2))
+    finally:
+        if app_server is not None:
+            app_server.terminate()
+            app_server.join(timeout=10)
+        gmail_stop.set()
+        gmail.join(timeout=10)
+        if user_ids:
+            asyncio.run(_delete_users(user_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measure event-loop stalls while large mail bodies are decoded and converted.
+
+Runs a heartbeat task that wakes every millisecond, then processes a batch of large
+base64 HTML bodies through `MailCpuOffloader` in each mode. Reports the worst and p99
+heartbeat lag (how long other requests on the worker would have waited) as JSON.
+
+    uv run python -m benchmarks.mail_offload --bodies 8 --size-mb 2
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+
+from app.mail.html_text import html_to_text
+from app.mail.mime import decode_part_data
+from app.mail.offload import MailCpuOffloader
+
+
+def _encoded_body(size_bytes: int) -> str:
+    row = "<tr><td class='c'>Item</td><td>Some descriptive marketing text &amp; more</td></tr>"
+    document = "<html><body><table>" + row * (size_bytes // len(row)) + "</table></body></html>"
+    return base64.urlsafe_b64encode(document.encode("utf-8")).decode().rstrip("=")
+
+
+def _convert(encoded: str) -> str:
+    return html_to_text(decode_part_data(encoded, "utf-8"), 10_000_000)
+
+
+async def _heartbeat(lags_ms: list[float], stop: asyncio.Event) -> None:
+    interval = 0.001
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags_ms.append((time.perf_counter() - started_at - interval) * 1000)
+
+
+async def _run_mode(mode: str, bodies: list[str], workers: int) -> dict:
+    offloader = MailCpuOffloader()
+    offloader.mode = mode
+    offloader.workers = workers
+    offloader.min_bytes = 0
+    # Warm the pool so process start-up is not counted as a stall.
+    await offloader.run(_convert, bodies[0][:1024], size=1)
+
+    lags_ms: list[float] = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(lags_ms, stop))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(offloader.run(_convert, body, size=len(body)) for body in bodies))
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    stop.set()
+    await heartbeat
+    offloader.shutdown()
+
+    ordered = sorted(lags_ms) or [0.0]
+    return {
+        "mode": mode,
+        "totalMs": round(elapsed_ms, 1),
+        "maxLoopLagMs": round(ordered[-1], 1),
+        "p99LoopLagMs": round(ordered[int(0.99 * (len(ordered) - 1))], 1),
+        "heartbeats": len(lags_ms),
+        "stats": offloader.get_stats(),
+    }
+
+
+async def _main(bodies: int, size_mb: float, workers: int) -> None:
+    corpus = [_encoded_body(int(size_mb * 1024 * 1024)) for _ in range(bodies)]
+    results = [await _run_mode(mode, corpus, workers) for mode in ("off", "thread", "process")]
+    print(json.dumps({"bodies": bodies, "sizeMb": size_mb, "results": results}, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bodies", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(_main(args.bodies, args.size_mb, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare JSONResponse rendering with the TypeAdapter byte path for mail and AI payloads.
+
+The old path is `model_dump(by_alias=True)` followed by `JSONResponse`'s stdlib `json.dumps`;
+the new path is `TypeAdapter.dump_json`. Verifies both produce identical bytes and reports
+microseconds per response as JSON.
+
+    uv run python -m benchmarks.response_serialization --iterations 2000
+"""
+
+import argparse
+import json
+import time
+
+from fastapi.responses import JSONResponse
+
+from app.ai.handler import AI_CHAT_RESPONSE_ADAPTER
+from app.ai.schemas import AIChatResponse, AITrace, AIUiAction
+from app.mail.handler import MAIL_DETAIL_RESPONSE_ADAPTER, MAIL_LIST_RESPONSE_ADAPTER
+from app.mail.schemas import MailDetailResponse, MailListItem, MailListResponse
+from app.utils.serialization import model_json_response
+
+
+def _list_item(index: int) -> MailListItem:
+    return MailListItem(
+        id=f"18c{index:013x}",
+        sender=f"Sender {index} <sender{index}@example.com>",
+        subject=f"Quarterly update #{index} — résumé attached",
+        snippet="Hi team, here is the latest summary of what shipped this week and " * 2,
+        dateLabel="Mar 04",
+        unread=index % 3 == 0,
+    )
+
+
+def build_payloads() -> dict:
+    items = [_list_item(index) for index in range(50)]
+    return {
+        "mail_list_50": (MAIL_LIST_RESPONSE_ADAPTER, MailListResponse(items=items)),
+        "mail_detail_64kb": (
+            MAIL_DETAIL_RESPONSE_ADAPTER,
+            MailDetailResponse(
+                id="18c0000000001",
+                sender="Sender <sender@example.com>",
+                subject="Newsletter",
+                snippet="Weekly digest",
+                body="plain text line\n" * 2000,
+                htmlBody="<p>html paragraph &amp; text</p>" * 1000,
+                dateLabel="Mar 04",
+                unread=False,
+            ),
+        ),
+        "ai_chat_30": (
+            AI_CHAT_RESPONSE_ADAPTER,
+            AIChatResponse(
+                assistantMessage="I found 30 messages about the quarterly update. " * 4,
+                uiActions=[AIUiAction(type="show_results", payload={"ids": [i.id for i in items]})],
+                results=items[:30],
+                trace=AITrace(providerUsed="gemini", toolsCalled=["search"], finalCount=30),
+            ),
+        ),
+    }
+
+
+def _per_call_us(render, iterations: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - started_at) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = []
+    for name, (adapter, value) in build_payloads().items():
+        legacy_body = JSONResponse(content=value.model_dump(by_alias=True)).body
+        fast_body = model_json_response(adapter, value).body
+        legacy_us = _per_call_us(
+            lambda value=value: JSONResponse(content=value.model_dump(by_alias=True)),
+            args.iterations,
+        )
+        fast_us = _per_call_us(
+            lambda adapter=adapter, value=value: model_json_response(adapter, value),
+            args.iterations,
+        )
+        results.append(
+            {
+                "payload": name,
+                "bytes": len(fast_body),
+                "identical": legacy_body == fast_body,
+                "jsonResponseUs": round(legacy_us, 1),
+                "typeAdapterUs": round(fast_us, 1),
+                "speedup": round(legacy_us / fast_us, 2),
+            }
+        )
+    print(json.dumps({"iterations": args.iterations, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
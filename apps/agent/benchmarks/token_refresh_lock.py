@@ -0,0 +1,173 @@
+"""Check that concurrent workers refresh one Google token exactly once.
+
+Starts a fake Google token endpoint, seeds a user whose access token is about to
+expire, then runs several worker processes, each with its own event loop, engine
+and token cache, that all call `GmailTokenService.get_valid_access_token` at once.
+
+    DATABASE_URL=postgresql://... uv run python -m benchmarks.token_refresh_lock --workers 8
+
+Requires a migrated local Postgres. Exits non-zero if Google saw more than one
+refresh or if workers ended up with different tokens.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+from app.config.db import close_db, get_session_maker, init_db
+from app.config.http import close_http_client, init_http_client
+from app.models import OauthAccount, User
+from app.utils.constants import PROVIDER_NAME
+
+
+async def _run_token_server(port: int, refresh_count, ready, stop, latency_ms: int) -> None:
+    async def handle_token(_: web.Request) -> web.Response:
+        with refresh_count.get_lock():
+            refresh_count.value += 1
+        await asyncio.sleep(latency_ms / 1000)
+        return web.json_response(
+            {
+                "access_token": f"fresh-{uuid.uuid4().hex}",
+                "expires_in": 3600,
+                "token_type": "Bearer",
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post("/token", handle_token)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    ready.set()
+    while not stop.is_set():
+        await asyncio.sleep(0.05)
+    await runner.cleanup()
+
+
+def _token_server_process(port, refresh_count, ready, stop, latency_ms) -> None:
+    asyncio.run(_run_token_server(port, refresh_count, ready, stop, latency_ms))
+
+
+async def _seed_account() -> str:
+    await init_db()
+    try:
+        async with get_session_maker()() as session:
+            user = User(first_name="Refresh", last_name="Check")
+            session.add(user)
+            await session.flush()
+            session.add(
+                OauthAccount(
+                    user_id=user.id,
+                    provider=PROVIDER_NAME,
+                    provider_user_id=f"refresh-check-{uuid.uuid4().hex}",
+                    email="refresh-check@example.com",
+                    access_token="stale",
+                    refresh_token="refresh-token",
+                    expires_at=datetime.now(UTC) + timedelta(seconds=5),
+                )
+            )
+            await session.commit()
+            return str(user.id)
+    finally:
+        await close_db()
+
+
+async def _delete_user(user_id: str) -> None:
+    await init_db()
+    try:
+        async with get_session_maker()() as session:
+            user = await session.get(User, uuid.UUID(user_id))
+            if user is not None:
+                await session.delete(user)
+                await session.commit()
+    finally:
+        await close_db()
+
+
+async def _run_worker(user_id: str, token_url: str, requests_per_worker: int, start) -> list[str]:
+    import app.mail.service as mail_service_module
+
+    mail_service_module.GOOGLE_TOKEN_URL = token_url
+    await init_db()
+    await init_http_client()
+    try:
+        token_service = mail_service_module.GmailTokenService()
+        while not start.is_set():
+            await asyncio.sleep(0.001)
+        return await asyncio.gather(
+            *(token_service.get_valid_access_token(user_id) for _ in range(requests_per_worker))
+        )
+    finally:
+        await close_http_client()
+        await close_db()
+
+
+def _worker_process(user_id, token_url, requests_per_worker, start, results) -> None:
+    results.put(asyncio.run(_run_worker(user_id, token_url, requests_per_worker, start)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--requests-per-worker", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--token-latency-ms", type=int, default=150)
+    args = parser.parse_args()
+
+    load_dotenv()
+    os.environ.setdefault("GOOGLE_CLIENT_ID", "refresh-check")
+    os.environ.setdefault("GOOGLE_CLIENT_SECRET", "refresh-check")
+
+    context = multiprocessing.get_context("spawn")
+    refresh_count = context.Value("i", 0)
+    ready, stop, start = context.Event(), context.Event(), context.Event()
+    results = context.Queue()
+
+    server = context.Process(
+        target=_token_server_process,
+        args=(args.port, refresh_count, ready, stop, args.token_latency_ms),
+    )
+    server.start()
+    ready.wait(timeout=10)
+
+    user_id = asyncio.run(_seed_account())
+    try:
+        token_url = f"http://127.0.0.1:{args.port}/token"
+        workers = [
+            context.Process(
+                target=_worker_process,
+                args=(user_id, token_url, args.requests_per_worker, start, results),
+            )
+            for _ in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        start.set()
+        tokens = [token for _ in workers for token in results.get(timeout=60)]
+        for worker in workers:
+            worker.join()
+    finally:
+        asyncio.run(_delete_user(user_id))
+        stop.set()
+        server.join()
+
+    report = {
+        "workers": args.workers,
+        "requests": len(tokens),
+        "googleRefreshes": refresh_count.value,
+        "distinctTokens": len(set(tokens)),
+    }
+    print(json.dumps(report))
+    if refresh_count.value != 1 or len(set(tokens)) != 1:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,18 +13,39 @@ export async function GET(
     }
 
     const { id } = await context.params;
+    const headers: Record<string, string> = {
+      "x-session-token": sessionToken,
+    };
+    const ifNoneMatch = request.headers.get("if-none-match");
+    if (ifNoneMatch) {
+      headers["if-none-match"] = ifNoneMatch;
+    }
+
     const backendResponse = await fetch(`${BACKEND_URL}/mail/${id}`, {
       method: "GET",
-      headers: {
-        "x-session-token": sessionToken,
-      },
+      headers,
       cache: "no-store",
     });
 
+    const cacheHeaders: Record<string, string> = {};
+    const etag = backendResponse.headers.get("etag");
+    if (etag) {
+      cacheHeaders["ETag"] = etag;
+      cacheHeaders["Cache-Control"] =
+        backendResponse.headers.get("cache-control") || "private, no-cache";
+    }
+
+    if (backendResponse.status === 304) {
+      return new NextResponse(null, { status: 304, headers: cacheHeaders });
+    }
+
     const payload = await backendResponse
       .json()
       .catch(() => ({ error: "Invalid backend response" }));
-    return NextResponse.json(payload, { status: backendResponse.status });
+    return NextResponse.json(payload, {
+      status: backendResponse.status,
+      headers: cacheHeaders,
+    });
   } catch (error) {
     console.error("Error in GET /api/mail/[id]:", error);
     return NextResponse.json({ error: String(error) }, { status: 500 });